@@ -0,0 +1,47 @@
+"""Send requests to an ASGI application without a server."""
+
+import asyncio
+import time
+
+
+async def get(application, path, headers=()):
+    """Send a GET request for ``path`` to ``application``.
+
+    Returns the status of the response and its body, as a list of
+    ``(seconds since the request, chunk)``.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), *headers],
+        # Not an INTERNAL_IPS address: no debug toolbar.
+        "client": ("192.0.2.1", 40000),
+        "server": ("localhost", 80),
+    }
+    request = [{"type": "http.request", "body": b"", "more_body": False}]
+    status = None
+    chunks = []
+    started = time.perf_counter()
+
+    async def receive():
+        if request:
+            return request.pop()
+        # The client stays connected until the response is sent.
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message.get("body"):
+            chunks.append((time.perf_counter() - started, message["body"]))
+
+    await application(scope, receive, send)
+    return status, chunks
@@ -0,0 +1,28 @@
+"""Helpers shared by the benchmark scripts."""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup(database_url=None):
+    """Configure Django against a throw-away SQLite database and migrate it.
+
+    Returns the path of the temporary directory holding the database.
+    """
+    sys.path.insert(0, str(BASE_DIR))
+    tmpdir = tempfile.mkdtemp(prefix="freework-bench-")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
+    os.environ["DJANGO_DATABASE_URL"] = (
+        database_url or f"sqlite:///{tmpdir}/bench.sqlite3"
+    )
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+    return Path(tmpdir)
@@ -0,0 +1,31 @@
+"""Run crawls of the freework spider from the benchmark scripts."""
+
+import logging
+import os
+
+
+def crawler_runner(**overrides):
+    """Install the reactor and return ``(runner, reactor)`` for the project."""
+    os.environ["SCRAPY_SETTINGS_MODULE"] = "freework.scraper.settings"
+
+    from scrapy.utils.project import get_project_settings
+    from scrapy.utils.reactor import install_reactor
+
+    settings = get_project_settings()
+    settings.set("LOG_LEVEL", "WARNING")
+    settings.set("ROBOTSTXT_OBEY", False)
+    settings.set("TELNETCONSOLE_ENABLED", False)
+    for name, value in overrides.items():
+        settings.set(name, value)
+    logging.getLogger("scrapy").setLevel(logging.WARNING)
+    install_reactor(settings["TWISTED_REACTOR"])
+
+    from scrapy.crawler import CrawlerRunner
+    from twisted.internet import reactor
+
+    return CrawlerRunner(settings), reactor
+
+
+def elapsed(crawler):
+    stats = crawler.stats.get_stats()
+    return (stats["finish_time"] - stats["start_time"]).total_seconds()
@@ -0,0 +1,108 @@
+"""
+Compare fixed concurrencies with the adaptive throttle against a local stand-in
+server that serves ``--capacity`` requests at a time with ``--delay`` seconds of
+latency, and answers the others 429 with a ``Retry-After`` (or, with
+``--queue``, makes them wait).
+
+The adaptive throttle crawls twice: the second crawl starts from the speed
+learned by the first one.
+
+Usage:
+    python -m benchmarks.adaptive_throttle [--offers 500] [--capacity 4]
+"""
+
+import argparse
+
+from benchmarks import _django, _scrapy
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import LISTING_PATH, build_site
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=500)
+    parser.add_argument("--capacity", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.05)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--queue", action="store_true")
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    _django.setup()
+    runner, reactor = _scrapy.crawler_runner(
+        CONCURRENT_REQUESTS=args.max_concurrency,
+        CONCURRENT_REQUESTS_PER_DOMAIN=args.max_concurrency,
+    )
+
+    from twisted.internet import defer
+
+    from freework.crawls.models import HostThrottle
+    from freework.offers.models import JobOffer
+    from freework.scraper.spiders.freework import FreeWorkSpider
+
+    runs = [
+        (f"fixed {args.max_concurrency}", {"FREEWORK_THROTTLE_ENABLED": False}),
+        (
+            f"fixed {args.capacity}",
+            {
+                "FREEWORK_THROTTLE_ENABLED": False,
+                "CONCURRENT_REQUESTS_PER_DOMAIN": args.capacity,
+            },
+        ),
+        ("adaptive, first", {}),
+        ("adaptive, second", {}),
+    ]
+    results = []
+    HostThrottle.objects.all().delete()
+
+    with FixtureServer(
+        build_site(args.offers),
+        delay=args.delay,
+        capacity=args.capacity,
+        retry_after=None if args.queue else args.retry_after,
+    ) as server:
+
+        @defer.inlineCallbacks
+        def crawl():
+            for name, settings in runs:
+                JobOffer.objects.all().delete()
+                spider = type(
+                    "FreeWorkSpider", (FreeWorkSpider,), {"custom_settings": settings}
+                )
+                crawler = runner.create_crawler(spider)
+                throttled = server.throttled
+                yield runner.crawl(crawler, start_url=server.url + LISTING_PATH)
+                stats = crawler.stats.get_stats()
+                host = f"throttle/{server.httpd.server_address[0]}/concurrency"
+                seconds = _scrapy.elapsed(crawler)
+                pages = stats.get("downloader/response_status_count/200", 0)
+                results.append(
+                    (
+                        name,
+                        pages,
+                        server.throttled - throttled,
+                        stats.get("retry/max_reached", 0),
+                        seconds,
+                        pages / seconds,
+                        stats.get(host),
+                    )
+                )
+            reactor.stop()
+
+        reactor.callWhenRunning(crawl)
+        reactor.run()
+
+    print(
+        f"{'crawl':>17} {'pages':>6} {'429':>5} {'lost':>5} {'seconds':>8} "
+        f"{'pages/s':>8} {'learned':>8}"
+    )
+    for name, pages, throttled, lost, seconds, rate, learned in results:
+        learned = "" if learned is None else f"{learned:.1f}"
+        print(
+            f"{name:>17} {pages:>6} {throttled:>5} {lost:>5} {seconds:>8.2f} "
+            f"{rate:>8.1f} {learned:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare the dashboard statistics computed from the offers with the same
+statistics read from the daily aggregate tables.
+
+Generates ``--offers`` offers, rebuilds the aggregates, then times each widget
+query both ways and the refresh of the days touched by a small crawl.
+
+Usage:
+    python -m benchmarks.aggregates [--offers 500000]
+"""
+
+import argparse
+import time
+from datetime import timedelta
+
+from benchmarks import _django
+from benchmarks.dashboard_queries import generate
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def live_queries():
+    """The widget statistics computed from the offers on every page view."""
+    from django.db.models import Avg, Count
+    from django.db.models.functions import TruncWeek
+
+    from freework.offers.models import JobOffer
+
+    return {
+        "weekly rates": JobOffer.objects.filter(daily_rate__isnull=False)
+        .annotate(week=TruncWeek("published_at"))
+        .values("week", "skills__name")
+        .annotate(offer_count=Count("pk"), average_daily_rate=Avg("daily_rate"))
+        .order_by("-week", "skills__name"),
+        "offers per location": JobOffer.objects.values("location__name")
+        .annotate(offer_count=Count("pk"))
+        .order_by("-offer_count", "location__name"),
+    }
+
+
+def aggregate_queries():
+    """The same statistics read from the aggregate tables."""
+    from freework.offers.models import DailyLocationStat, DailySkillStat
+
+    return {
+        "weekly rates": DailySkillStat.objects.weekly_rates(),
+        "offers per location": DailyLocationStat.objects.offer_counts(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=500_000)
+    parser.add_argument(
+        "--touched-days", type=int, default=2, help="Days refreshed after a crawl."
+    )
+    args = parser.parse_args()
+
+    _django.setup()
+    from freework.offers import aggregates
+    from freework.offers.models import JobOffer
+
+    generate(args.offers)
+    _, elapsed = timed(aggregates.rebuild)
+    print(f"Rebuilt the aggregates of {args.offers} offers in {elapsed:.0f} ms")
+
+    latest = aggregates.publication_day(
+        JobOffer.objects.order_by("-published_at").first().published_at
+    )
+    days = [latest - timedelta(days=n) for n in range(args.touched_days)]
+    _, elapsed = timed(lambda: aggregates.refresh_days(days))
+    print(f"Refreshed {len(days)} touched days in {elapsed:.0f} ms\n")
+
+    live = live_queries()
+    for name, queryset in aggregate_queries().items():
+        rows, precomputed = timed(lambda: list(queryset))
+        _, computed = timed(lambda: list(live[name]))
+        print(
+            f"{name:20} {computed:8.0f} ms from the offers, "
+            f"{precomputed:6.0f} ms from the aggregates ({len(rows)} rows)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare crawl throughput with the blocking and the threaded pipeline when the
+database is slow.
+
+Each batch write is delayed by ``--write-delay`` seconds to simulate a loaded
+database server.
+
+Usage:
+    python -m benchmarks.async_pipeline [--offers 1000] [--write-delay 0.1]
+"""
+
+import argparse
+import time
+
+from benchmarks import _django, _scrapy
+from benchmarks.fixture_server import FixtureServerProcess
+from benchmarks.fixtures import LISTING_PATH, build_site
+
+
+def slow_pipelines(write_delay):
+    from freework.scraper.pipelines import JobOfferPipeline, ThreadedJobOfferPipeline
+
+    class SlowWriteMixin:
+        def write(self, batch):
+            time.sleep(write_delay)
+            super().write(batch)
+
+    class SlowJobOfferPipeline(SlowWriteMixin, JobOfferPipeline):
+        pass
+
+    class SlowThreadedJobOfferPipeline(SlowWriteMixin, ThreadedJobOfferPipeline):
+        pass
+
+    return {
+        "blocking": SlowJobOfferPipeline,
+        "threaded": SlowThreadedJobOfferPipeline,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--write-delay", type=float, default=0.1)
+    parser.add_argument("--delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    _django.setup()
+    runner, reactor = _scrapy.crawler_runner(FREEWORK_BATCH_SIZE=args.batch_size)
+
+    from twisted.internet import defer
+
+    from freework.offers.models import JobOffer
+    from freework.scraper.spiders.freework import FreeWorkSpider
+
+    results = []
+
+    with FixtureServerProcess(build_site(args.offers), delay=args.delay) as server:
+
+        @defer.inlineCallbacks
+        def crawl():
+            for mode, pipeline in slow_pipelines(args.write_delay).items():
+                JobOffer.objects.all().delete()
+                spidercls = type(
+                    "BenchSpider",
+                    (FreeWorkSpider,),
+                    {"custom_settings": {"ITEM_PIPELINES": {pipeline: 300}}},
+                )
+                crawler = runner.create_crawler(spidercls)
+                yield runner.crawl(crawler, start_url=server.url + LISTING_PATH)
+                stats = crawler.stats.get_stats()
+                seconds = _scrapy.elapsed(crawler)
+                results.append((mode, stats.get("response_received_count", 0), seconds))
+            reactor.stop()
+
+        reactor.callWhenRunning(crawl)
+        reactor.run()
+
+    print(f"{'pipeline':>9} {'pages':>6} {'seconds':>8} {'pages/s':>8}")
+    for mode, pages, seconds in results:
+        print(f"{mode:>9} {pages:>6} {seconds:>8.2f} {pages / seconds:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
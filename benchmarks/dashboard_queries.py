@@ -0,0 +1,111 @@
+"""
+Check that every dashboard query is served by an index on a large dataset.
+
+Generates ``--offers`` offers, then for each dashboard filter prints the query
+plan, flags full table scans and times fetching the first page of results.
+
+Usage:
+    python -m benchmarks.dashboard_queries [--offers 1000000]
+"""
+
+import argparse
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import _django
+
+CHUNK_SIZE = 10_000
+CONTRACT_TYPES = ["Freelance", "CDI", "CDD", "Portage"]
+FULL_SCAN_RE = re.compile(
+    r"^\W*SCAN offers_joboffer$|Seq Scan on offers_joboffer", re.MULTILINE
+)
+
+
+def generate(count):
+    from django.db import transaction
+
+    from freework.offers.models import Company, JobOffer, Location, Skill
+
+    rng = random.Random(0)
+    companies = Company.objects.bulk_create(
+        [Company(name=f"Société {i}") for i in range(2000)]
+    )
+    locations = Location.objects.bulk_create(
+        [Location(name=f"Ville {i}") for i in range(300)]
+    )
+    skills = Skill.objects.bulk_create([Skill(name=f"Skill {i}") for i in range(500)])
+    OfferSkill = JobOffer.skills.through
+    start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    for offset in range(0, count, CHUNK_SIZE):
+        with transaction.atomic():
+            offers = JobOffer.objects.bulk_create(
+                [
+                    JobOffer(
+                        external_id=f"offer-{i}",
+                        url=f"https://www.free-work.com/fr/tech-it/job-mission/{i}",
+                        title=f"Offre {i}",
+                        company=rng.choice(companies),
+                        contract_type=rng.choice(CONTRACT_TYPES),
+                        daily_rate=rng.randrange(250, 1000),
+                        location=rng.choice(locations),
+                        published_at=start + timedelta(minutes=i),
+                    )
+                    for i in range(offset, min(offset + CHUNK_SIZE, count))
+                ]
+            )
+            OfferSkill.objects.bulk_create(
+                [
+                    OfferSkill(joboffer_id=offer.pk, skill_id=skill.pk)
+                    for offer in offers
+                    for skill in rng.sample(skills, 3)
+                ]
+            )
+
+
+def queries():
+    from freework.offers.models import JobOffer, Location, Skill
+
+    latest = JobOffer.objects.order_by("-published_at").first().published_at
+    location = Location.objects.first().pk
+    skill = Skill.objects.first().pk
+    offers = JobOffer.objects
+    return {
+        "latest": offers.dashboard(),
+        "published since": offers.dashboard(published_since=latest - timedelta(days=7)),
+        "contract type": offers.dashboard(contract_type="Portage"),
+        "daily rate": offers.dashboard(min_rate=900, max_rate=950),
+        "location": offers.dashboard(location=location),
+        "skill": offers.dashboard(skill=skill),
+        "combined": offers.dashboard(contract_type="Freelance", location=location),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    _django.setup()
+    from django.db import connection
+
+    started = time.perf_counter()
+    generate(args.offers)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    print(f"Generated {args.offers} offers in {time.perf_counter() - started:.1f}s\n")
+
+    for name, queryset in queries().items():
+        page = queryset[: args.page_size]
+        plan = page.explain()
+        started = time.perf_counter()
+        list(page)
+        elapsed = (time.perf_counter() - started) * 1000
+        verdict = "FULL SCAN" if FULL_SCAN_RE.search(plan) else "index"
+        print(f"== {name}: {elapsed:.1f} ms ({verdict})\n{plan}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Time the dashboard page against the widgets it streams.
+
+Generates ``--offers`` offers, then renders each widget of the dashboard on
+its own, one after the other as the page used to, and requests the page
+``--requests`` times from ``config.asgi.application``, which streams the
+widgets as they are rendered, all at the same time. Fragments are not
+cached. ``--latency`` milliseconds are added to every query, the round trip
+to a database server that SQLite does not have.
+
+The page should take about as long as its slowest widget, not their sum.
+
+Usage:
+    python -m benchmarks.dashboard_widgets [--offers 100000] [--latency 5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks import _asgi, _django
+from benchmarks.dashboard_queries import generate
+
+
+def delay_queries(latency):
+    def execute(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def install(sender=None, connection=None, **kwargs):
+        # Once per connection object, reconnected by every widget.
+        if execute not in connection.execute_wrappers:
+            connection.execute_wrappers.append(execute)
+
+    return install
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # Assets from the Vite development server: no manifest to build.
+    os.environ.setdefault("DJANGO_DEBUG", "True")
+    _django.setup()
+    from django.core.management import call_command
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+
+    from config.asgi import application
+    from freework.offers.forms import OfferFilterForm
+    from freework.offers.views import OfferListView
+
+    generate(args.offers)
+    call_command("rebuild_aggregates")
+    install = delay_queries(args.latency / 1000)
+    connection_created.connect(install, weak=False)
+    connections.close_all()
+
+    timings = {}
+    pages = []
+    first_chunks = []
+    # Without the debug toolbar, which records every query.
+    with override_settings(DEBUG=False, FREEWORK_FRAGMENT_CACHE_TIMEOUT=0):
+        view = OfferListView()
+        view.setup(RequestFactory().get("/"))
+        view.cursor = None
+        for _ in range(args.requests):
+            # Fresh querysets, as for a new request.
+            view.form = OfferFilterForm(view.request.GET)
+            context = view.get_context_data()
+            for name in view.widgets:
+                started = time.perf_counter()
+                view.render_widget(name, context)
+                timings.setdefault(name, []).append(
+                    (time.perf_counter() - started) * 1000
+                )
+            status, chunks = asyncio.run(_asgi.get(application, "/"))
+            assert status == 200, status
+            first_chunks.append(chunks[0][0] * 1000)
+            pages.append(chunks[-1][0] * 1000)
+
+    widgets = {name: statistics.median(times) for name, times in timings.items()}
+    for name, median in widgets.items():
+        print(f"{name:>16}: {median:7.1f} ms")
+    print(f"{'sum':>16}: {sum(widgets.values()):7.1f} ms")
+    print(f"{'slowest':>16}: {max(widgets.values()):7.1f} ms")
+    print(
+        f"{'streamed page':>16}: {statistics.median(pages):7.1f} ms"
+        f" (first chunk {statistics.median(first_chunks):.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Time the near-duplicate detection of new offers against a growing corpus.
+
+Grows a corpus of offers up to each ``--sizes``, then indexes ``--batch``
+new offers, half of them reposts of corpus offers with a few words changed,
+and prints the cost per new offer, the number of signatures compared per
+offer and how many reposts were clustered with their original.
+
+Each description ends with ``--boilerplate`` words shared by every offer,
+like the footer of an agency: distinct offers then share LSH buckets
+without being duplicates. Every corpus offer is also reposted once, so
+clusters hold several offers. The cost stays flat as the corpus grows.
+
+Usage:
+    python -m benchmarks.duplicates [--sizes 1000 10000 100000] [--batch 500]
+        [--boilerplate 60]
+"""
+
+import argparse
+import random
+import time
+from unittest import mock
+
+from benchmarks import _django
+
+WORDS = [f"mot{i}" for i in range(5000)]
+
+
+def description(rng, boilerplate, length=30):
+    return " ".join([*rng.choices(WORDS, k=length), boilerplate])
+
+
+def repost(rng, text, changes=3):
+    words = text.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def create(offers):
+    from freework.offers.models import JobOffer
+
+    return [
+        offer.pk
+        for offer in JobOffer.objects.bulk_create(
+            [
+                JobOffer(
+                    external_id=external_id,
+                    url=f"https://www.free-work.com/{external_id}",
+                    title="Mission",
+                    description=text,
+                )
+                for external_id, text in offers
+            ],
+            batch_size=1000,
+        )
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--boilerplate", type=int, default=60)
+    args = parser.parse_args()
+
+    _django.setup()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from freework.offers import duplicates
+    from freework.offers.models import OfferSignature
+
+    rng = random.Random(0)
+    boilerplate = " ".join(rng.choices(WORDS, k=args.boilerplate))
+    corpus = []
+    print(
+        f"{'corpus':>8} {'ms/offer':>9} {'queries':>8} {'compared':>9} "
+        f"{'reposts found':>14} {'false matches':>14}"
+    )
+    for size in sorted(args.sizes):
+        # Half new offers, half their reposts.
+        texts = [
+            description(rng, boilerplate) for _ in range((size - len(corpus)) // 2)
+        ]
+        texts += [repost(rng, t) for t in texts]
+        ids = create((f"corpus-{len(corpus) + i}", t) for i, t in enumerate(texts))
+        duplicates.index(ids)
+        corpus += list(zip(ids, texts))
+
+        originals = rng.sample(corpus, args.batch // 2)
+        batch = [
+            (f"repost-{size}-{i}", repost(rng, t)) for i, (_, t) in enumerate(originals)
+        ]
+        batch += [
+            (f"new-{size}-{i}", description(rng, boilerplate))
+            for i in range(args.batch - len(batch))
+        ]
+        ids = create(batch)
+        started = time.perf_counter()
+        with (
+            CaptureQueriesContext(connection) as queries,
+            mock.patch.object(
+                duplicates, "similarity", wraps=duplicates.similarity
+            ) as similarity,
+        ):
+            duplicates.index(ids)
+        elapsed = (time.perf_counter() - started) * 1000
+        clusters = dict(
+            OfferSignature.objects.filter(offer__in=ids).values_list("offer", "cluster")
+        )
+        original_clusters = dict(
+            OfferSignature.objects.filter(
+                offer__in=[original_id for original_id, _ in originals]
+            ).values_list("offer", "cluster")
+        )
+        found = sum(
+            clusters.get(offer_id) == original_clusters.get(original_id)
+            for offer_id, (original_id, _) in zip(ids, originals)
+        )
+        false_matches = sum(
+            clusters.get(offer_id) != offer_id for offer_id in ids[len(originals) :]
+        )
+        print(
+            f"{size:>8} {elapsed / len(ids):>9.2f} {len(queries):>8} "
+            f"{similarity.call_count / len(ids):>9.1f} "
+            f"{found:>7} / {len(originals):<5} {false_matches:>14}"
+        )
+        # The batch is not part of the next corpus.
+        from freework.offers.models import JobOffer
+
+        JobOffer.objects.filter(pk__in=ids).delete()
+
+
+if __name__ == "__main__":
+    main()
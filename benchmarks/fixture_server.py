@@ -0,0 +1,155 @@
+"""Local stand-in for free-work.com serving generated pages with validators.
+
+Every page is served with an ``ETag`` and a ``Last-Modified`` header, and
+conditional requests are answered with ``304 Not Modified``.
+
+With a ``capacity``, the server handles that many requests at a time, like a
+site with a fixed number of workers: the others wait for a free worker, or are
+answered ``429 Too Many Requests`` with a ``Retry-After`` header when
+``retry_after`` is set.
+"""
+
+import hashlib
+import multiprocessing
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        page = self.server.pages.get(self.path)
+        if page is None:
+            self.send_error(404)
+            return
+        if not self.work():
+            self.server.throttled += 1
+            self.send_response(429)
+            self.send_header("Retry-After", str(self.server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body, etag, last_modified = page
+        self.server.hits += 1
+        if self.headers.get("If-None-Match") == etag or (
+            "If-None-Match" not in self.headers
+            and self.headers.get("If-Modified-Since") == last_modified
+        ):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def work(self):
+        """Spend the latency of the server on one of its workers, return False
+        if none is free and the request is rejected.
+        """
+        workers = self.server.workers
+        if workers is None:
+            time.sleep(self.server.delay)
+            return True
+        if self.server.retry_after is None:
+            workers.acquire()
+        elif not workers.acquire(blocking=False):
+            return False
+        try:
+            time.sleep(self.server.delay)
+        finally:
+            workers.release()
+        return True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Serve ``{path: html}`` pages on a random local port in a thread.
+
+    ``delay`` adds a fixed latency, in seconds, to every response, and
+    ``capacity`` and ``retry_after`` limit the requests served at a time, see
+    the module documentation.
+    """
+
+    def __init__(self, pages=None, delay=0, capacity=None, retry_after=None):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        self.httpd.pages = {}
+        self.httpd.hits = 0
+        self.httpd.throttled = 0
+        self.httpd.delay = delay
+        self.httpd.workers = (
+            None if capacity is None else threading.BoundedSemaphore(capacity)
+        )
+        self.httpd.retry_after = retry_after
+        self.publish(pages or {})
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def hits(self):
+        return self.httpd.hits
+
+    @property
+    def throttled(self):
+        """Number of requests answered 429."""
+        return self.httpd.throttled
+
+    def publish(self, pages):
+        """Replace the served pages, keeping validators of unchanged ones."""
+        now = formatdate(time.time(), usegmt=True)
+        served = {}
+        for path, html in pages.items():
+            body = html.encode()
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+            previous = self.httpd.pages.get(path)
+            if previous is not None and previous[1] == etag:
+                served[path] = previous
+            else:
+                served[path] = (body, etag, now)
+        self.httpd.pages = served
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _serve(pages, delay, urls, stop):
+    with FixtureServer(pages, delay=delay) as server:
+        urls.put(server.url)
+        stop.wait()
+
+
+class FixtureServerProcess:
+    """Same as FixtureServer, in a child process so it does not compete with
+    the crawler for the GIL. Pages cannot be changed once started."""
+
+    def __init__(self, pages, delay=0):
+        context = multiprocessing.get_context("spawn")
+        self.urls = context.Queue()
+        self.stop = context.Event()
+        self.process = context.Process(
+            target=_serve, args=(pages, delay, self.urls, self.stop), daemon=True
+        )
+
+    def __enter__(self):
+        self.process.start()
+        self.url = self.urls.get(timeout=30)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop.set()
+        self.process.join()
@@ -0,0 +1,78 @@
+"""Generate free-work.com-like listing and detail pages for benchmarks."""
+
+from datetime import datetime, timedelta, timezone
+
+LISTING_PATH = "/fr/tech-it/jobs"
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>Offres</title></head>
+<body><div class="job-list">{cards}</div>
+<nav class="pagination">{next}</nav></body></html>"""
+
+CARD_TEMPLATE = """
+<article class="job-card" data-id="{id}">
+  <a class="job-card__link" href="/fr/tech-it/job-mission/{id}">{title}</a>
+  <span class="job-card__company">{company}</span>
+  <time datetime="{published_at}">{published_at}</time>
+</article>"""
+
+DETAIL_TEMPLATE = """<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>{title}</title></head>
+<body><article class="job-detail" data-id="{id}">
+  <h1 class="job-detail__title">{title}</h1>
+  <span class="job-detail__company">{company}</span>
+  <span class="job-detail__contract">{contract_type}</span>
+  <span class="job-detail__rate">{daily_rate} €/jour</span>
+  <span class="job-detail__location">{location}</span>
+  <ul class="job-detail__skills">{skills}</ul>
+  <time datetime="{published_at}">{published_at}</time>
+  <div class="job-detail__description">{description}</div>
+</article></body></html>"""
+
+SKILLS = ["Python", "Django", "PostgreSQL", "Java", "React", "AWS", "Kubernetes"]
+LOCATIONS = ["Paris", "Lyon", "Nantes", "Lille", "Bordeaux", "Télétravail"]
+
+
+def offer(index, revision=0):
+    published_at = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=index)
+    skill = SKILLS[index % len(SKILLS)]
+    skills = [skill, SKILLS[(index * 3 + 1) % len(SKILLS)]]
+    return {
+        "id": f"offer-{index}",
+        "title": f"Développeur {skill} #{index}",
+        "company": f"Société {index % 97}",
+        "contract_type": "Freelance" if index % 3 else "CDI",
+        "daily_rate": 350 + index % 450,
+        "location": LOCATIONS[index % len(LOCATIONS)],
+        "skills": "".join(f"<li>{name}</li>" for name in sorted(set(skills))),
+        "published_at": published_at.isoformat(),
+        "description": f"<p>Mission {skill} révision {revision}.</p>"
+        + "<p>Contexte, stack technique et environnement de travail.</p>" * 10,
+    }
+
+
+def build_site(count=200, per_page=20, revisions=None):
+    """Return a ``{path: html}`` mapping for ``count`` offers, newest first.
+
+    ``revisions`` maps an offer index to a revision number, to simulate
+    offers edited between two crawls.
+    """
+    revisions = revisions or {}
+    offers = [offer(i, revisions.get(i, 0)) for i in reversed(range(count))]
+    pages = {}
+    page_count = (count + per_page - 1) // per_page
+    for page in range(1, page_count + 1):
+        chunk = offers[(page - 1) * per_page : page * per_page]
+        next_link = (
+            f'<a rel="next" href="{LISTING_PATH}?page={page + 1}">Suivant</a>'
+            if page < page_count
+            else ""
+        )
+        pages[f"{LISTING_PATH}?page={page}"] = LISTING_TEMPLATE.format(
+            cards="".join(CARD_TEMPLATE.format(**o) for o in chunk),
+            next=next_link,
+        )
+    pages[LISTING_PATH] = pages[f"{LISTING_PATH}?page=1"]
+    for o in offers:
+        pages[f"/fr/tech-it/job-mission/{o['id']}"] = DETAIL_TEMPLATE.format(**o)
+    return pages
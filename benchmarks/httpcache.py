@@ -0,0 +1,68 @@
+"""
+Compare a cold crawl with a crawl replayed from the SQLite HTTP cache.
+
+The stand-in server adds a fixed latency to every response to mimic the real
+site.
+
+Usage:
+    python -m benchmarks.httpcache [--offers 1000] [--delay 0.05]
+"""
+
+import argparse
+
+from benchmarks import _django, _scrapy
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import LISTING_PATH, build_site
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=1000)
+    parser.add_argument("--delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    tmpdir = _django.setup()
+    cachedir = tmpdir / "httpcache"
+    runner, reactor = _scrapy.crawler_runner(
+        HTTPCACHE_ENABLED=True,
+        HTTPCACHE_DIR=str(cachedir),
+    )
+
+    from twisted.internet import defer
+
+    from freework.scraper.spiders.freework import FreeWorkSpider
+
+    results = []
+
+    with FixtureServer(build_site(args.offers), delay=args.delay) as server:
+
+        @defer.inlineCallbacks
+        def crawl():
+            for mode in ("cold", "cached"):
+                crawler = runner.create_crawler(FreeWorkSpider)
+                hits = server.hits
+                yield runner.crawl(crawler, start_url=server.url + LISTING_PATH)
+                stats = crawler.stats.get_stats()
+                results.append(
+                    (
+                        mode,
+                        server.hits - hits,
+                        stats.get("httpcache/hit", 0),
+                        stats.get("downloader/response_bytes", 0),
+                        _scrapy.elapsed(crawler),
+                    )
+                )
+            reactor.stop()
+
+        reactor.callWhenRunning(crawl)
+        reactor.run()
+
+    print(f"{'mode':>8} {'requests':>9} {'hits':>6} {'bytes':>10} {'seconds':>8}")
+    for mode, requests, hits, size, seconds in results:
+        print(f"{mode:>8} {requests:>9} {hits:>6} {size:>10} {seconds:>8.2f}")
+    cache_size = sum(path.stat().st_size for path in cachedir.iterdir())
+    print(f"cache files: {cache_size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Time ``manage.py import_offers`` on a generated crawl dump.
+
+Writes a JSON lines dump of ``--offers`` offers, imports it into an empty
+database, then imports it again: the second run only compares fingerprints.
+
+Usage:
+    python -m benchmarks.import_offers [--offers 1000000] [--chunk-size 10000]
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from benchmarks import _django
+from benchmarks.dashboard_queries import CONTRACT_TYPES
+
+
+def write_dump(path, count):
+    rng = random.Random(0)
+    start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    with open(path, "w") as dump:
+        for i in range(count):
+            record = {
+                "external_id": f"offer-{i}",
+                "url": f"https://www.free-work.com/fr/tech-it/job-mission/{i}",
+                "title": f"Offre {i}",
+                "company": f"Société {rng.randrange(2000)}",
+                "contract_type": rng.choice(CONTRACT_TYPES),
+                "daily_rate": rng.randrange(250, 1000),
+                "location": f"Ville {rng.randrange(300)}",
+                "skills": [f"Skill {n}" for n in rng.sample(range(500), 3)],
+                "description": f"Mission {i} de développement.",
+                "published_at": (start + timedelta(minutes=i)).isoformat(),
+            }
+            dump.write(json.dumps(record) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    _django.setup()
+    from django.db import connection
+
+    from freework.offers import imports
+    from freework.offers.models import JobOffer
+
+    chunk_size = args.chunk_size or imports.CHUNK_SIZE
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir, "offers.jl")
+        write_dump(path, args.offers)
+        print(f"{args.offers} offers on {connection.vendor}, chunks of {chunk_size}")
+        for run in ("first import", "re-import"):
+            started = time.perf_counter()
+            stats = imports.import_offers([path], chunk_size)
+            elapsed = time.perf_counter() - started
+            print(
+                f"{run:>13}: {elapsed:6.1f} s, {stats.read / elapsed:8.0f} records/s, "
+                f"{stats.written} written, {stats.unchanged} unchanged"
+            )
+    print(f"{JobOffer.objects.count()} offers in the database")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare a full crawl with an incremental re-crawl against a local stand-in server.
+
+The second crawl sees a few new and edited offers on top of the listing, as a
+daily run would.
+
+Usage:
+    python -m benchmarks.incremental_crawl [--offers 1000]
+"""
+
+import argparse
+
+from benchmarks import _django, _scrapy
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import LISTING_PATH, build_site
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=1000)
+    parser.add_argument("--new", type=int, default=10)
+    args = parser.parse_args()
+
+    _django.setup()
+    runner, reactor = _scrapy.crawler_runner()
+
+    from twisted.internet import defer
+
+    from freework.scraper.spiders.freework import FreeWorkSpider
+
+    results = []
+
+    with FixtureServer(build_site(args.offers)) as server:
+
+        @defer.inlineCallbacks
+        def crawl():
+            for incremental in (False, True):
+                crawler = runner.create_crawler(FreeWorkSpider)
+                hits = server.hits
+                yield runner.crawl(
+                    crawler,
+                    start_url=server.url + LISTING_PATH,
+                    incremental=incremental,
+                )
+                stats = crawler.stats.get_stats()
+                results.append(
+                    (
+                        "incremental" if incremental else "full",
+                        server.hits - hits,
+                        stats.get("downloader/response_bytes", 0),
+                        stats.get("freework/not_modified", 0),
+                        stats.get("freework/offers_written", 0),
+                        stats.get("freework/aggregate_days_refreshed", 0),
+                        _scrapy.elapsed(crawler),
+                    )
+                )
+                # Simulate a day: new offers on top, the newest known one edited.
+                server.publish(
+                    build_site(
+                        args.offers + args.new,
+                        revisions={args.offers - 1: 1},
+                    )
+                )
+            reactor.stop()
+
+        reactor.callWhenRunning(crawl)
+        reactor.run()
+
+    print(
+        f"{'mode':>12} {'requests':>9} {'bytes':>10} {'304':>6} "
+        f"{'written':>8} {'days':>5} {'seconds':>8}"
+    )
+    for mode, requests, size, not_modified, written, days, seconds in results:
+        print(
+            f"{mode:>12} {requests:>9} {size:>10} {not_modified:>6} "
+            f"{written:>8} {days:>5} {seconds:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
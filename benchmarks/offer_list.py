@@ -0,0 +1,65 @@
+"""
+Time the HTMX requests of the dashboard offer list on a large table.
+
+Generates ``--offers`` offers, then scrolls through ``--pages`` pages of the
+list the way the browser does (HTMX requests following the keyset cursor)
+and prints the latency percentiles of the first and of the deepest pages,
+which should be the same.
+
+Usage:
+    python -m benchmarks.offer_list [--offers 1000000] [--pages 500]
+"""
+
+import argparse
+import html
+import re
+import statistics
+import time
+
+from benchmarks import _django
+from benchmarks.dashboard_queries import generate
+
+NEXT_PAGE_RE = re.compile(r'hx-get="([^"]*after=[^"]*)"')
+
+
+def percentiles(timings):
+    cuts = statistics.quantiles(timings, n=100)
+    return f"p50 {statistics.median(timings):6.1f} ms, p95 {cuts[94]:6.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=1_000_000)
+    parser.add_argument("--pages", type=int, default=500)
+    args = parser.parse_args()
+
+    _django.setup()
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from freework.offers.views import OfferListView
+
+    generate(args.offers)
+
+    client = Client()
+    timings = []
+    url = "/"
+    # Without the debug toolbar, which records every query.
+    with override_settings(DEBUG=False, ALLOWED_HOSTS=["testserver"]):
+        for _ in range(args.pages):
+            started = time.perf_counter()
+            response = client.get(url, headers={"HX-Request": "true"})
+            timings.append((time.perf_counter() - started) * 1000)
+            match = NEXT_PAGE_RE.search(response.content.decode())
+            if match is None:
+                break
+            url = html.unescape(match.group(1))
+
+    tenth = max(2, len(timings) // 10)
+    print(f"{len(timings)} pages of {OfferListView.page_size} offers")
+    print(f"first {tenth} pages: {percentiles(timings[:tenth])}")
+    print(f"last {tenth} pages:  {percentiles(timings[-tenth:])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measure listing and detail page parsing speed (responses/second) per parser.
+
+Pages are generated by benchmarks.fixtures unless ``--html-dir`` points to a
+directory of saved ``.html`` pages (e.g. dumped from the HTTP cache).
+
+Usage:
+    python -m benchmarks.parsers [--offers 200] [--repeat 5] [--html-dir DIR]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks import _django
+from benchmarks.fixtures import build_site
+
+PARSERS = (
+    "freework.scraper.parsers.ParselParser",
+    "freework.scraper.parsers.LxmlParser",
+)
+
+
+def load_pages(args):
+    if args.html_dir:
+        return {
+            f"/{path.name}": path.read_bytes()
+            for path in sorted(Path(args.html_dir).glob("*.html"))
+        }
+    return {path: html.encode() for path, html in build_site(args.offers).items()}
+
+
+def bench(parse, pages, repeat):
+    from scrapy.http import HtmlResponse
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for url, body in pages:
+            # A new response each time: Scrapy caches the selector on it.
+            parse(HtmlResponse(url, body=body, encoding="utf-8"))
+    return len(pages) * repeat / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--html-dir")
+    args = parser.parse_args()
+
+    _django.setup()
+    from scrapy.utils.misc import load_object
+
+    listings, offers = [], []
+    for path, body in load_pages(args).items():
+        url = "https://www.free-work.com" + path
+        if b"job-detail" in body:
+            offers.append((url, body))
+        elif b"job-card" in body:
+            listings.append((url, body))
+
+    print(f"{'parser':>14} {'listings/s':>11} {'offers/s':>9}")
+    for path in PARSERS:
+        offer_parser = load_object(path)()
+        print(
+            f"{path.rsplit('.', 1)[1]:>14} "
+            f"{bench(offer_parser.parse_listing, listings, args.repeat):>11.0f} "
+            f"{bench(offer_parser.parse_offer, offers, args.repeat):>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare JobOfferPipeline throughput (items/second) for several batch sizes.
+
+Usage:
+    python -m benchmarks.pipeline_batch_size [--items 20000]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import _django
+
+
+def make_items(count, offset=0):
+    from freework.scraper.items import JobOfferItem
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(offset, offset + count):
+        yield JobOfferItem(
+            external_id=f"offer-{i}",
+            url=f"https://www.free-work.com/fr/tech-it/job-mission/offer-{i}",
+            title=f"Développeur Python #{i}",
+            company=f"Company {i % 500}",
+            contract_type="freelance" if i % 3 else "permanent",
+            daily_rate=400 + i % 400,
+            location="Paris",
+            skills=["Python", "Django"] if i % 2 else ["Python"],
+            description="Mission longue durée. " * 20,
+            published_at=start + timedelta(minutes=i),
+        )
+
+
+def run(batch_size, items):
+    from freework.offers.models import JobOffer
+    from freework.scraper.pipelines import JobOfferPipeline
+
+    JobOffer.objects.all().delete()
+    pipeline = JobOfferPipeline(batch_size=batch_size)
+    pipeline.open_spider()
+    started = time.perf_counter()
+    for item in make_items(items):
+        pipeline.process_item(item)
+    pipeline.close_spider()
+    return items / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=20000)
+    args = parser.parse_args()
+
+    _django.setup()
+    print(f"{'batch size':>10} {'items/s':>12}")
+    for batch_size in (1, 100, 1000):
+        print(f"{batch_size:>10} {run(batch_size, args.items):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
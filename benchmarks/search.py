@@ -0,0 +1,172 @@
+"""
+Compare keyword search with ``icontains`` and with the full-text index.
+
+Generates ``--offers`` offers with French titles and descriptions, builds the
+search index, then runs each query ``--repeat`` times with ``icontains`` and
+with the dashboard sorts of the full-text matches, newest first and by
+relevance, and prints the median and 95th percentile latency of fetching the
+first page.
+
+Usage:
+    python -m benchmarks.search [--offers 500000] [--database-url URL]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from benchmarks import _django
+
+CHUNK_SIZE = 10_000
+VOCABULARY_SIZE = 20_000
+ROLES = [
+    "Développeur",
+    "Développeuse",
+    "Ingénieur",
+    "Architecte",
+    "Chef de projet",
+    "Consultant",
+    "Administrateur",
+    "Analyste",
+]
+SKILLS = [
+    "Python",
+    "Django",
+    "Java",
+    "Kubernetes",
+    "React",
+    "PostgreSQL",
+    "Terraform",
+    "Scala",
+    "Angular",
+    "AWS",
+]
+WORDS = (
+    "mission client équipe projet données applications plateforme migration "
+    "infrastructure sécurité réseau agile développement intégration tests "
+    "performance cloud architecture qualité production maintenance évolutions "
+    "services bancaires assurance industrie télétravail expérience autonomie "
+    "rigueur conception déploiement supervision automatisation"
+).split()
+QUERIES = [
+    "python",
+    "développeurs django",
+    "architecte cloud",
+    "données bancaires",
+    "kubernetes terraform",
+]
+
+
+def generate(count):
+    from django.db import transaction
+
+    from freework.offers.models import JobOffer, Location, Skill
+
+    rng = random.Random(0)
+    # Zipf-like word frequencies: a few words are in most offers, most words
+    # in a handful of them.
+    vocabulary = WORDS + [f"terme{i}" for i in range(VOCABULARY_SIZE)]
+    rng.shuffle(vocabulary)
+    weights = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    locations = Location.objects.bulk_create(
+        [Location(name=f"Ville {i}") for i in range(100)]
+    )
+    skills = Skill.objects.bulk_create([Skill(name=name) for name in SKILLS])
+    OfferSkill = JobOffer.skills.through
+    start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    for offset in range(0, count, CHUNK_SIZE):
+        with transaction.atomic():
+            offers = []
+            for i in range(offset, min(offset + CHUNK_SIZE, count)):
+                offers.append(
+                    JobOffer(
+                        external_id=f"offer-{i}",
+                        url=f"https://www.free-work.com/fr/tech-it/job-mission/{i}",
+                        title=f"{rng.choice(ROLES)} {rng.choice(SKILLS)}",
+                        location=rng.choice(locations),
+                        description=" ".join(
+                            rng.choices(vocabulary, cum_weights=weights, k=80)
+                        ),
+                        published_at=start + timedelta(minutes=i),
+                    )
+                )
+            offers = JobOffer.objects.bulk_create(offers)
+            OfferSkill.objects.bulk_create(
+                [
+                    OfferSkill(joboffer_id=offer.pk, skill_id=skill.pk)
+                    for offer in offers
+                    for skill in rng.sample(skills, 2)
+                ]
+            )
+
+
+def icontains(query, limit):
+    from django.db.models import Q
+
+    from freework.offers.models import JobOffer
+
+    queryset = JobOffer.objects.all()
+    for word in query.split():
+        queryset = queryset.filter(
+            Q(title__icontains=word) | Q(description__icontains=word)
+        )
+    return list(queryset.order_by("-published_at")[:limit])
+
+
+def dashboard(query, sort, limit):
+    from freework.offers.models import JobOffer
+
+    return list(JobOffer.objects.dashboard(q=query, sort=sort)[:limit])
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), statistics.quantiles(timings, n=20)[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite.")
+    args = parser.parse_args()
+
+    _django.setup(args.database_url)
+    from freework.offers import search
+
+    started = time.perf_counter()
+    generate(args.offers)
+    print(f"Generated {args.offers} offers in {time.perf_counter() - started:.1f}s")
+    started = time.perf_counter()
+    search.rebuild()
+    print(f"Indexed them in {time.perf_counter() - started:.1f}s\n")
+
+    print(
+        f"{'query':>22} {'icontains p50/p95':>20} {'newest p50/p95':>20} "
+        f"{'relevance p50/p95':>20}"
+    )
+    for query in QUERIES:
+        timings = [
+            measure(function, args.repeat)
+            for function in (
+                lambda: icontains(query, args.limit),
+                lambda: dashboard(query, "", args.limit),
+                lambda: dashboard(query, "relevance", args.limit),
+            )
+        ]
+        print(
+            f"{query:>22} "
+            + " ".join(f"{p50:9.1f} /{p95:7.1f} ms" for p50, p95 in timings)
+        )
+
+
+if __name__ == "__main__":
+    main()
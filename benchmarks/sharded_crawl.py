@@ -0,0 +1,67 @@
+"""
+Measure how crawl throughput scales with the number of shards.
+
+Each run calls ``manage.py crawl_freework --shards N`` against a stand-in
+server holding ``--offers`` offers and reports parsed pages per second of
+wall-clock time.
+
+Usage:
+    python -m benchmarks.sharded_crawl [--offers 5000] [--shards 1 2 4 8]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import _django
+from benchmarks.fixture_server import FixtureServerProcess
+from benchmarks.fixtures import LISTING_PATH, build_site
+
+PER_PAGE = 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=5000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    _django.setup()
+    from freework.offers.models import JobOffer
+
+    pages = -(-args.offers // PER_PAGE)
+    site = build_site(args.offers, per_page=PER_PAGE)
+    print(f"{'shards':>6} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'offers':>7}")
+    with FixtureServerProcess(site) as server:
+        for shards in args.shards:
+            JobOffer.objects.all().delete()
+            started = time.perf_counter()
+            subprocess.run(
+                [
+                    sys.executable,
+                    "manage.py",
+                    "crawl_freework",
+                    f"--start-url={server.url}{LISTING_PATH}",
+                    f"--pages=1-{pages}",
+                    f"--shards={shards}",
+                    "--set=ROBOTSTXT_OBEY=False",
+                    "--set=LOG_LEVEL=WARNING",
+                ],
+                cwd=_django.BASE_DIR,
+                env={**os.environ, "PYTHONWARNINGS": "ignore"},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            )
+            seconds = time.perf_counter() - started
+            crawled = pages + args.offers
+            print(
+                f"{shards:>6} {crawled:>6} {seconds:>8.2f} "
+                f"{crawled / seconds:>8.1f} {JobOffer.objects.count():>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Measure dashboard reads while a crawl writes to the same SQLite database.
+
+For ``--seconds`` seconds, ``--writers`` processes write batches of offers
+through the crawl pipeline while ``--readers`` processes read pages of the
+dashboard queries in a loop, like a crawl and the web workers. The run is
+repeated with Django's default SQLite options (rollback journal, deferred
+transactions, 5 second timeout) and with ``SQLITE_OPTIONS`` from the settings,
+on copies of the same database.
+
+Usage:
+    python -m benchmarks.sqlite_concurrency [--offers 50000] [--readers 1 4 16]
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import shutil
+import statistics
+import time
+
+from benchmarks import _django
+from benchmarks.dashboard_queries import generate, queries
+from benchmarks.pipeline_batch_size import make_items
+
+MODES = {
+    "default": {"init_command": "PRAGMA journal_mode=DELETE", "timeout": 5},
+    "tuned": None,  # settings.SQLITE_OPTIONS
+}
+
+
+def read(index, deadline, page_size):
+    from django.db import OperationalError
+
+    latencies = []
+    errors = 0
+    pages = itertools.cycle(queries().values())
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            list(next(pages)[:page_size])
+        except OperationalError:
+            errors += 1
+        else:
+            latencies.append(time.perf_counter() - started)
+    return {"latencies": latencies, "read errors": errors}
+
+
+def write(index, deadline, batch_size):
+    from django.db import OperationalError
+
+    from freework.scraper.pipelines import JobOfferPipeline
+
+    pipeline = JobOfferPipeline(batch_size=batch_size)
+    pipeline.open_spider()
+    # New offers, numbered apart from the generated ones and the other writers.
+    items = make_items(10**9, offset=(index + 1) * 10**8)
+    written = errors = 0
+    while time.time() < deadline:
+        for item in itertools.islice(items, batch_size):
+            pipeline.buffer_item(item)
+        batch, pipeline.buffer = pipeline.buffer, {}
+        try:
+            pipeline.write(batch)
+        except OperationalError:
+            errors += 1
+        else:
+            written += len(batch)
+    return {"written": written, "write errors": errors}
+
+
+def work(task, index, name, options, barrier, seconds, size, results):
+    """Run ``task`` in a new process against the database file ``name``."""
+    os.environ["DJANGO_DATABASE_URL"] = f"sqlite:///{name}"
+    import django
+    from django.db import connections
+
+    django.setup()
+    if options is not None:
+        connections.settings["default"]["OPTIONS"] = options
+    # Start together, once every process is set up.
+    barrier.wait()
+    results.put(task(index, time.time() + seconds, size))
+    connections.close_all()
+
+
+def measure(name, options, readers, writers, seconds, batch_size, page_size):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(readers + writers)
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=work,
+            args=(task, index, name, options, barrier, seconds, size, results),
+        )
+        for task, count, size in (
+            (write, writers, batch_size),
+            (read, readers, page_size),
+        )
+        for index in range(count)
+    ]
+    for process in processes:
+        process.start()
+    totals = {"latencies": [], "read errors": 0, "written": 0, "write errors": 0}
+    for _ in processes:
+        for key, value in results.get().items():
+            totals[key] += value
+    for process in processes:
+        process.join()
+    latencies = sorted(totals["latencies"]) or [0.0]
+    return {
+        "reads/s": len(totals["latencies"]) / seconds,
+        "p50 ms": statistics.median(latencies) * 1000,
+        "p95 ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "max ms": latencies[-1] * 1000,
+        "read errors": totals["read errors"],
+        "written/s": totals["written"] / seconds,
+        "write errors": totals["write errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--offers", type=int, default=50_000)
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = _django.setup()
+    from django.db import connection, connections
+
+    generate(args.offers)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+        # A single file to copy for each run.
+        cursor.execute("PRAGMA journal_mode=DELETE")
+    connections.close_all()
+    template = tmpdir / "template.sqlite3"
+    shutil.copy(connections.settings["default"]["NAME"], template)
+
+    columns = [
+        "reads/s",
+        "p50 ms",
+        "p95 ms",
+        "max ms",
+        "read errors",
+        "written/s",
+        "write errors",
+    ]
+    print(f"{'mode':>8} {'readers':>7} " + " ".join(f"{c:>12}" for c in columns))
+    for readers in args.readers:
+        for mode, options in MODES.items():
+            name = tmpdir / f"{mode}-{readers}.sqlite3"
+            shutil.copy(template, name)
+            result = measure(
+                name,
+                options,
+                readers,
+                args.writers,
+                args.seconds,
+                args.batch_size,
+                args.page_size,
+            )
+            print(
+                f"{mode:>8} {readers:>7} "
+                + " ".join(
+                    (
+                        f"{result[c]:>12.1f}"
+                        if isinstance(result[c], float)
+                        else f"{result[c]:>12}"
+                    )
+                    for c in columns
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -46,6 +46,16 @@ EMAIL_BACKEND = env.email(
     default="consolemail://",
 )
 
+# METRICS
+# In development, /metrics answers the local machine.
+FREEWORK_METRICS_ALLOWED_IPS = env.list(
+    "FREEWORK_METRICS_ALLOWED_IPS", default=["127.0.0.1", "::1"]
+)
+
+# N+1 QUERIES
+# In development, requests repeating a query fail instead of being logged.
+FREEWORK_NPLUSONE_MODE = env("FREEWORK_NPLUSONE_MODE", default="raise")
+
 # DJANGO-DEBUG-TOOLBAR
 # The Django Debug Toolbar is a debugging tool that integrates with Django to
 # display detailed information about requests, databases, templates, views,
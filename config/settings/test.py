@@ -0,0 +1,58 @@
+"""
+Project: freework
+
+Test configuration, used by the test suite:
+
+    DJANGO_SETTINGS_MODULE=config.settings.test python manage.py test
+
+For more information, the complete list of configuration variables is available in the official documentation here:
+https://docs.djangoproject.com/en/5.1/ref/settings/
+"""
+
+import tempfile
+from pathlib import Path
+
+from .base import *  # noqa: F403
+from .base import DATABASES
+from .base import LOGGING
+from .base import env
+
+SECRET_KEY = env(
+    "DJANGO_SECRET_KEY",
+    default="test-only-wMl6Dq0jZr2qQqE3eU1h8vHk7sYbN4cX",
+)
+
+ALLOWED_HOSTS = ["testserver", "localhost"]
+
+# Fast password hashing: the tests do not need strong hashes.
+# https://docs.djangoproject.com/en/5.1/ref/settings/#password-hashers
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# The test database is a file rather than in memory: crawls read and write it
+# from their reactor and writer threads, with their own connections.
+# https://docs.djangoproject.com/en/5.1/ref/settings/#test
+DATABASES["default"]["TEST"] = {
+    "NAME": str(Path(tempfile.mkdtemp(prefix="freework-test-db-")) / "test.sqlite3")
+}
+
+# Only the warnings, not the progress of the crawls run by the tests.
+LOGGING["root"]["level"] = "WARNING"
+
+# Local memory cache, emptied for every test process.
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Pages link their assets to the Vite development server: the tests run
+# without a frontend build.
+DJANGO_VITE = {"default": {"dev_mode": True}}
+
+# Metric values and profiles of the test processes, out of the way of the
+# running application. DJANGO_MEDIA_ROOT gives the crawl processes spawned by a
+# test the directory of the test.
+FREEWORK_METRICS_DIR = Path(tempfile.mkdtemp(prefix="freework-test-metrics-"))
+MEDIA_ROOT = Path(
+    env("DJANGO_MEDIA_ROOT", default=tempfile.mkdtemp(prefix="freework-test-media-"))
+)
+
+# N+1 QUERIES
+# Tests fail on requests repeating a query.
+FREEWORK_NPLUSONE_MODE = "raise"
@@ -2,16 +2,34 @@
 URL configuration for FreeWork project.
 """
 
+from django.apps import apps
 from django.contrib import admin
 from django.urls import path, include
-from django.views import generic as django_views
+
+from freework.metrics import views as metrics_views
+from freework.offers import views as offers_views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path(
         "",
-        django_views.TemplateView.as_view(template_name="home.html"),
+        offers_views.OfferListView.as_view(),
         name="home",
     ),
-    path("__debug__/", include("debug_toolbar.urls")),
+    path(
+        "offers/export.<str:format>",
+        offers_views.export_offers,
+        name="export",
+    ),
+    path(
+        "offers/duplicates/",
+        offers_views.DuplicateClusterListView.as_view(),
+        name="duplicates",
+    ),
+    path("metrics", metrics_views.metrics, name="metrics"),
+    path("crawls/", include("freework.crawls.urls")),
 ]
+
+# Only installed in development.
+if apps.is_installed("debug_toolbar"):
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
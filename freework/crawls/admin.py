@@ -0,0 +1,28 @@
+from django.contrib import admin
+
+from .models import CrawlRun, CrawlSnapshot, HostThrottle
+
+
+class CrawlSnapshotInline(admin.TabularInline):
+    model = CrawlSnapshot
+    extra = 0
+    can_delete = False
+
+
+@admin.register(CrawlRun)
+class CrawlRunAdmin(admin.ModelAdmin):
+    list_display = ("spider", "status", "started_at", "finished_at", "pages", "items")
+    list_filter = ("status", "spider")
+    inlines = [CrawlSnapshotInline]
+
+
+@admin.register(HostThrottle)
+class HostThrottleAdmin(admin.ModelAdmin):
+    list_display = (
+        "host",
+        "concurrency",
+        "ceiling",
+        "delay",
+        "latency",
+        "updated_at",
+    )
@@ -0,0 +1,147 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:46
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="CrawlRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("spider", models.CharField(max_length=100, verbose_name="spider")),
+                (
+                    "arguments",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="arguments"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "running"),
+                            ("finished", "finished"),
+                            ("failed", "failed"),
+                        ],
+                        default="running",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "finish_reason",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="finish reason"
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="started at"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="finished at"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                ("pages", models.PositiveIntegerField(default=0, verbose_name="pages")),
+                ("items", models.PositiveIntegerField(default=0, verbose_name="items")),
+                (
+                    "errors",
+                    models.PositiveIntegerField(default=0, verbose_name="errors"),
+                ),
+                (
+                    "stats",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="stats",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "crawl run",
+                "verbose_name_plural": "crawl runs",
+                "ordering": ["-started_at", "-id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CrawlSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("taken_at", models.DateTimeField(verbose_name="taken at")),
+                ("pages", models.PositiveIntegerField(verbose_name="pages")),
+                ("items", models.PositiveIntegerField(verbose_name="items")),
+                ("errors", models.PositiveIntegerField(verbose_name="errors")),
+                (
+                    "pages_per_second",
+                    models.FloatField(verbose_name="pages per second"),
+                ),
+                (
+                    "items_per_second",
+                    models.FloatField(verbose_name="items per second"),
+                ),
+                (
+                    "write_latency_ms",
+                    models.FloatField(null=True, verbose_name="write latency (ms)"),
+                ),
+                (
+                    "cache_hit_ratio",
+                    models.FloatField(null=True, verbose_name="cache hit ratio"),
+                ),
+                (
+                    "memory_bytes",
+                    models.PositiveBigIntegerField(
+                        null=True, verbose_name="peak memory (bytes)"
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="crawls.crawlrun",
+                        verbose_name="run",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "crawl snapshot",
+                "verbose_name_plural": "crawl snapshots",
+                "ordering": ["run", "taken_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["run", "taken_at"], name="crawls_snapshot_run_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("crawls", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HostThrottle",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "host",
+                    models.CharField(max_length=255, unique=True, verbose_name="host"),
+                ),
+                ("concurrency", models.FloatField(verbose_name="concurrency")),
+                ("delay", models.FloatField(verbose_name="delay (s)")),
+                ("latency", models.FloatField(null=True, verbose_name="latency (s)")),
+                ("ceiling", models.FloatField(null=True, verbose_name="ceiling")),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+            ],
+            options={
+                "verbose_name": "host throttle",
+                "verbose_name_plural": "host throttles",
+                "ordering": ["host"],
+            },
+        ),
+    ]
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+def stale_before():
+    """Time of the last update before which a running crawl is presumed dead."""
+    return timezone.now() - timedelta(seconds=settings.FREEWORK_CRAWL_STALE_AFTER)
+
+
+class CrawlRunQuerySet(models.QuerySet):
+    def running(self):
+        """Runs of crawls still running, updated recently."""
+        return self.filter(
+            status=self.model.Status.RUNNING, updated_at__gte=stale_before()
+        )
+
+    def stale(self):
+        """Runs marked running whose process stopped without closing them."""
+        return self.filter(
+            status=self.model.Status.RUNNING, updated_at__lt=stale_before()
+        )
+
+    def fail_stale(self):
+        """Mark the stale runs as failed, and return how many there were."""
+        return self.stale().update(
+            status=self.model.Status.FAILED,
+            finish_reason="stale",
+            finished_at=models.F("updated_at"),
+        )
+
+
+class CrawlRun(models.Model):
+    """A crawl, with the counters of its latest snapshot."""
+
+    class Status(models.TextChoices):
+        RUNNING = "running", _("running")
+        FINISHED = "finished", _("finished")
+        FAILED = "failed", _("failed")
+
+    spider = models.CharField(_("spider"), max_length=100)
+    arguments = models.JSONField(_("arguments"), default=dict, blank=True)
+    status = models.CharField(
+        _("status"), max_length=20, choices=Status.choices, default=Status.RUNNING
+    )
+    finish_reason = models.CharField(_("finish reason"), max_length=100, blank=True)
+    started_at = models.DateTimeField(_("started at"), auto_now_add=True)
+    finished_at = models.DateTimeField(_("finished at"), null=True, blank=True)
+    # Time of the latest flush: a running crawl whose process died stops
+    # being updated.
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+    pages = models.PositiveIntegerField(_("pages"), default=0)
+    items = models.PositiveIntegerField(_("items"), default=0)
+    errors = models.PositiveIntegerField(_("errors"), default=0)
+    # Scrapy stats at the end of the crawl.
+    stats = models.JSONField(
+        _("stats"), default=dict, blank=True, encoder=DjangoJSONEncoder
+    )
+
+    objects = CrawlRunQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("crawl run")
+        verbose_name_plural = _("crawl runs")
+        ordering = ["-started_at", "-id"]
+
+    def __str__(self):
+        return f"{self.spider} {self.started_at:%Y-%m-%d %H:%M}"
+
+    @property
+    def is_stale(self):
+        return self.status == self.Status.RUNNING and self.updated_at < stale_before()
+
+    @property
+    def duration(self):
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    @property
+    def items_per_second(self):
+        """Average throughput of a finished run."""
+        duration = self.duration
+        if not duration:
+            return None
+        return self.items / duration.total_seconds()
+
+
+class CrawlSnapshot(models.Model):
+    """Rates and gauges of a running crawl over one telemetry interval."""
+
+    run = models.ForeignKey(
+        CrawlRun,
+        verbose_name=_("run"),
+        on_delete=models.CASCADE,
+        related_name="snapshots",
+    )
+    taken_at = models.DateTimeField(_("taken at"))
+    pages = models.PositiveIntegerField(_("pages"))
+    items = models.PositiveIntegerField(_("items"))
+    errors = models.PositiveIntegerField(_("errors"))
+    pages_per_second = models.FloatField(_("pages per second"))
+    items_per_second = models.FloatField(_("items per second"))
+    # Average duration of the database writes of the interval, if any.
+    write_latency_ms = models.FloatField(_("write latency (ms)"), null=True)
+    # Share of the requests answered by the HTTP cache, if enabled.
+    cache_hit_ratio = models.FloatField(_("cache hit ratio"), null=True)
+    memory_bytes = models.PositiveBigIntegerField(_("peak memory (bytes)"), null=True)
+
+    class Meta:
+        verbose_name = _("crawl snapshot")
+        verbose_name_plural = _("crawl snapshots")
+        ordering = ["run", "taken_at"]
+        indexes = [
+            models.Index(fields=["run", "taken_at"], name="crawls_snapshot_run_idx")
+        ]
+
+
+class HostThrottle(models.Model):
+    """Crawl speed learned for a host by the adaptive throttle, the starting
+    point of the next crawl.
+    """
+
+    host = models.CharField(_("host"), max_length=255, unique=True)
+    concurrency = models.FloatField(_("concurrency"))
+    delay = models.FloatField(_("delay (s)"))
+    # Moving average of the download latency at the end of the last crawl.
+    latency = models.FloatField(_("latency (s)"), null=True)
+    # Concurrency at which the host last answered 429 or 503.
+    ceiling = models.FloatField(_("ceiling"), null=True)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("host throttle")
+        verbose_name_plural = _("host throttles")
+        ordering = ["host"]
+
+    def __str__(self):
+        return self.host
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from freework.crawls.models import CrawlRun
+
+
+class CrawlRunListTests(TestCase):
+    def test_running_crawl_is_polled(self):
+        CrawlRun.objects.create(spider="freework")
+
+        response = self.client.get(reverse("crawls:list"))
+
+        self.assertContains(response, 'hx-trigger="every 5s"')
+
+    def test_stale_crawl_is_not_polled(self):
+        run = CrawlRun.objects.create(spider="freework")
+        CrawlRun.objects.filter(pk=run.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        response = self.client.get(
+            reverse("crawls:list"), headers={"HX-Request": "true"}
+        )
+
+        self.assertContains(response, "(no longer updated)")
+        self.assertNotContains(response, 'hx-trigger="every 5s"')
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = "crawls"
+
+urlpatterns = [
+    path("", views.CrawlRunListView.as_view(), name="list"),
+]
@@ -0,0 +1,44 @@
+from django.db.models import Avg, Max
+from django.views import generic
+
+from .models import CrawlRun
+
+
+class CrawlRunListView(generic.ListView):
+    """Live progress of the running crawl and throughput of the previous ones.
+
+    While a crawl runs, the page polls the ``live-run`` partial over HTMX;
+    the partial stops the polling once the run is over, or stale (see
+    ``CrawlRunQuerySet.stale()``).
+    """
+
+    template_name = "crawls/crawlrun_list.html"
+    partial_name = "crawls/crawlrun_list.html#live-run"
+    context_object_name = "runs"
+    history_size = 50
+    snapshot_count = 20
+
+    def get_queryset(self):
+        return CrawlRun.objects.annotate(
+            write_latency_ms=Avg("snapshots__write_latency_ms"),
+            memory_bytes=Max("snapshots__memory_bytes"),
+        )[: self.history_size]
+
+    def get_context_data(self, **kwargs):
+        live_run = CrawlRun.objects.running().first()
+        if live_run is None and self.request.headers.get("HX-Request"):
+            # The run polled so far just ended: show its final state.
+            live_run = CrawlRun.objects.first()
+        snapshots = []
+        if live_run is not None:
+            snapshots = list(
+                live_run.snapshots.order_by("-taken_at")[: self.snapshot_count]
+            )
+        return super().get_context_data(
+            live_run=live_run, snapshots=snapshots, **kwargs
+        )
+
+    def get_template_names(self):
+        if self.request.headers.get("HX-Request"):
+            return [self.partial_name]
+        return super().get_template_names()
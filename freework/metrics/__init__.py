@@ -0,0 +1,56 @@
+"""
+Prometheus metrics of the web processes and of the crawls.
+
+Values are kept per process in memory-mapped files of
+``FREEWORK_METRICS_DIR`` (see ``store``) and summed by the ``/metrics`` view,
+so that every gunicorn worker and every crawl process is accounted for. The
+directory should be emptied when the application is deployed, like the
+multi-process directory of the Prometheus client.
+"""
+
+from .registry import Counter, Histogram
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+REQUEST_DURATION = Histogram(
+    "freework_http_request_duration_seconds",
+    "Time spent processing a request, by view.",
+    ["view"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    "freework_http_requests_total",
+    "Requests processed, by view and status code class.",
+    ["view", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "freework_db_queries_per_request",
+    "Number of database queries run by a request, by view.",
+    ["view"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_DURATION = Histogram(
+    "freework_db_query_duration_seconds_per_request",
+    "Time a request spent in database queries, by view.",
+    ["view"],
+    buckets=LATENCY_BUCKETS,
+)
+TEMPLATE_RENDER_DURATION = Histogram(
+    "freework_template_render_duration_seconds",
+    "Time spent rendering the template of a response, by view.",
+    ["view"],
+    buckets=LATENCY_BUCKETS,
+)
+CRAWL_OFFERS = Counter(
+    "freework_crawl_offers_total",
+    "Offers seen by the crawl pipeline, by outcome.",
+    ["outcome"],
+)
+CRAWL_BATCHES = Counter(
+    "freework_crawl_batches_written_total", "Batches of offers written by the pipeline."
+)
+CRAWL_WRITE_DURATION = Counter(
+    "freework_crawl_write_duration_seconds_total",
+    "Time the pipeline spent writing batches.",
+)
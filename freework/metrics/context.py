@@ -0,0 +1,63 @@
+"""
+Instrumentation of the work done for a request outside of its view.
+
+The middleware of ``freework.metrics`` measure a request on the thread that
+runs it, until its view returns. Some views do part of the work elsewhere,
+like the dashboard rendering its widgets on other threads, after it returned
+a streamed response. For those:
+
+* each middleware registers, with ``add_thread_hook()``, a context manager
+  instrumenting the current thread for the request; ``request_thread()``
+  enters them all on the thread doing the work;
+* ``after_response()`` runs the end of a measure once the content of the
+  response is sent, rather than when the view returns.
+"""
+
+from contextlib import ExitStack, contextmanager
+
+
+def add_thread_hook(request, hook):
+    """Enter ``hook()`` on every thread working for ``request``, see
+    ``request_thread()``.
+    """
+    if not hasattr(request, "metrics_thread_hooks"):
+        request.metrics_thread_hooks = []
+    request.metrics_thread_hooks.append(hook)
+
+
+@contextmanager
+def request_thread(request):
+    """Instrument the current thread like the thread of ``request``, for the
+    work it does for the request.
+    """
+    with ExitStack() as stack:
+        for hook in getattr(request, "metrics_thread_hooks", ()):
+            stack.enter_context(hook())
+        yield
+
+
+def after_response(response, callback):
+    """Call ``callback()`` once ``response`` is sent: now, or when its
+    streamed content is exhausted or closed.
+    """
+    if not response.streaming:
+        callback()
+        return
+    if response.is_async:
+
+        async def content(chunks):
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                callback()
+
+    else:
+
+        def content(chunks):
+            try:
+                yield from chunks
+            finally:
+                callback()
+
+    response.streaming_content = content(response.streaming_content)
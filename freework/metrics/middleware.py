@@ -0,0 +1,241 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import (
+    REQUEST_DURATION,
+    REQUEST_QUERIES,
+    REQUEST_QUERY_DURATION,
+    REQUESTS,
+    TEMPLATE_RENDER_DURATION,
+)
+from .context import add_thread_hook, after_response
+from .queries import NPlusOneError, QueryShapes, install_shape_recorders
+
+logger = logging.getLogger(__name__)
+
+STATUS_CLASSES = ("0xx", "1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+class QueryStats:
+    """Queries run for a request by one thread.
+
+    Only the thread of the request counts in its stats: they need no lock.
+    Under ASGI, that is the synchronous code of the request, which Django
+    runs one call at a time. The threads working for it (the widgets of a
+    streamed dashboard) count in stats of their own, summed when the request
+    is recorded.
+    """
+
+    __slots__ = ("count", "duration", "threads")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.threads = []
+
+    @contextmanager
+    def thread(self):
+        """Count the queries of the current thread, working for the request."""
+        stats = QueryStats()
+        # list.append() is atomic: threads may start at the same time.
+        self.threads.append(stats)
+        with count_queries(stats):
+            yield
+
+    def totals(self):
+        """Return the count and duration of the queries of every thread."""
+        count, duration = self.count, self.duration
+        for stats in self.threads:
+            count += stats.count
+            duration += stats.duration
+        return count, duration
+
+
+# The QueryStats of the current context, if it works for a request: a
+# context variable, so that the synchronous code an asynchronous request runs
+# on the threads of sync_to_async() counts too.
+CURRENT = ContextVar("freework_query_stats", default=None)
+
+
+@contextmanager
+def count_queries(stats):
+    """Count the queries of the current context in ``stats``."""
+    token = CURRENT.set(stats)
+    try:
+        yield stats
+    finally:
+        CURRENT.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = CURRENT.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    # Installed once per connection rather than with execute_wrapper() on
+    # every request.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def view_name(request):
+    match = request.resolver_match
+    return match.view_name if match is not None else "<unresolved>"
+
+
+def record_render(response):
+    TEMPLATE_RENDER_DURATION.labels(response.metrics_view).observe(
+        time.perf_counter() - response.metrics_render_started
+    )
+
+
+class MetricsMiddleware:
+    """Record the latency, database queries and template rendering time of
+    every request, by view, see ``freework.metrics``.
+
+    Streamed responses are measured until their content is sent, with the
+    queries run for them on other threads, see ``freework.metrics.context``.
+
+    With ``FREEWORK_METRICS_QUERIES = False``, queries are neither wrapped
+    nor counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.queries = settings.FREEWORK_METRICS_QUERIES
+        if self.queries:
+            connection_created.connect(install_query_recorder)
+            for connection in connections.all(initialized_only=True):
+                install_query_recorder(connection=connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        stats = self.start(request)
+        if stats is not None:
+            with count_queries(stats):
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        stats = self.start(request)
+        if stats is not None:
+            with count_queries(stats):
+                response = await self.get_response(request)
+        else:
+            response = await self.get_response(request)
+        return self.finish(request, response, stats, started)
+
+    def start(self, request):
+        if not self.queries:
+            return None
+        stats = QueryStats()
+        add_thread_hook(request, stats.thread)
+        return stats
+
+    def finish(self, request, response, stats, started):
+        after_response(
+            response, partial(self.record, request, response, stats, started)
+        )
+        return response
+
+    def record(self, request, response, stats, started):
+        duration = time.perf_counter() - started
+        view = view_name(request)
+        REQUEST_DURATION.labels(view).observe(duration)
+        REQUESTS.labels(view, STATUS_CLASSES[response.status_code // 100]).inc()
+        if stats is not None:
+            count, query_duration = stats.totals()
+            REQUEST_QUERIES.labels(view).observe(count)
+            REQUEST_QUERY_DURATION.labels(view).observe(query_duration)
+
+    def process_template_response(self, request, response):
+        response.metrics_view = view_name(request)
+        response.metrics_render_started = time.perf_counter()
+        response.add_post_render_callback(record_render)
+        return response
+
+
+class NPlusOneMiddleware:
+    """Report the queries repeated by a request, see ``freework.metrics.queries``.
+
+    ``FREEWORK_NPLUSONE_MODE`` is ``"raise"`` (development and tests: the
+    request fails with ``NPlusOneError``), ``"log"`` (production: a warning
+    for a sample of ``FREEWORK_NPLUSONE_SAMPLE_RATE`` of the requests) or
+    ``"off"``. The queries run for a streamed response on other threads
+    count, and it fails or is logged once its content is sent, see
+    ``freework.metrics.context``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.mode = settings.FREEWORK_NPLUSONE_MODE
+        if self.mode not in ("raise", "log"):
+            raise MiddlewareNotUsed
+        self.sample_rate = (
+            1.0 if self.mode == "raise" else settings.FREEWORK_NPLUSONE_SAMPLE_RATE
+        )
+        install_shape_recorders()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        shapes = QueryShapes()
+        add_thread_hook(request, shapes.track)
+        with shapes:
+            response = self.get_response(request)
+        after_response(response, partial(self.check, request, shapes))
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        shapes = QueryShapes()
+        add_thread_hook(request, shapes.track)
+        with shapes:
+            response = await self.get_response(request)
+        after_response(response, partial(self.check, request, shapes))
+        return response
+
+    def check(self, request, shapes):
+        if shapes.repeated:
+            message = (
+                f"N+1 queries in {request.method} {request.path}:\n{shapes.report()}"
+            )
+            if self.mode == "raise":
+                raise NPlusOneError(message)
+            logger.warning(message)
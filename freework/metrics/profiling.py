@@ -0,0 +1,244 @@
+"""
+Statistical profiling of live requests and crawls.
+
+A ``SamplingProfiler`` thread reads the stacks of the profiled threads every
+``FREEWORK_PROFILE_INTERVAL`` seconds with ``sys._current_frames()``: the
+profiled code runs untouched, so the overhead does not depend on how many
+functions it calls, unlike cProfile. Profiles are written to
+``MEDIA_ROOT/profiles`` in two formats:
+
+- ``.speedscope.json``, to open in https://www.speedscope.app;
+- ``.collapsed``, one ``frame;frame;frame count`` line per stack, for
+  ``flamegraph.pl`` and similar tools.
+
+Requests are profiled by ``ProfilingMiddleware``: one request in
+``FREEWORK_PROFILE_EVERY``, and every request sent with a ``X-Freework-Profile``
+header signed by ``sign()``::
+
+    python manage.py shell -c "from freework.metrics.profiling import sign; print(sign())"
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+
+from asgiref.sync import (
+    async_to_sync,
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .context import add_thread_hook, after_response
+
+HEADER = "X-Freework-Profile"
+SALT = "freework.metrics.profiling"
+TOKEN_MAX_AGE = 24 * 60 * 60
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def sign():
+    """Return a value of the profiling header, valid for ``TOKEN_MAX_AGE``."""
+    return signing.TimestampSigner(salt=SALT).sign("profile")
+
+
+def is_signed(value):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(value, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def frame_name(code):
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Sample the stacks of some threads, or of all the others, until stopped.
+
+    Stacks are counted as tuples of code objects, root first, and only named
+    when the profile is written. Threads are added to the profiled ones for
+    a while with ``track()``.
+    """
+
+    def __init__(self, thread_ids=None, interval=None):
+        self.thread_ids = thread_ids
+        if interval is None:
+            interval = settings.FREEWORK_PROFILE_INTERVAL
+        self.interval = interval
+        self.counts = {}
+        self.thread_names = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="freework-profiler", daemon=True
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    @contextmanager
+    def track(self):
+        """Also profile the current thread, if only some threads are."""
+        if self.thread_ids is None:
+            yield self
+            return
+        thread_id = threading.get_ident()
+        self.thread_ids.append(thread_id)
+        try:
+            yield self
+        finally:
+            self.thread_ids.remove(thread_id)
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            frames = sys._current_frames()
+            # A copy: threads come and go with track().
+            thread_ids = list(self.thread_ids or frames.keys())
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                key = (thread_id, tuple(reversed(stack)))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stacks(self):
+        """Yield ``(frame names, samples)``, the thread name first when all
+        threads are profiled.
+        """
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for (thread_id, stack), count in self.counts.items():
+            frames = [frame_name(code) for code in stack]
+            if self.thread_ids is None:
+                frames.insert(0, names.get(thread_id, f"thread-{thread_id}"))
+            yield frames, count
+
+    def collapsed(self):
+        return "".join(
+            f"{';'.join(frames)} {count}\n" for frames, count in self.stacks()
+        )
+
+    def speedscope(self, name):
+        frames = {}
+        samples = []
+        weights = []
+        for stack, count in self.stacks():
+            samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+            weights.append(count * self.interval)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "freework",
+            "shared": {"frames": [{"name": frame} for frame in frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+    def save(self, label):
+        """Write the profile to ``MEDIA_ROOT/profiles``, return the path of
+        the speedscope file.
+        """
+        directory = Path(settings.MEDIA_ROOT) / "profiles"
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = "{}-{}-{}".format(
+            timezone.now().strftime("%Y%m%dT%H%M%S"), slugify(label), os.getpid()
+        )
+        path = directory / f"{stem}.speedscope.json"
+        path.write_text(json.dumps(self.speedscope(label)))
+        (directory / f"{stem}.collapsed").write_text(self.collapsed())
+        return path
+
+
+class ProfilingMiddleware:
+    """Profile a sample of the requests, see the module documentation.
+
+    A streamed response is profiled until its content is sent, with the
+    threads working for it, see ``freework.metrics.context``.
+
+    Under ASGI, a profiled request is run from the thread of its synchronous
+    code, sampled like the thread of a WSGI request, rather than from the
+    event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.every = settings.FREEWORK_PROFILE_EVERY
+
+    def should_profile(self, request):
+        if self.every and random.randrange(self.every) == 0:
+            return True
+        token = request.headers.get(HEADER)
+        return token is not None and is_signed(token)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+        return self.profile(request, self.get_response)
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+        return await sync_to_async(self.profile)(
+            request, async_to_sync(self.get_response)
+        )
+
+    def profile(self, request, get_response):
+        profiler = SamplingProfiler([threading.get_ident()])
+        add_thread_hook(request, profiler.track)
+        profiler.start()
+        try:
+            response = get_response(request)
+        except BaseException:
+            profiler.stop()
+            raise
+        after_response(response, partial(self.save, request, profiler))
+        return response
+
+    def save(self, request, profiler):
+        profiler.stop()
+        match = request.resolver_match
+        profiler.save(match.view_name if match is not None else request.path)
@@ -0,0 +1,159 @@
+"""
+Detection of N+1 queries.
+
+Queries are grouped by shape: the SQL with its literals and the length of its
+``IN (...)`` lists removed, so that ``SELECT ... WHERE id = 1`` and ``SELECT
+... WHERE id = 2`` count as the same query. A shape run ``threshold`` times or
+more in one block of code is reported, with the project frames that ran it.
+
+In tests, wrap the code under test::
+
+    with assert_no_n_plus_one():
+        client.get("/")
+"""
+
+import re
+import threading
+import traceback
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+WHITESPACE = re.compile(r"\s+")
+METRICS_DIR = str(Path(__file__).resolve().parent)
+
+
+class NPlusOneError(AssertionError):
+    """Raised when a block of code repeats the same query too many times."""
+
+
+def normalize(sql):
+    """Return the shape of a SQL query."""
+    sql = STRING_LITERAL.sub("?", sql)
+    sql = NUMBER_LITERAL.sub("?", sql)
+    sql = PLACEHOLDER_LIST.sub("(...)", sql.replace("%s", "?"))
+    return WHITESPACE.sub(" ", sql).strip()
+
+
+def project_frames():
+    """Frames of the current stack from the project, not from libraries nor
+    from this package.
+    """
+    base_dir = str(Path(settings.BASE_DIR).resolve())
+    return [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and not frame.filename.startswith(METRICS_DIR)
+        and "site-packages" not in frame.filename
+    ]
+
+
+# The QueryShapes counting the queries of the current context: a context
+# variable, so that the synchronous code an asynchronous request runs on the
+# threads of sync_to_async() counts too.
+ACTIVE = ContextVar("freework_query_shapes", default=())
+
+
+def record_shapes(execute, sql, params, many, context):
+    for shapes in ACTIVE.get():
+        shapes.record(sql)
+    return execute(sql, params, many, context)
+
+
+def install_shape_recorder(sender=None, connection=None, **kwargs):
+    if record_shapes not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_shapes)
+
+
+def install_shape_recorders():
+    """Record the query shapes on every connection, opened or to be opened."""
+    connection_created.connect(install_shape_recorder)
+    for connection in connections.all(initialized_only=True):
+        install_shape_recorder(connection=connection)
+
+
+class QueryShapes:
+    """Context manager counting the queries run on every database by shape,
+    in the current context and by the threads entering ``track()``.
+    """
+
+    def __init__(self, threshold=None):
+        if threshold is None:
+            threshold = settings.FREEWORK_NPLUSONE_THRESHOLD
+        self.threshold = threshold
+        self.counts = {}
+        # Where each repeated shape was run for the threshold-th time.
+        self.stacks = {}
+        self.lock = threading.Lock()
+        self.exit_stack = None
+
+    def __enter__(self):
+        self.exit_stack = ExitStack()
+        self.exit_stack.enter_context(self.track())
+        return self
+
+    def __exit__(self, *exc_info):
+        self.exit_stack.close()
+
+    @contextmanager
+    def track(self):
+        """Count the queries run by the current thread or context."""
+        active = ACTIVE.get()
+        if self in active:
+            # Inherited from the context the thread was started from.
+            yield self
+            return
+        install_shape_recorders()
+        token = ACTIVE.set((*active, self))
+        try:
+            yield self
+        finally:
+            ACTIVE.reset(token)
+
+    def record(self, sql):
+        shape = normalize(sql)
+        with self.lock:
+            count = self.counts[shape] = self.counts.get(shape, 0) + 1
+        if count == self.threshold:
+            self.stacks[shape] = project_frames()
+
+    @property
+    def repeated(self):
+        """``[(shape, count)]`` of the shapes run ``threshold`` times or more."""
+        return sorted(
+            (
+                (shape, count)
+                for shape, count in self.counts.items()
+                if count >= self.threshold
+            ),
+            key=lambda item: -item[1],
+        )
+
+    def report(self):
+        lines = []
+        for shape, count in self.repeated:
+            lines.append(f"{count} x {shape}")
+            lines.extend(
+                f"    {frame.filename}:{frame.lineno} in {frame.name}"
+                for frame in self.stacks[shape][-5:]
+            )
+        return "\n".join(lines)
+
+
+class assert_no_n_plus_one(QueryShapes):
+    """Like ``QueryShapes``, but raise ``NPlusOneError`` on exit if a query
+    was repeated.
+    """
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        super().__exit__(exc_type, exc_value, exc_tb)
+        if exc_type is None and self.repeated:
+            raise NPlusOneError(f"Repeated queries:\n{self.report()}")
@@ -0,0 +1,161 @@
+"""
+Counters and histograms in the Prometheus text format.
+
+Metrics are declared once at import time. ``labels()`` returns a child whose
+store keys are computed on first use and cached, so that recording a value
+only looks up a dictionary and updates a few doubles in the store.
+"""
+
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .store import ProcessStore, collect
+
+
+def metrics_directory():
+    return settings.FREEWORK_METRICS_DIR
+
+
+STORE = ProcessStore(metrics_directory)
+FAMILIES = {}
+
+
+def escape(value):
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def format_labels(names, values):
+    return ",".join(
+        f'{name}="{escape(str(value))}"' for name, value in zip(names, values)
+    )
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        FAMILIES[name] = self
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self.child(
+                format_labels(self.labelnames, values)
+            )
+        return child
+
+    def samples(self, values):
+        """Yield the sample lines of the family from ``{key: value}``."""
+        raise NotImplementedError
+
+
+def sample(name, labels, value):
+    return f"{name}{{{labels}}} {value!r}" if labels else f"{name} {value!r}"
+
+
+def key(family, suffix, labels):
+    # Tab-separated, labels last: family names and suffixes have no tabs.
+    return f"{family}\t{suffix}\t{labels}"
+
+
+class CounterChild:
+    def __init__(self, name, labels):
+        self.key = key(name, "", labels)
+
+    def inc(self, amount=1.0):
+        STORE.inc(self.key, amount)
+
+
+class Counter(Metric):
+    """A value that only goes up, summed over the processes.
+
+    By convention, the name ends with ``_total``.
+    """
+
+    type = "counter"
+
+    def child(self, labels):
+        return CounterChild(self.name, labels)
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def samples(self, values):
+        for (suffix, labels), value in sorted(values.items()):
+            yield sample(f"{self.name}{suffix}", labels, value)
+
+
+class HistogramChild:
+    def __init__(self, name, buckets, labels):
+        self.buckets = buckets
+        separator = "," if labels else ""
+        # One key per bucket, +Inf included: counts are stored per bucket and
+        # only made cumulative when exposed.
+        self.bucket_keys = [
+            key(name, "_bucket", f'{labels}{separator}le="{bound}"')
+            for bound in [*buckets, "+Inf"]
+        ]
+        self.sum_key = key(name, "_sum", labels)
+        self.count_key = key(name, "_count", labels)
+
+    def observe(self, value):
+        STORE.inc(self.bucket_keys[bisect_left(self.buckets, value)])
+        STORE.inc(self.sum_key, value)
+        STORE.inc(self.count_key)
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def child(self, labels):
+        return HistogramChild(self.name, self.buckets, labels)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self, values):
+        series = {}
+        for (suffix, labels), value in values.items():
+            if suffix == "_bucket":
+                labels, _, bound = labels.rpartition("le=")
+                bound = bound.strip('"')
+                series.setdefault(labels.rstrip(","), {})[bound] = value
+            else:
+                series.setdefault(labels, {})[suffix] = value
+        for labels, entries in sorted(series.items()):
+            separator = "," if labels else ""
+            cumulative = 0.0
+            for bound in [*map(str, self.buckets), "+Inf"]:
+                cumulative += entries.get(bound, 0.0)
+                yield sample(
+                    f"{self.name}_bucket",
+                    f'{labels}{separator}le="{bound}"',
+                    cumulative,
+                )
+            yield sample(f"{self.name}_sum", labels, entries.get("_sum", 0.0))
+            yield sample(f"{self.name}_count", labels, entries.get("_count", 0.0))
+
+
+def render():
+    """Return every metric of every process in the Prometheus text format."""
+    values = {}
+    for entry, value in collect(metrics_directory()).items():
+        family, suffix, labels = entry.split("\t", 2)
+        values.setdefault(family, {})[suffix, labels] = value
+    lines = []
+    for name, metric in sorted(FAMILIES.items()):
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.type}")
+        lines.extend(metric.samples(values.get(name, {})))
+    return "\n".join(lines) + "\n"
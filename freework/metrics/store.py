@@ -0,0 +1,141 @@
+"""
+Multi-process storage of the metric values.
+
+Every process (gunicorn worker, crawl) writes its own values to a
+memory-mapped file ``<pid>.metrics`` of the metrics directory, so that
+updates need neither a lock shared between processes nor a system call. The
+``/metrics`` view sums the files of all the processes.
+
+A file is an 8-byte header holding the number of bytes used, followed by
+entries: the length of the key (4 bytes) and the UTF-8 key, padded to a
+multiple of 8 bytes, then the value as a double. The header is updated after the entry is written,
+so readers never see a partial entry.
+"""
+
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+HEADER = struct.Struct("<Q")
+KEY_LENGTH = struct.Struct("<I")
+VALUE = struct.Struct("<d")
+
+
+def _padded(length):
+    return (length + 7) // 8 * 8
+
+
+class MmapStore:
+    """Values of the current process, keyed by strings."""
+
+    initial_size = 64 * 1024
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.file = open(self.path, "a+b")
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.truncate(self.initial_size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        (self.used,) = HEADER.unpack_from(self.map, 0)
+        if self.used == 0:
+            self.used = HEADER.size
+            HEADER.pack_into(self.map, 0, self.used)
+        # Offset of the value of every key of the file.
+        self.offsets = {key: offset for key, offset, _ in read_entries(self.map)}
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            offset = self.offsets.get(key)
+            if offset is None:
+                offset = self.allocate(key)
+            (value,) = VALUE.unpack_from(self.map, offset)
+            VALUE.pack_into(self.map, offset, value + amount)
+
+    def allocate(self, key):
+        encoded = key.encode()
+        block = _padded(KEY_LENGTH.size + len(encoded))
+        size = block + VALUE.size
+        while self.used + size > len(self.map):
+            self.grow()
+        start = self.used
+        KEY_LENGTH.pack_into(self.map, start, len(encoded))
+        self.map[start + KEY_LENGTH.size : start + KEY_LENGTH.size + len(encoded)] = (
+            encoded
+        )
+        offset = start + block
+        VALUE.pack_into(self.map, offset, 0.0)
+        self.used += size
+        HEADER.pack_into(self.map, 0, self.used)
+        self.offsets[key] = offset
+        return offset
+
+    def grow(self):
+        capacity = len(self.map) * 2
+        self.map.close()
+        self.file.truncate(capacity)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def read_entries(data):
+    """Yield ``(key, value_offset, value)`` for the entries of a store file."""
+    if len(data) < HEADER.size:
+        return
+    (used,) = HEADER.unpack_from(data, 0)
+    position = HEADER.size
+    while position < used:
+        (length,) = KEY_LENGTH.unpack_from(data, position)
+        key = bytes(
+            data[position + KEY_LENGTH.size : position + KEY_LENGTH.size + length]
+        )
+        offset = position + _padded(KEY_LENGTH.size + length)
+        (value,) = VALUE.unpack_from(data, offset)
+        yield key.decode(), offset, value
+        position = offset + VALUE.size
+
+
+def collect(directory):
+    """Sum the values of every process that wrote to ``directory``."""
+    totals = {}
+    for path in Path(directory).glob("*.metrics"):
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            continue
+        for key, _, value in read_entries(data):
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+class ProcessStore:
+    """The store of the current process, opened on first use.
+
+    Reopened after a fork, so that workers forked from a preloaded master
+    each write to their own file.
+    """
+
+    def __init__(self, get_directory):
+        self.get_directory = get_directory
+        self.pid = None
+        self.store = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        pid = os.getpid()
+        if self.pid != pid:
+            with self.lock:
+                if self.pid != pid:
+                    directory = Path(self.get_directory())
+                    directory.mkdir(parents=True, exist_ok=True)
+                    self.store = MmapStore(directory / f"{pid}.metrics")
+                    self.pid = pid
+        return self.store
+
+    def inc(self, key, amount=1.0):
+        self.get().inc(key, amount)
@@ -0,0 +1,223 @@
+import threading
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from freework.metrics.context import request_thread
+from freework.metrics.middleware import MetricsMiddleware, NPlusOneMiddleware
+from freework.metrics.queries import (
+    NPlusOneError,
+    QueryShapes,
+    assert_no_n_plus_one,
+    normalize,
+)
+from freework.offers.models import Skill
+
+
+def query_skills(count):
+    for pk in range(count):
+        Skill.objects.filter(pk=pk).first()
+
+
+class NormalizeTests(TestCase):
+    def test_literals_are_replaced(self):
+        self.assertEqual(
+            normalize(
+                'SELECT "t1"."id" FROM "t1" WHERE "t1"."name" = \'it\'\'s\''
+                ' AND "t1"."rate" > -12.5 LIMIT 21'
+            ),
+            'SELECT "t1"."id" FROM "t1" WHERE "t1"."name" = ? AND "t1"."rate" > ?'
+            " LIMIT ?",
+        )
+
+    def test_in_lists_have_one_shape(self):
+        self.assertEqual(
+            normalize("SELECT 1 WHERE id IN (%s, %s, %s)"),
+            normalize("SELECT 1 WHERE id IN (%s)"),
+        )
+        self.assertEqual(
+            normalize("SELECT  1\n  WHERE id IN (?,?)"), "SELECT ? WHERE id IN (...)"
+        )
+
+
+class QueryShapesTests(TestCase):
+    def test_counts_the_queries_by_shape(self):
+        with QueryShapes(threshold=3) as shapes:
+            query_skills(4)
+            list(Skill.objects.all())
+
+        ((shape, count),) = shapes.repeated
+        self.assertEqual(count, 4)
+        self.assertIn('WHERE "offers_skill"."id" = ?', shape)
+        report = shapes.report()
+        self.assertTrue(report.startswith(f"4 x {shape}"))
+        self.assertIn("manage.py", report)
+
+    def test_counts_the_threads_tracked_for_it(self):
+        shapes = QueryShapes(threshold=3)
+
+        def work():
+            with shapes.track():
+                query_skills(3)
+
+        with shapes:
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+
+        self.assertEqual([count for _, count in shapes.repeated], [3])
+
+    def test_assert_no_n_plus_one(self):
+        with assert_no_n_plus_one(threshold=3):
+            query_skills(2)
+
+        with self.assertRaisesMessage(NPlusOneError, "3 x SELECT"):
+            with assert_no_n_plus_one(threshold=3):
+                query_skills(3)
+
+        # The error of the block wins.
+        with self.assertRaises(KeyError):
+            with assert_no_n_plus_one(threshold=3):
+                query_skills(3)
+                raise KeyError
+
+
+@override_settings(FREEWORK_NPLUSONE_THRESHOLD=3)
+class NPlusOneMiddlewareTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/offers/")
+
+    def view(self, request):
+        query_skills(3)
+        return HttpResponse()
+
+    def streaming_view(self, request):
+        def content():
+            # Like the dashboard widgets, on a thread working for the request.
+            with request_thread(request):
+                query_skills(3)
+            yield b""
+
+        return StreamingHttpResponse(content())
+
+    @override_settings(FREEWORK_NPLUSONE_MODE="raise")
+    def test_raise(self):
+        middleware = NPlusOneMiddleware(self.view)
+
+        with self.assertRaisesMessage(NPlusOneError, "N+1 queries in GET /offers/"):
+            middleware(self.request)
+
+    @override_settings(FREEWORK_NPLUSONE_MODE="raise")
+    async def test_raise_under_asgi(self):
+        async def view(request):
+            # Run on a thread of the executor, not by the middleware.
+            await sync_to_async(query_skills)(3)
+            return HttpResponse()
+
+        middleware = NPlusOneMiddleware(view)
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertRaisesMessage(NPlusOneError, "N+1 queries in GET /offers/"):
+            await middleware(self.request)
+
+    @override_settings(FREEWORK_NPLUSONE_MODE="raise")
+    def test_streamed_response_fails_once_sent(self):
+        response = NPlusOneMiddleware(self.streaming_view)(self.request)
+
+        with self.assertRaises(NPlusOneError):
+            b"".join(response.streaming_content)
+
+    @override_settings(FREEWORK_NPLUSONE_MODE="log", FREEWORK_NPLUSONE_SAMPLE_RATE=0.5)
+    def test_log_a_sample(self):
+        middleware = NPlusOneMiddleware(self.view)
+
+        with (
+            mock.patch("random.random", return_value=0.4),
+            self.assertLogs("freework.metrics.middleware", "WARNING") as logs,
+        ):
+            self.assertEqual(middleware(self.request).status_code, 200)
+        self.assertIn("N+1 queries in GET /offers/", logs.output[0])
+
+        with (
+            mock.patch("random.random", return_value=0.6),
+            self.assertNoLogs("freework.metrics.middleware"),
+        ):
+            self.assertEqual(middleware(self.request).status_code, 200)
+
+    @override_settings(FREEWORK_NPLUSONE_MODE="off")
+    def test_off(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            NPlusOneMiddleware(self.view)
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/offers/")
+
+    def streaming_view(self, request):
+        query_skills(2)
+
+        def widget():
+            with request_thread(request):
+                query_skills(3)
+
+        def content():
+            # Like the dashboard widgets, on threads working for the request.
+            threads = [threading.Thread(target=widget) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            yield b""
+
+        return StreamingHttpResponse(content())
+
+    def test_counts_the_queries_of_every_thread_once_sent(self):
+        with mock.patch("freework.metrics.middleware.REQUEST_QUERIES") as queries:
+            response = MetricsMiddleware(self.streaming_view)(self.request)
+            queries.labels.assert_not_called()
+            b"".join(response.streaming_content)
+
+        queries.labels.return_value.observe.assert_called_once_with(8)
+
+    async def test_counts_the_queries_under_asgi(self):
+        async def view(request):
+            await sync_to_async(query_skills)(2)
+
+            async def content():
+                # Like the dashboard widgets, on threads of the executor.
+                for _ in range(2):
+                    await sync_to_async(widget, thread_sensitive=False)()
+                yield b""
+
+            def widget():
+                with request_thread(request):
+                    query_skills(3)
+
+            return StreamingHttpResponse(content())
+
+        middleware = MetricsMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        with mock.patch("freework.metrics.middleware.REQUEST_QUERIES") as queries:
+            response = await middleware(self.request)
+            queries.labels.assert_not_called()
+            async for _ in response.streaming_content:
+                pass
+
+        queries.labels.return_value.observe.assert_called_once_with(8)
+
+    @override_settings(FREEWORK_METRICS_QUERIES=False)
+    def test_queries_are_not_counted_when_disabled(self):
+        with (
+            mock.patch("freework.metrics.middleware.REQUEST_QUERIES") as queries,
+            mock.patch("freework.metrics.middleware.REQUEST_DURATION") as duration,
+        ):
+            response = MetricsMiddleware(self.streaming_view)(self.request)
+            b"".join(response.streaming_content)
+
+        queries.labels.assert_not_called()
+        duration.labels.return_value.observe.assert_called_once()
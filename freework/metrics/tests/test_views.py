@@ -0,0 +1,33 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+@override_settings(FREEWORK_METRICS_ALLOWED_IPS=[], FREEWORK_METRICS_TOKEN="")
+class MetricsViewTests(TestCase):
+    def assertForbidden(self, *args, **kwargs):
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.get(reverse("metrics"), *args, **kwargs)
+        self.assertEqual(response.status_code, 403)
+
+    def test_forbidden_by_default(self):
+        self.assertForbidden()
+
+    @override_settings(FREEWORK_METRICS_ALLOWED_IPS=["10.0.0.0/8", "127.0.0.1"])
+    def test_allowed_addresses(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "freework_")
+
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.1.2.3")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertForbidden(REMOTE_ADDR="192.168.1.1")
+
+    @override_settings(FREEWORK_METRICS_TOKEN="s3cret")
+    def test_bearer_token(self):
+        response = self.client.get(
+            reverse("metrics"), headers={"Authorization": "Bearer s3cret"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertForbidden(headers={"Authorization": "Bearer wrong"})
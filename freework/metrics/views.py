@@ -0,0 +1,34 @@
+import ipaddress
+import secrets
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .registry import render
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def is_allowed(request):
+    """Tell whether ``request`` may read the metrics, see
+    ``FREEWORK_METRICS_ALLOWED_IPS`` and ``FREEWORK_METRICS_TOKEN``.
+    """
+    token = settings.FREEWORK_METRICS_TOKEN
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if token and scheme.lower() == "bearer":
+        return secrets.compare_digest(credentials.encode(), token.encode())
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.FREEWORK_METRICS_ALLOWED_IPS
+    )
+
+
+def metrics(request):
+    """Expose the metrics of every process to Prometheus."""
+    if not is_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import Company, JobOffer, Location, Skill
+
+
+@admin.register(JobOffer)
+class JobOfferAdmin(admin.ModelAdmin):
+    list_display = ("title", "company", "contract_type", "daily_rate", "published_at")
+    list_filter = ("contract_type",)
+    list_select_related = ("company",)
+    search_fields = ("title", "company__name", "external_id")
+    autocomplete_fields = ("company", "location", "skills")
+    ordering = ["-published_at"]
+
+
+@admin.register(Company, Location, Skill)
+class NameAdmin(admin.ModelAdmin):
+    search_fields = ("name",)
+    ordering = ["name"]
@@ -0,0 +1,93 @@
+"""
+Daily statistics precomputed from the job offers for the dashboard widgets.
+
+The dashboard never aggregates ``JobOffer`` rows itself: it reads
+``DailySkillStat`` and ``DailyLocationStat``, a few rows per day. These rows
+are recomputed for the days touched by a crawl (``refresh_days``) or all at
+once by ``manage.py rebuild_aggregates`` (``rebuild``).
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import DailyLocationStat, DailySkillStat, JobOffer
+
+
+def publication_day(published_at):
+    """Day an offer is counted on, in the current time zone like ``TruncDate``."""
+    return timezone.localdate(published_at)
+
+
+def day_ranges(days):
+    """Merge ``days`` into ``(start, end)`` datetime ranges of consecutive days.
+
+    Filtering on ranges rather than on ``published_at__date`` lets the database
+    use the index on ``published_at``.
+    """
+    ranges = []
+    for day in sorted(set(days)):
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        end = start + timedelta(days=1)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def refresh_days(days):
+    """Recompute the statistics of ``days`` from the offers published on them."""
+    days = set(days)
+    if not days:
+        return
+    published = Q()
+    for start, end in day_ranges(days):
+        published |= Q(published_at__gte=start, published_at__lt=end)
+    with transaction.atomic():
+        DailySkillStat.objects.filter(day__in=days).delete()
+        DailyLocationStat.objects.filter(day__in=days).delete()
+        write_stats(JobOffer.objects.filter(published))
+
+
+def rebuild():
+    """Recompute the statistics of every day."""
+    with transaction.atomic():
+        DailySkillStat.objects.all().delete()
+        DailyLocationStat.objects.all().delete()
+        write_stats(JobOffer.objects.all())
+
+
+def write_stats(offers, batch_size=1000):
+    """Insert the statistics of ``offers``, grouped by day."""
+    offers = offers.filter(published_at__isnull=False)
+    OfferSkill = JobOffer.skills.through
+    skill_rows = (
+        OfferSkill.objects.filter(joboffer__in=offers.values("pk"))
+        .annotate(day=TruncDate("joboffer__published_at"))
+        .values("day", "skill_id")
+        .annotate(
+            offer_count=Count("joboffer_id"),
+            rated_offer_count=Count("joboffer__daily_rate"),
+            daily_rate_total=Coalesce(Sum("joboffer__daily_rate"), 0),
+        )
+        .order_by()
+    )
+    DailySkillStat.objects.bulk_create(
+        (DailySkillStat(**row) for row in skill_rows.iterator()),
+        batch_size=batch_size,
+    )
+    location_rows = (
+        offers.filter(location__isnull=False)
+        .annotate(day=TruncDate("published_at"))
+        .values("day", "location_id")
+        .annotate(offer_count=Count("pk"))
+        .order_by()
+    )
+    DailyLocationStat.objects.bulk_create(
+        (DailyLocationStat(**row) for row in location_rows.iterator()),
+        batch_size=batch_size,
+    )
@@ -0,0 +1,42 @@
+"""
+Version of the scraped data, used to key the cached dashboard fragments.
+
+The version is stored in the database, so that a crawl running in another
+process can bump it, and cached for ``FREEWORK_DATA_VERSION_TTL`` seconds, so
+that rendering the dashboard between two crawls does not query the database.
+``bump`` also updates the cache: with a cache shared with the web processes,
+they see the new version immediately.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import DataVersion
+
+CACHE_KEY = "freework:data-version"
+# Primary key of the single DataVersion row.
+PK = 1
+
+
+def current():
+    """Return the current data version."""
+    version = cache.get(CACHE_KEY)
+    if version is None:
+        version = (
+            DataVersion.objects.filter(pk=PK).values_list("version", flat=True).first()
+            or 0
+        )
+        cache.set(CACHE_KEY, version, settings.FREEWORK_DATA_VERSION_TTL)
+    return version
+
+
+def bump():
+    """Increment the data version and return it."""
+    with transaction.atomic():
+        DataVersion.objects.get_or_create(pk=PK)
+        DataVersion.objects.filter(pk=PK).update(version=F("version") + 1)
+        version = DataVersion.objects.get(pk=PK).version
+    cache.set(CACHE_KEY, version, settings.FREEWORK_DATA_VERSION_TTL)
+    return version
@@ -0,0 +1,220 @@
+"""
+Near-duplicate detection of the job offers reposted by several agencies.
+
+The text of an offer (title and description, folded and stemmed like the
+search index) is cut into shingles of ``SHINGLE_SIZE`` words. Its MinHash
+signature holds, for each of ``PERMUTATIONS`` hash functions, the minimum
+hash of its shingles: two offers agree on a position with a probability
+equal to the Jaccard similarity of their shingles.
+
+The signature is cut into ``BANDS`` bands of ``ROWS`` values and each band
+is hashed into an ``OfferBucket`` row (locality-sensitive hashing). The
+candidate duplicates of a new offer are the offers sharing at least one
+bucket, found with the index on ``bucket``. A candidate is a duplicate if
+the signatures estimate a similarity of at least ``THRESHOLD``; with 16
+bands of 4 rows, a pair of offers similar at 70% is a candidate with a
+probability of 98.8%, at 30% with a probability of 12%.
+
+Each cluster of candidates is compared once, through its member sharing
+the most buckets with the new offer: a cluster of reposts costs one
+comparison, however many offers it holds. Boilerplate shared by distinct
+offers (agency footers, legal notices) also fills some buckets with
+unrelated offers: only the ``BUCKET_CANDIDATES`` latest offers of a bucket
+are kept, and only the ``MAX_CANDIDATES`` clusters sharing the most buckets
+with the offer are compared, as a repost shares most of its bands with its
+original and boilerplate a few. The cost of a lookup is bounded, whatever
+the size of the corpus.
+
+The offer joins the cluster of its duplicates (``OfferSignature.cluster``,
+the first offer of the cluster), or starts its own.
+"""
+
+import random
+import zlib
+from array import array
+from collections import Counter
+from hashlib import blake2b
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import JobOffer, OfferBucket, OfferSignature
+from .search import stemmed_words
+
+SHINGLE_SIZE = 3
+BANDS = 16
+ROWS = 4
+PERMUTATIONS = BANDS * ROWS
+THRESHOLD = 0.7
+# Texts with fewer shingles are too short to tell reposts from look-alikes.
+MIN_SHINGLES = 5
+# Offers kept per bucket, then clusters compared per offer.
+BUCKET_CANDIDATES = 100
+MAX_CANDIDATES = 10
+CHUNK_SIZE = 1000
+
+# Universal hashing modulo a Mersenne prime: h(x) = (a * x + b) mod P.
+PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+HASH_FUNCTIONS = [
+    (_rng.randrange(1, PRIME), _rng.randrange(0, PRIME)) for _ in range(PERMUTATIONS)
+]
+
+
+def shingles(text):
+    """Return the set of hashed word shingles of ``text``."""
+    words = stemmed_words(text)
+    return {
+        zlib.crc32(" ".join(words[i : i + SHINGLE_SIZE]).encode())
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(text):
+    """Return the MinHash signature of ``text``, or None if it is too short."""
+    hashes = shingles(text)
+    if len(hashes) < MIN_SHINGLES:
+        return None
+    return array(
+        "Q", [min((a * h + b) % PRIME for h in hashes) for a, b in HASH_FUNCTIONS]
+    )
+
+
+def buckets(values):
+    """Return the LSH bucket of each band of the signature ``values``."""
+    return [
+        int.from_bytes(
+            blake2b(
+                values[band * ROWS : (band + 1) * ROWS].tobytes(),
+                digest_size=8,
+                person=band.to_bytes(2, "little"),
+            ).digest(),
+            "little",
+            signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    """Estimate the Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(first, second)) / PERMUTATIONS
+
+
+def offer_text(title, description):
+    return f"{title}\n{description}"
+
+
+def index(offer_ids):
+    """Compute (again) the signatures of these offers and cluster them with
+    their near duplicates.
+
+    Offers are matched against the indexed offers and against each other, in
+    the order of ``offer_ids``.
+    """
+    offer_ids = list(offer_ids)
+    for start in range(0, len(offer_ids), CHUNK_SIZE):
+        with transaction.atomic():
+            index_chunk(offer_ids[start : start + CHUNK_SIZE])
+
+
+def index_chunk(offer_ids):
+    texts = JobOffer.objects.filter(pk__in=offer_ids).values_list(
+        "pk", "title", "description"
+    )
+    signatures = {}
+    for offer_id, title, description in texts:
+        values = signature(offer_text(title, description))
+        if values is not None:
+            signatures[offer_id] = values
+    # A changed offer may leave its cluster; the offers clustered under it
+    # keep their cluster until they change too.
+    OfferBucket.objects.filter(offer_id__in=offer_ids).delete()
+    OfferSignature.objects.filter(offer_id__in=offer_ids).delete()
+
+    offer_buckets = {
+        offer_id: buckets(values) for offer_id, values in signatures.items()
+    }
+    # Offers by bucket, latest first.
+    candidates = {}
+    for offer_id, bucket in (
+        OfferBucket.objects.filter(
+            bucket__in={bucket for keys in offer_buckets.values() for bucket in keys}
+        )
+        .order_by("-offer_id")
+        .values_list("offer_id", "bucket")
+    ):
+        offers = candidates.setdefault(bucket, [])
+        if len(offers) < BUCKET_CANDIDATES:
+            offers.append(offer_id)
+    # An offer whose cluster was deleted stands for its own cluster.
+    known = {
+        offer_id: (array("Q", bytes(values)), cluster_id or offer_id)
+        for offer_id, values, cluster_id in OfferSignature.objects.filter(
+            offer_id__in={o for offers in candidates.values() for o in offers}
+        ).values_list("offer_id", "signature", "cluster_id")
+    }
+
+    new_signatures = []
+    new_buckets = []
+    for offer_id in offer_ids:
+        if offer_id not in signatures:
+            continue
+        values = signatures[offer_id]
+        shared = Counter(
+            candidate
+            for bucket in offer_buckets[offer_id]
+            for candidate in candidates.get(bucket, ())
+            # Buckets left behind by an offer without a signature.
+            if candidate in known
+        )
+        # Each cluster is represented by its member sharing the most buckets
+        # with the offer.
+        representatives = {}
+        for candidate, _ in shared.most_common():
+            representatives.setdefault(known[candidate][1], candidate)
+        cluster_id = min(
+            (
+                cluster
+                for cluster, candidate in islice(
+                    representatives.items(), MAX_CANDIDATES
+                )
+                if similarity(values, known[candidate][0]) >= THRESHOLD
+            ),
+            default=offer_id,
+        )
+        known[offer_id] = (values, cluster_id)
+        new_signatures.append(
+            OfferSignature(
+                offer_id=offer_id, signature=values.tobytes(), cluster_id=cluster_id
+            )
+        )
+        for bucket in offer_buckets[offer_id]:
+            # Later offers of the chunk are matched against this one too.
+            candidates.setdefault(bucket, []).insert(0, offer_id)
+            del candidates[bucket][BUCKET_CANDIDATES:]
+            new_buckets.append(OfferBucket(offer_id=offer_id, bucket=bucket))
+    OfferSignature.objects.bulk_create(new_signatures, batch_size=CHUNK_SIZE)
+    OfferBucket.objects.bulk_create(new_buckets, batch_size=CHUNK_SIZE)
+
+
+def rebuild():
+    """Cluster every offer, oldest first."""
+    with transaction.atomic():
+        OfferBucket.objects.all().delete()
+        OfferSignature.objects.all().delete()
+        index(JobOffer.objects.order_by("pk").values_list("pk", flat=True))
+
+
+def clusters():
+    """Return ``{"cluster": offer id, "size": n}`` for the clusters of more
+    than one offer, largest first.
+    """
+    return (
+        OfferSignature.objects.filter(cluster__isnull=False)
+        .values("cluster")
+        .annotate(size=Count("offer"))
+        .filter(size__gt=1)
+        .order_by("-size", "-cluster")
+    )
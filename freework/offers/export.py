@@ -0,0 +1,262 @@
+"""
+Streaming exports of the job offers.
+
+Offers are read with ``QuerySet.iterator()`` (a server-side cursor on
+PostgreSQL) in chunks of ``CHUNK_SIZE`` rows, and every chunk is encoded and
+handed over before the next one is read: the memory used depends on the
+chunk size, not on the number of offers exported. The same generators feed
+the ``export`` view (a ``StreamingHttpResponse``) and ``manage.py
+export_offers``. Under ASGI, Django would read a synchronous iterator to the
+end before sending anything: ``stream()`` turns it into an asynchronous one.
+
+The columnar formats need ``pyarrow`` (the ``export`` extra), see
+``available_formats()``:
+
+- ``parquet``: one row group per chunk;
+- ``arrow``: the Arrow IPC stream format, one record batch per chunk.
+"""
+
+import csv
+import io
+from collections import defaultdict
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+
+from .models import JobOffer
+
+CHUNK_SIZE = 2000
+COLUMNS = [
+    "external_id",
+    "url",
+    "title",
+    "company",
+    "contract_type",
+    "daily_rate",
+    "location",
+    "skills",
+    "published_at",
+]
+# Skill names contain commas ("C, C++") but no pipes.
+SKILL_SEPARATOR = "|"
+
+
+def chunks(queryset, chunk_size=CHUNK_SIZE):
+    """Yield lists of ``{column: value}`` for the offers of ``queryset``.
+
+    Skills are read with one query per chunk, ``skills`` is a list of names.
+    """
+    rows = queryset.values_list(
+        "id",
+        "external_id",
+        "url",
+        "title",
+        "company__name",
+        "contract_type",
+        "daily_rate",
+        "location__name",
+        "published_at",
+    ).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        skills = defaultdict(list)
+        for offer_id, name in (
+            JobOffer.skills.through.objects.filter(
+                joboffer_id__in=[row[0] for row in chunk]
+            )
+            .order_by("skill__name")
+            .values_list("joboffer_id", "skill__name")
+        ):
+            skills[offer_id].append(name)
+        yield [
+            {
+                "external_id": external_id,
+                "url": url,
+                "title": title,
+                "company": company,
+                "contract_type": contract_type,
+                "daily_rate": daily_rate,
+                "location": location,
+                "skills": skills[offer_id],
+                "published_at": published_at,
+            }
+            for (
+                offer_id,
+                external_id,
+                url,
+                title,
+                company,
+                contract_type,
+                daily_rate,
+                location,
+                published_at,
+            ) in chunk
+        ]
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file collecting what pyarrow writes until ``drain()``."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+class ExportFormat:
+    content_type = None
+    extension = None
+    label = None
+
+    def check(self):
+        """Raise ``ImproperlyConfigured`` if the format cannot be written."""
+
+    def encode(self, chunks):
+        """Yield the bytes of the file of the offers in ``chunks``."""
+        raise NotImplementedError
+
+
+class CsvFormat(ExportFormat):
+    content_type = "text/csv; charset=utf-8"
+    extension = "csv"
+    label = "CSV"
+
+    def encode(self, chunks):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, COLUMNS)
+        writer.writeheader()
+        for chunk in chunks:
+            for row in chunk:
+                writer.writerow(
+                    {
+                        **row,
+                        "skills": SKILL_SEPARATOR.join(row["skills"]),
+                        "published_at": row["published_at"]
+                        and row["published_at"].isoformat(),
+                    }
+                )
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode()
+
+
+class ArrowFormat(ExportFormat):
+    """Base class of the formats written with ``pyarrow``."""
+
+    def check(self):
+        self.import_pyarrow()
+
+    def import_pyarrow(self):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImproperlyConfigured(
+                f"The {self.extension} export format requires pyarrow."
+            )
+        return pyarrow
+
+    def schema(self, pa):
+        return pa.schema(
+            [
+                ("external_id", pa.string()),
+                ("url", pa.string()),
+                ("title", pa.string()),
+                ("company", pa.string()),
+                ("contract_type", pa.string()),
+                ("daily_rate", pa.int32()),
+                ("location", pa.string()),
+                ("skills", pa.list_(pa.string())),
+                ("published_at", pa.timestamp("us", tz="UTC")),
+            ]
+        )
+
+    def open_writer(self, pa, sink, schema):
+        raise NotImplementedError
+
+    def encode(self, chunks):
+        pa = self.import_pyarrow()
+        schema = self.schema(pa)
+        sink = ChunkSink()
+        with self.open_writer(pa, sink, schema) as writer:
+            for chunk in chunks:
+                writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+
+class ParquetFormat(ArrowFormat):
+    content_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+    label = "Parquet"
+
+    def open_writer(self, pa, sink, schema):
+        import pyarrow.parquet
+
+        return pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+
+
+class ArrowStreamFormat(ArrowFormat):
+    content_type = "application/vnd.apache.arrow.stream"
+    extension = "arrow"
+    label = "Arrow"
+
+    def open_writer(self, pa, sink, schema):
+        return pa.ipc.new_stream(sink, schema)
+
+
+FORMATS = {
+    export_format.extension: export_format()
+    for export_format in (CsvFormat, ParquetFormat, ArrowStreamFormat)
+}
+
+
+def available_formats():
+    """Return the formats that can be written, e.g. without pyarrow, CSV only."""
+    available = []
+    for export_format in FORMATS.values():
+        try:
+            export_format.check()
+        except ImproperlyConfigured:
+            continue
+        available.append(export_format)
+    return available
+
+
+def export(queryset, format, chunk_size=CHUNK_SIZE):
+    """Return an iterator over the bytes of the export of ``queryset`` in
+    ``format``, checked before anything is read.
+    """
+    export_format = FORMATS[format]
+    export_format.check()
+    return export_format.encode(chunks(queryset, chunk_size))
+
+
+async def stream(content):
+    """Iterate asynchronously over ``content``, returned by ``export()``.
+
+    Each chunk is read and encoded by a call to ``sync_to_async``, on the
+    thread of the request (the one holding the database cursor), while the
+    event loop sends the previous one.
+    """
+    step = sync_to_async(next)
+    try:
+        while (data := await step(content, None)) is not None:
+            yield data
+    finally:
+        await sync_to_async(content.close)()
@@ -0,0 +1,37 @@
+import hashlib
+from datetime import datetime
+
+# Fields covered by the content fingerprint of an offer. Anything that is not
+# listed here (timestamps managed by Django, the fingerprint itself...) does
+# not count as a change.
+FINGERPRINT_FIELDS = (
+    "url",
+    "title",
+    "company",
+    "contract_type",
+    "daily_rate",
+    "location",
+    "skills",
+    "description",
+    "published_at",
+)
+
+
+def _normalize(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return ",".join(sorted(_normalize(v) for v in value))
+    # Collapse whitespace so that reformatted HTML does not look like an edit.
+    return " ".join(str(value).split())
+
+
+def offer_fingerprint(fields):
+    """Return a stable SHA-256 hex digest of the normalized offer fields."""
+    digest = hashlib.sha256()
+    for name in FINGERPRINT_FIELDS:
+        digest.update(_normalize(fields.get(name)).encode())
+        digest.update(b"\x1f")
+    return digest.hexdigest()
@@ -0,0 +1,50 @@
+from datetime import datetime, time
+
+from django import forms
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .managers import RELEVANCE
+from .models import Location, Skill
+
+
+class OfferFilterForm(forms.Form):
+    """Filters of the dashboard offer list, see ``JobOfferQuerySet.dashboard``."""
+
+    q = forms.CharField(label=_("search"), required=False)
+    published_since = forms.DateField(
+        label=_("published since"),
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+    contract_type = forms.CharField(label=_("contract type"), required=False)
+    min_rate = forms.IntegerField(
+        label=_("minimum daily rate"), required=False, min_value=0
+    )
+    max_rate = forms.IntegerField(
+        label=_("maximum daily rate"), required=False, min_value=0
+    )
+    location = forms.ModelChoiceField(
+        Location.objects.order_by("name"), label=_("location"), required=False
+    )
+    skill = forms.ModelChoiceField(
+        Skill.objects.order_by("name"), label=_("skill"), required=False
+    )
+    sort = forms.ChoiceField(
+        label=_("sort"),
+        required=False,
+        choices=[("", _("newest first")), (RELEVANCE, _("relevance"))],
+    )
+
+    def clean_published_since(self):
+        day = self.cleaned_data["published_since"]
+        if day is not None:
+            return timezone.make_aware(datetime.combine(day, time.min))
+        return day
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Only the matches of a search have a relevance.
+        if not cleaned_data.get("q"):
+            cleaned_data["sort"] = ""
+        return cleaned_data
@@ -0,0 +1,448 @@
+"""
+Bulk import of offers from past crawl dumps.
+
+Files are Scrapy feed exports in JSON lines (``.jl``, ``.jsonl``) or CSV
+(``.csv``, with skills separated by ``|`` like ``manage.py export_offers``),
+optionally gzipped. They are streamed: records are validated and normalized
+with ``clean`` and loaded in chunks, one transaction per chunk, by a backend
+chosen from the database vendor:
+
+- ``PostgresImportBackend`` copies each chunk into a temporary staging table
+  with ``COPY`` and merges it into the offers with set-based statements;
+- ``SqliteImportBackend`` upserts the changed offers with ``executemany``.
+
+As in the crawl pipeline, offers whose content fingerprint did not change are
+not written. Once every file is loaded, or an error stopped the import, the
+daily statistics of the days touched by the chunks loaded are recomputed and
+the data version is bumped.
+"""
+
+import csv
+import gzip
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import chain
+
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import aggregates, data_version, duplicates, search
+from .fingerprint import offer_fingerprint
+from .models import Company, JobOffer, Location, Skill
+
+CHUNK_SIZE = 10_000
+SKILL_SEPARATOR = "|"
+# Columns of the offers written by an import, the primary key and timestamps
+# aside.
+COLUMNS = [
+    "external_id",
+    "url",
+    "title",
+    "company_id",
+    "contract_type",
+    "daily_rate",
+    "location_id",
+    "description",
+    "published_at",
+    "fingerprint",
+    "etag",
+    "last_modified",
+]
+MAX_ERRORS = 10
+MAX_LENGTH = {f.name: f.max_length for f in JobOffer._meta.fields}
+NAME_LENGTH = {
+    model: model._meta.get_field("name").max_length
+    for model in (Company, Location, Skill)
+}
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def open_file(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_records(path):
+    """Yield ``(line number, record)`` for the records of a dump file."""
+    name = str(path).removesuffix(".gz")
+    with open_file(path) as file:
+        if name.endswith(".csv"):
+            # Line 1 is the header.
+            yield from enumerate(csv.DictReader(file), start=2)
+        elif name.endswith((".jl", ".jsonl")):
+            for number, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except json.JSONDecodeError as error:
+                        yield number, InvalidRecord(f"Invalid JSON: {error}.")
+        else:
+            raise ValueError(f"Unsupported file type: {path}, expected CSV or JSONL.")
+
+
+def text(record, name, max_length=None, required=False):
+    value = record.get(name)
+    value = "" if value is None else " ".join(str(value).split())
+    if required and not value:
+        raise InvalidRecord(f"Missing {name}.")
+    if max_length and len(value) > max_length:
+        raise InvalidRecord(f"{name} is longer than {max_length} characters.")
+    return value
+
+
+def clean(record):
+    """Validate a record and return the fields of the offer, as the crawl
+    pipeline receives them: names for the company, location and skills.
+    """
+    if isinstance(record, InvalidRecord):
+        raise record
+    if not isinstance(record, dict):
+        raise InvalidRecord("Not an object.")
+
+    daily_rate = record.get("daily_rate")
+    if daily_rate in (None, ""):
+        daily_rate = None
+    else:
+        try:
+            daily_rate = int(float(daily_rate))
+        except (TypeError, ValueError):
+            raise InvalidRecord(f"Invalid daily_rate: {daily_rate!r}.")
+        if daily_rate < 0:
+            raise InvalidRecord(f"Negative daily_rate: {daily_rate}.")
+
+    published_at = record.get("published_at") or None
+    if published_at is not None:
+        try:
+            published_at = parse_datetime(str(published_at))
+        except ValueError:
+            published_at = None
+        if published_at is None:
+            raise InvalidRecord(f"Invalid published_at: {record['published_at']!r}.")
+        if timezone.is_naive(published_at):
+            published_at = timezone.make_aware(published_at)
+
+    skills = record.get("skills") or []
+    if isinstance(skills, str):
+        skills = skills.split(SKILL_SEPARATOR)
+    skills = list(dict.fromkeys(filter(None, (" ".join(s.split()) for s in skills))))
+    if any(len(skill) > NAME_LENGTH[Skill] for skill in skills):
+        raise InvalidRecord(f"Skill longer than {NAME_LENGTH[Skill]} characters.")
+
+    fields = {
+        "external_id": text(
+            record, "external_id", MAX_LENGTH["external_id"], required=True
+        ),
+        "url": text(record, "url", MAX_LENGTH["url"], required=True),
+        "title": text(record, "title", MAX_LENGTH["title"], required=True),
+        "company": text(record, "company", NAME_LENGTH[Company]) or None,
+        "contract_type": text(record, "contract_type", MAX_LENGTH["contract_type"]),
+        "daily_rate": daily_rate,
+        "location": text(record, "location", NAME_LENGTH[Location]) or None,
+        "skills": skills,
+        # Kept as is: line breaks matter in a description.
+        "description": str(record.get("description") or ""),
+        "published_at": published_at,
+        "etag": text(record, "etag", MAX_LENGTH["etag"]),
+        "last_modified": text(record, "last_modified", MAX_LENGTH["last_modified"]),
+    }
+    fields["fingerprint"] = offer_fingerprint(fields)
+    return fields
+
+
+@dataclass
+class ImportStats:
+    read: int = 0
+    written: int = 0
+    unchanged: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rate(self):
+        return self.read / max(time.perf_counter() - self.started, 1e-9)
+
+
+class ImportBackend:
+    """Loads chunks of cleaned offers, bound to one database connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.table = JobOffer._meta.db_table
+        self.through = JobOffer.skills.through
+        # Name -> primary key of the related rows, completed as new names
+        # show up.
+        self.names = {
+            model: dict(model.objects.using(connection.alias).values_list("name", "pk"))
+            for model in (Company, Location, Skill)
+        }
+
+    def resolve(self, model, names):
+        """Return ``{name: pk}`` for ``names``, creating the missing rows."""
+        known = self.names[model]
+        missing = {name for name in names if name and name not in known}
+        if missing:
+            manager = model.objects.using(self.connection.alias)
+            manager.bulk_create(
+                [model(name=name) for name in missing], ignore_conflicts=True
+            )
+            known.update(manager.filter(name__in=missing).values_list("name", "pk"))
+        return known
+
+    def rows(self, chunk):
+        """Yield ``(row of COLUMNS, skill ids)`` for the offers of ``chunk``."""
+        companies = self.resolve(Company, [f["company"] for f in chunk])
+        locations = self.resolve(Location, [f["location"] for f in chunk])
+        skill_ids = self.resolve(Skill, [s for f in chunk for s in f["skills"]])
+        for fields in chunk:
+            row = {
+                **fields,
+                "company_id": companies.get(fields["company"]),
+                "location_id": locations.get(fields["location"]),
+            }
+            yield (
+                [row[column] for column in COLUMNS],
+                [skill_ids[name] for name in fields["skills"]],
+            )
+
+    def load(self, chunk):
+        """Write the changed offers of ``chunk``, a list of cleaned offers
+        with distinct external ids.
+
+        Return ``(ids of the offers written, datetimes of publication)``,
+        previous and new, of the offers written.
+        """
+        raise NotImplementedError
+
+    def finish(self):
+        """Release what the backend created for the import."""
+
+
+class SqliteImportBackend(ImportBackend):
+    def load(self, chunk):
+        ops = self.connection.ops
+        existing = {
+            external_id: (fingerprint, published_at)
+            for external_id, fingerprint, published_at in JobOffer.objects.using(
+                self.connection.alias
+            )
+            .filter(external_id__in=[f["external_id"] for f in chunk])
+            .values_list("external_id", "fingerprint", "published_at")
+        }
+        changed = [
+            f
+            for f in chunk
+            if existing.get(f["external_id"], (None,))[0] != f["fingerprint"]
+        ]
+        if not changed:
+            return [], []
+        published_ats = [f["published_at"] for f in changed] + [
+            existing[f["external_id"]][1]
+            for f in changed
+            if f["external_id"] in existing
+        ]
+        now = ops.adapt_datetimefield_value(timezone.now())
+        rows = []
+        skills = {}
+        for row, skill_ids in self.rows(changed):
+            row[COLUMNS.index("published_at")] = ops.adapt_datetimefield_value(
+                row[COLUMNS.index("published_at")]
+            )
+            rows.append([*row, now, now])
+            skills[row[0]] = skill_ids
+        columns = ", ".join([*COLUMNS, "created_at", "updated_at"])
+        updates = ", ".join(
+            f"{column} = excluded.{column}" for column in [*COLUMNS[1:], "updated_at"]
+        )
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {self.table} ({columns})
+                VALUES ({", ".join(["%s"] * (len(COLUMNS) + 2))})
+                ON CONFLICT (external_id) DO UPDATE SET {updates}
+                """,
+                rows,
+            )
+        offer_ids = dict(
+            JobOffer.objects.using(self.connection.alias)
+            .filter(external_id__in=skills)
+            .values_list("external_id", "pk")
+        )
+        self.through.objects.using(self.connection.alias).filter(
+            joboffer_id__in=offer_ids.values()
+        ).delete()
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.through._meta.db_table} (joboffer_id, skill_id) "
+                "VALUES (%s, %s)",
+                [
+                    (offer_ids[external_id], skill_id)
+                    for external_id, skill_ids in skills.items()
+                    for skill_id in skill_ids
+                ],
+            )
+        return list(offer_ids.values()), published_ats
+
+
+class PostgresImportBackend(ImportBackend):
+    staging = "freework_import_staging"
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TEMPORARY TABLE IF NOT EXISTS {self.staging} (
+                    external_id text PRIMARY KEY,
+                    url text NOT NULL,
+                    title text NOT NULL,
+                    company_id bigint,
+                    contract_type text NOT NULL,
+                    daily_rate integer,
+                    location_id bigint,
+                    description text NOT NULL,
+                    published_at timestamptz,
+                    fingerprint text NOT NULL,
+                    etag text NOT NULL,
+                    last_modified text NOT NULL,
+                    skill_ids bigint[] NOT NULL
+                )
+                """)
+
+    def copy(self, cursor, chunk):
+        """Copy ``chunk`` into the staging table, in the CSV format of COPY."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row, skill_ids in self.rows(chunk):
+            writer.writerow(
+                [
+                    r"\N" if value is None else value
+                    for value in chain(row, ["{" + ",".join(map(str, skill_ids)) + "}"])
+                ]
+            )
+        buffer.seek(0)
+        sql = f"COPY {self.staging} FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        if hasattr(cursor.cursor, "copy_expert"):
+            # psycopg2
+            cursor.cursor.copy_expert(sql, buffer)
+        else:
+            with cursor.cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+    def load(self, chunk):
+        through = self.through._meta.db_table
+        columns = ", ".join(COLUMNS)
+        updates = ", ".join(
+            f"{column} = EXCLUDED.{column}" for column in [*COLUMNS[1:], "updated_at"]
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.staging}")
+            self.copy(cursor, chunk)
+            cursor.execute(f"""
+                SELECT offer.published_at FROM {self.table} AS offer
+                JOIN {self.staging} AS staging USING (external_id)
+                WHERE offer.fingerprint <> staging.fingerprint
+                AND offer.published_at IS NOT NULL
+                """)
+            published_ats = [published_at for (published_at,) in cursor.fetchall()]
+            cursor.execute(f"""
+                INSERT INTO {self.table} ({columns}, created_at, updated_at)
+                SELECT {columns}, now(), now() FROM {self.staging}
+                ON CONFLICT (external_id) DO UPDATE SET {updates}
+                WHERE {self.table}.fingerprint <> EXCLUDED.fingerprint
+                RETURNING id, published_at
+                """)
+            written = cursor.fetchall()
+            offer_ids = [offer_id for offer_id, _ in written]
+            published_ats += [published_at for _, published_at in written]
+            cursor.execute(
+                f"DELETE FROM {through} WHERE joboffer_id = ANY(%s)", [offer_ids]
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {through} (joboffer_id, skill_id)
+                SELECT offer.id, unnest(staging.skill_ids)
+                FROM {self.staging} AS staging
+                JOIN {self.table} AS offer USING (external_id)
+                WHERE offer.id = ANY(%s)
+                """,
+                [offer_ids],
+            )
+        return offer_ids, published_ats
+
+    def finish(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.staging}")
+
+
+BACKENDS = {
+    "sqlite": SqliteImportBackend,
+    "postgresql": PostgresImportBackend,
+}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    try:
+        backend = BACKENDS[connection.vendor]
+    except KeyError:
+        raise NotSupportedError(f"Imports are not supported on {connection.vendor}.")
+    return backend(connection)
+
+
+def import_offers(paths, chunk_size=CHUNK_SIZE, progress=None):
+    """Import the offers of the dump files ``paths`` and return the stats.
+
+    ``progress`` is called with the stats after each chunk.
+    """
+    stats = ImportStats()
+    backend = get_backend()
+    touched_days = set()
+
+    def load(chunk):
+        with transaction.atomic():
+            offer_ids, published_ats = backend.load(list(chunk.values()))
+            search.index(offer_ids)
+            duplicates.index(offer_ids)
+        touched_days.update(
+            aggregates.publication_day(published_at)
+            for published_at in published_ats
+            if published_at is not None
+        )
+        stats.written += len(offer_ids)
+        stats.unchanged += len(chunk) - len(offer_ids)
+        if progress is not None:
+            progress(stats)
+
+    try:
+        for path in paths:
+            # Keyed by external id: the last record of an offer wins.
+            chunk = {}
+            for number, record in read_records(path):
+                stats.read += 1
+                try:
+                    fields = clean(record)
+                except InvalidRecord as error:
+                    stats.invalid += 1
+                    if len(stats.errors) < MAX_ERRORS:
+                        stats.errors.append(f"{path}:{number}: {error}")
+                    continue
+                chunk[fields["external_id"]] = fields
+                if len(chunk) >= chunk_size:
+                    load(chunk)
+                    chunk = {}
+            if chunk:
+                load(chunk)
+    finally:
+        backend.finish()
+        # Also after an error: the chunks loaded before it are committed.
+        if stats.written:
+            aggregates.refresh_days(touched_days)
+            data_version.bump()
+    return stats
@@ -0,0 +1,219 @@
+import cProfile
+import logging
+import multiprocessing
+import os
+import tempfile
+from argparse import BooleanOptionalAction
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+logger = logging.getLogger(__name__)
+
+
+def run_crawl(overrides, spider_kwargs, profile=None, sample=False):
+    """Run one crawl in the current process, block until it finishes and
+    return its stats.
+
+    ``profile`` is the file of a cProfile of the crawl and ``sample`` records
+    a sampling profile of all its threads in ``MEDIA_ROOT/profiles``.
+    """
+    os.environ["SCRAPY_SETTINGS_MODULE"] = "freework.scraper.settings"
+    # No-op when Django is already set up, needed in a spawned shard.
+    django.setup()
+
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    from freework.scraper.spiders.freework import FreeWorkSpider
+
+    settings = get_project_settings()
+    settings.setdict(overrides, priority="cmdline")
+
+    # Logging is already configured by Django's LOGGING setting: only the
+    # level of Scrapy's loggers, reset to DEBUG by Scrapy, follows LOG_LEVEL.
+    process = CrawlerProcess(settings, install_root_handler=False)
+    logging.getLogger("scrapy").setLevel(settings["LOG_LEVEL"])
+    crawler = process.create_crawler(FreeWorkSpider)
+    process.crawl(crawler, **spider_kwargs)
+
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(process.start)
+        profiler.dump_stats(profile)
+    elif sample:
+        from freework.metrics.profiling import SamplingProfiler
+
+        with SamplingProfiler() as profiler:
+            process.start()
+        logger.info("Sampling profile written to %s", profiler.save("crawl"))
+    else:
+        process.start()
+    return crawler.stats.get_stats()
+
+
+def run_shard(results, name, *args):
+    """Run the crawl of a shard and send its count of failed offers."""
+    stats = run_crawl(*args)
+    results.put((name, stats.get("freework/offers_failed", 0)))
+
+
+def check_failed(failed):
+    """Raise a CommandError if ``{name: count}`` holds offers not written."""
+    failed = {name: count for name, count in failed.items() if count}
+    if failed:
+        raise CommandError(
+            f"{sum(failed.values())} offers could not be written "
+            f"(in {', '.join(sorted(failed))}), see the log."
+        )
+
+
+def parse_pages(value):
+    first, _, last = value.partition("-")
+    try:
+        return range(int(first), int(last or first) + 1)
+    except ValueError:
+        raise CommandError(f"Invalid page range: {value!r}, expected FIRST-LAST.")
+
+
+class Command(BaseCommand):
+    help = "Crawl free-work.com and store the job offers in the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Stop at already known offers and send conditional requests.",
+        )
+        parser.add_argument("--start-url", help="Listing URL to start from.")
+        parser.add_argument(
+            "--seed",
+            action="append",
+            default=[],
+            metavar="URL",
+            help="Listing page to crawl without following its pagination, "
+            "e.g. one per category or region (may be repeated).",
+        )
+        parser.add_argument(
+            "--pages",
+            metavar="FIRST-LAST",
+            help="Crawl this range of listing pages of --start-url as seeds.",
+        )
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=1,
+            help="Split the seeds between this many worker processes.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, help="Maximum number of concurrent requests."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, help="Number of offers written per transaction."
+        )
+        parser.add_argument(
+            "--profile",
+            nargs="?",
+            const="crawl_freework.prof",
+            metavar="FILE",
+            help="Dump a cProfile of the whole run to FILE (pstats format), "
+            "one FILE.N per shard.",
+        )
+        parser.add_argument(
+            "--sample-profile",
+            action=BooleanOptionalAction,
+            default=None,
+            help="Write a sampling profile (speedscope and collapsed stacks) of "
+            "each crawl process to MEDIA_ROOT/profiles. Defaults to the "
+            "FREEWORK_PROFILE_CRAWLS setting.",
+        )
+        parser.add_argument(
+            "-s",
+            "--set",
+            action="append",
+            default=[],
+            metavar="NAME=VALUE",
+            help="Override a Scrapy setting (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options["concurrency"]:
+            overrides["CONCURRENT_REQUESTS"] = options["concurrency"]
+            overrides["CONCURRENT_REQUESTS_PER_DOMAIN"] = options["concurrency"]
+        if options["batch_size"]:
+            overrides["FREEWORK_BATCH_SIZE"] = options["batch_size"]
+        for override in options["set"]:
+            name, _, value = override.partition("=")
+            overrides[name] = value
+
+        from freework.scraper.spiders.freework import START_URL
+
+        start_url = options["start_url"] or START_URL
+        seeds = list(options["seed"])
+        if options["pages"]:
+            separator = "&" if "?" in start_url else "?"
+            seeds += [
+                f"{start_url}{separator}page={page}"
+                for page in parse_pages(options["pages"])
+            ]
+        sample = options["sample_profile"]
+        if sample is None:
+            sample = settings.FREEWORK_PROFILE_CRAWLS
+        spider_kwargs = {"incremental": options["incremental"]}
+        if seeds:
+            spider_kwargs["seeds"] = seeds
+        else:
+            spider_kwargs["start_url"] = start_url
+
+        if options["shards"] <= 1:
+            # Django is already set up: the crawl runs in this process. Its
+            # reads, on the reactor thread, use the command's database
+            # connection; its writes use the one of the writer thread.
+            stats = run_crawl(overrides, spider_kwargs, options["profile"], sample)
+            check_failed({"crawl": stats.get("freework/offers_failed", 0)})
+        elif not seeds:
+            raise CommandError("--shards needs seeds, use --pages or --seed.")
+        else:
+            self.run_shards(
+                options["shards"], seeds, overrides, spider_kwargs, options, sample
+            )
+
+        if options["profile"]:
+            self.stdout.write(f"Profile written to {options['profile']}")
+
+    def run_shards(self, shards, seeds, overrides, spider_kwargs, options, sample):
+        """Crawl ``seeds`` round-robin over ``shards`` processes."""
+        context = multiprocessing.get_context("spawn")
+        results = context.SimpleQueue()
+        with tempfile.TemporaryDirectory(prefix="freework-crawl-") as tmpdir:
+            overrides = {
+                **overrides,
+                "FREEWORK_DEDUP_DB": str(Path(tmpdir, "dedup.sqlite3")),
+            }
+            processes = []
+            for shard in range(min(shards, len(seeds))):
+                profile = options["profile"] and f"{options['profile']}.{shard}"
+                kwargs = {**spider_kwargs, "seeds": seeds[shard::shards]}
+                # Each shard resumes its own frontier.
+                shard_overrides = {**overrides, "FREEWORK_FRONTIER_SHARD": shard}
+                name = f"crawl-shard-{shard}"
+                process = context.Process(
+                    target=run_shard,
+                    args=(results, name, shard_overrides, kwargs, profile, sample),
+                    name=name,
+                )
+                process.start()
+                processes.append(process)
+            for process in processes:
+                process.join()
+        failed = [p.name for p in processes if p.exitcode != 0]
+        if failed:
+            raise CommandError(f"Crawl failed in {', '.join(failed)}.")
+        offers_failed = {}
+        while not results.empty():
+            name, count = results.get()
+            offers_failed[name] = count
+        check_failed(offers_failed)
@@ -0,0 +1,63 @@
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from freework.offers import export
+from freework.offers.forms import OfferFilterForm
+from freework.offers.models import JobOffer
+
+
+class Command(BaseCommand):
+    help = "Export the job offers to a CSV, Parquet or Arrow file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(export.FORMATS), default="csv")
+        parser.add_argument(
+            "-o",
+            "--output",
+            default="-",
+            metavar="FILE",
+            help="File to write, the standard output by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=export.CHUNK_SIZE,
+            help="Number of offers read and encoded at a time.",
+        )
+        # The filters of the dashboard.
+        parser.add_argument("--search", dest="q", metavar="QUERY")
+        parser.add_argument("--published-since", metavar="YYYY-MM-DD")
+        parser.add_argument("--contract-type")
+        parser.add_argument("--min-rate")
+        parser.add_argument("--max-rate")
+        parser.add_argument("--location", metavar="ID")
+        parser.add_argument("--skill", metavar="ID")
+
+    def handle(self, *args, **options):
+        form = OfferFilterForm(
+            {name: options[name] for name in OfferFilterForm.base_fields}
+        )
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        queryset = JobOffer.objects.dashboard(**form.cleaned_data)
+        try:
+            content = export.export(queryset, options["format"], options["chunk_size"])
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+
+        if options["output"] == "-":
+            self.write(content, sys.stdout.buffer)
+        else:
+            with open(options["output"], "wb") as output:
+                size = self.write(content, output)
+            self.stderr.write(f"{size} bytes written to {options['output']}.")
+
+    def write(self, content, output):
+        size = 0
+        for data in content:
+            output.write(data)
+            size += len(data)
+        output.flush()
+        return size
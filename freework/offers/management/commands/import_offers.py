@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from freework.offers import imports
+
+
+class Command(BaseCommand):
+    help = "Import job offers from past crawl dumps (JSON lines or CSV)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            metavar="FILE",
+            help="Scrapy feed export: .jl, .jsonl or .csv, optionally .gz.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=imports.CHUNK_SIZE,
+            help="Number of offers loaded per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            stats = imports.import_offers(
+                options["paths"], options["chunk_size"], progress=self.progress
+            )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        for error in stats.errors:
+            self.stderr.write(error)
+        self.stdout.write(
+            f"{stats.read} records read: {stats.written} offers written, "
+            f"{stats.unchanged} unchanged, {stats.invalid} invalid."
+        )
+
+    def progress(self, stats):
+        self.stdout.write(
+            f"{stats.read} read, {stats.written} written, "
+            f"{stats.unchanged} unchanged, {stats.invalid} invalid "
+            f"({stats.rate:.0f} records/s)"
+        )
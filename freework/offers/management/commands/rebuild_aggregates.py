@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from freework.offers import aggregates, data_version
+from freework.offers.models import DailyLocationStat, DailySkillStat
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily statistics shown on the dashboard."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            metavar="YYYY-MM-DD",
+            help="Only recompute the days from this date to today.",
+        )
+
+    def handle(self, *args, **options):
+        if options["since"]:
+            try:
+                since = parse_date(options["since"])
+            except ValueError:
+                # Well formed, but not a date of the calendar.
+                since = None
+            if since is None:
+                raise CommandError(f"Invalid date: {options['since']!r}.")
+            today = timezone.localdate()
+            aggregates.refresh_days(
+                since + timedelta(days=n) for n in range((today - since).days + 1)
+            )
+        else:
+            aggregates.rebuild()
+        # The cached dashboard fragments show the statistics of a version.
+        data_version.bump()
+        self.stdout.write(
+            f"{DailySkillStat.objects.count()} skill and "
+            f"{DailyLocationStat.objects.count()} location daily statistics."
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from freework.offers import duplicates
+from freework.offers.models import OfferSignature
+
+
+class Command(BaseCommand):
+    help = "Cluster every job offer with its near duplicates."
+
+    def handle(self, *args, **options):
+        duplicates.rebuild()
+        self.stdout.write(
+            f"{OfferSignature.objects.count()} offers signed, "
+            f"{duplicates.clusters().count()} clusters of reposted offers."
+        )
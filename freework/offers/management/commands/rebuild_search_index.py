@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from freework.offers import data_version, search
+from freework.offers.models import JobOffer
+
+
+class Command(BaseCommand):
+    help = "Index every job offer for full-text search."
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        # The cached offer lists of a search show the matches of a version.
+        data_version.bump()
+        self.stdout.write(f"{JobOffer.objects.count()} offers indexed.")
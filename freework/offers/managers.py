@@ -0,0 +1,114 @@
+from django.db import models
+from django.db.models import Q, Sum
+from django.db.models.functions import NullIf, TruncWeek
+
+# Sort of the dashboard offers by full-text search rank.
+RELEVANCE = "relevance"
+
+
+class JobOfferQuerySet(models.QuerySet):
+    def dashboard(
+        self,
+        q="",
+        published_since=None,
+        contract_type=None,
+        min_rate=None,
+        max_rate=None,
+        location=None,
+        skill=None,
+        sort="",
+    ):
+        """Return the published offers matching the dashboard filters, newest
+        first: the offers of the dashboard list and of its exports.
+
+        Every filter is optional; ``location`` and ``skill`` are primary keys.
+        ``q`` is a full-text search, see ``freework.offers.search``: with
+        ``sort="relevance"``, its matches are annotated with their ``rank``
+        and listed best first.
+        """
+        queryset = self.filter(published_at__isnull=False)
+        ranked = False
+        if q:
+            # The search module imports the models, which import this one.
+            from . import search
+
+            # Every match, filtered like the other filters.
+            if sort == RELEVANCE:
+                queryset = search.rank_offers(queryset, q)
+                ranked = True
+            else:
+                queryset = search.filter_offers(queryset, q)
+        if published_since is not None:
+            queryset = queryset.filter(published_at__gte=published_since)
+        if contract_type:
+            queryset = queryset.filter(contract_type=contract_type)
+        if min_rate is not None:
+            queryset = queryset.filter(daily_rate__gte=min_rate)
+        if max_rate is not None:
+            queryset = queryset.filter(daily_rate__lte=max_rate)
+        if location is not None:
+            queryset = queryset.filter(location=location)
+        if skill is not None:
+            queryset = queryset.filter(skills=skill)
+        if ranked:
+            return queryset.order_by("-rank", "-id")
+        return queryset.order_by("-published_at", "-id")
+
+    def after(self, published_at, pk):
+        """Keyset pagination: the offers after ``(published_at, pk)`` in the
+        dashboard order, without an ``OFFSET`` that reads the skipped rows.
+        """
+        # A range on the leading column of the (published_at, id) indexes,
+        # then the ties on published_at.
+        return self.filter(published_at__lte=published_at).exclude(
+            published_at=published_at, id__gte=pk
+        )
+
+    def ranked_after(self, rank, pk):
+        """Keyset pagination of the offers sorted by relevance: the offers
+        after ``(rank, pk)``.
+        """
+        return self.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=pk))
+
+
+def average_daily_rate():
+    # Summed totals over summed counts: exact, unlike an average of averages.
+    return Sum("daily_rate_total") * 1.0 / NullIf(Sum("rated_offer_count"), 0)
+
+
+class DailySkillStatQuerySet(models.QuerySet):
+    def skill_rates(self, since=None):
+        """Offer count and average daily rate per skill, most wanted first."""
+        queryset = self if since is None else self.filter(day__gte=since)
+        return (
+            queryset.values("skill__name")
+            .annotate(
+                offer_count=Sum("offer_count"),
+                average_daily_rate=average_daily_rate(),
+            )
+            .order_by("-offer_count", "skill__name")
+        )
+
+    def weekly_rates(self, since=None):
+        """Average daily rate and offer count per skill and per week."""
+        queryset = self if since is None else self.filter(day__gte=since)
+        return (
+            queryset.annotate(week=TruncWeek("day"))
+            .values("week", "skill__name")
+            .annotate(
+                offer_count=Sum("offer_count"),
+                average_daily_rate=average_daily_rate(),
+            )
+            .order_by("-week", "skill__name")
+        )
+
+
+class DailyLocationStatQuerySet(models.QuerySet):
+    def offer_counts(self, since=None):
+        """Number of offers per location, most active first."""
+        queryset = self if since is None else self.filter(day__gte=since)
+        return (
+            queryset.values("location__name")
+            .annotate(offer_count=Sum("offer_count"))
+            .order_by("-offer_count", "location__name")
+        )
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="JobOffer",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "external_id",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="external id"
+                    ),
+                ),
+                ("url", models.URLField(max_length=500, verbose_name="url")),
+                ("title", models.CharField(max_length=255, verbose_name="title")),
+                (
+                    "company",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="company"
+                    ),
+                ),
+                (
+                    "contract_type",
+                    models.CharField(
+                        blank=True, max_length=50, verbose_name="contract type"
+                    ),
+                ),
+                (
+                    "daily_rate",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="daily rate"
+                    ),
+                ),
+                (
+                    "location",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="location"
+                    ),
+                ),
+                (
+                    "description",
+                    models.TextField(blank=True, verbose_name="description"),
+                ),
+                (
+                    "published_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="published at"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+            ],
+            options={
+                "verbose_name": "job offer",
+                "verbose_name_plural": "job offers",
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("offers", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="joboffer",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="fingerprint"
+            ),
+        ),
+    ]
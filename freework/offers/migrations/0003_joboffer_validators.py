@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("offers", "0002_joboffer_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="joboffer",
+            name="etag",
+            field=models.CharField(blank=True, max_length=255, verbose_name="ETag"),
+        ),
+        migrations.AddField(
+            model_name="joboffer",
+            name="last_modified",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="Last-Modified"
+            ),
+        ),
+    ]
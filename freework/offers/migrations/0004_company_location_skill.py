@@ -0,0 +1,169 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_names_to_relations(apps, schema_editor):
+    Company = apps.get_model("offers", "Company")
+    Location = apps.get_model("offers", "Location")
+    JobOffer = apps.get_model("offers", "JobOffer")
+    for model, name_field, fk_field in (
+        (Company, "company_name", "company"),
+        (Location, "location_name", "location"),
+    ):
+        names = (
+            JobOffer.objects.exclude(**{name_field: ""})
+            .values_list(name_field, flat=True)
+            .distinct()
+        )
+        model.objects.bulk_create(
+            [model(name=name) for name in names], ignore_conflicts=True
+        )
+        for pk, name in model.objects.values_list("pk", "name"):
+            JobOffer.objects.filter(**{name_field: name}).update(
+                **{f"{fk_field}_id": pk}
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("offers", "0003_joboffer_validators"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Company",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=255, unique=True, verbose_name="name"),
+                ),
+            ],
+            options={
+                "verbose_name": "company",
+                "verbose_name_plural": "companies",
+            },
+        ),
+        migrations.CreateModel(
+            name="Location",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=255, unique=True, verbose_name="name"),
+                ),
+            ],
+            options={
+                "verbose_name": "location",
+                "verbose_name_plural": "locations",
+            },
+        ),
+        migrations.CreateModel(
+            name="Skill",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=100, unique=True, verbose_name="name"),
+                ),
+            ],
+            options={
+                "verbose_name": "skill",
+                "verbose_name_plural": "skills",
+            },
+        ),
+        # The free-text columns are kept until their values are moved to the
+        # new tables.
+        migrations.RenameField(
+            model_name="joboffer", old_name="company", new_name="company_name"
+        ),
+        migrations.RenameField(
+            model_name="joboffer", old_name="location", new_name="location_name"
+        ),
+        migrations.AddField(
+            model_name="joboffer",
+            name="company",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="offers",
+                to="offers.company",
+                verbose_name="company",
+            ),
+        ),
+        migrations.AddField(
+            model_name="joboffer",
+            name="location",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="offers",
+                to="offers.location",
+                verbose_name="location",
+            ),
+        ),
+        migrations.AddField(
+            model_name="joboffer",
+            name="skills",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="offers",
+                to="offers.skill",
+                verbose_name="skills",
+            ),
+        ),
+        migrations.RunPython(move_names_to_relations, migrations.RunPython.noop),
+        migrations.RemoveField(model_name="joboffer", name="company_name"),
+        migrations.RemoveField(model_name="joboffer", name="location_name"),
+        migrations.AddIndex(
+            model_name="joboffer",
+            index=models.Index(
+                fields=["published_at", "id"], name="offers_published_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="joboffer",
+            index=models.Index(
+                fields=["contract_type", "published_at", "id"],
+                name="offers_contract_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="joboffer",
+            index=models.Index(
+                fields=["location", "published_at", "id"],
+                name="offers_location_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="joboffer",
+            index=models.Index(fields=["daily_rate"], name="offers_daily_rate_idx"),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("offers", "0004_company_location_skill"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyLocationStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="day")),
+                (
+                    "offer_count",
+                    models.PositiveIntegerField(verbose_name="offer count"),
+                ),
+                (
+                    "location",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="offers.location",
+                        verbose_name="location",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "daily location statistic",
+                "verbose_name_plural": "daily location statistics",
+                "indexes": [
+                    models.Index(fields=["day"], name="offers_location_stat_day_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("location", "day"), name="offers_location_stat_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailySkillStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="day")),
+                (
+                    "offer_count",
+                    models.PositiveIntegerField(verbose_name="offer count"),
+                ),
+                (
+                    "rated_offer_count",
+                    models.PositiveIntegerField(verbose_name="rated offer count"),
+                ),
+                (
+                    "daily_rate_total",
+                    models.PositiveBigIntegerField(verbose_name="daily rate total"),
+                ),
+                (
+                    "skill",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="offers.skill",
+                        verbose_name="skill",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "daily skill statistic",
+                "verbose_name_plural": "daily skill statistics",
+                "indexes": [
+                    models.Index(fields=["day"], name="offers_skill_stat_day_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("skill", "day"), name="offers_skill_stat_unique"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# The search index lives outside the model state: an FTS5 table on SQLite and
+# a tsvector column on PostgreSQL, see freework.offers.search.
+SQLITE_CREATE = """
+CREATE VIRTUAL TABLE offers_joboffer_search USING fts5(
+    title, keywords, description, tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+SQLITE_DROP = "DROP TABLE IF EXISTS offers_joboffer_search"
+
+POSTGRESQL_CREATE = [
+    "ALTER TABLE offers_joboffer ADD COLUMN search_vector tsvector",
+    "CREATE INDEX offers_joboffer_search_idx ON offers_joboffer "
+    "USING gin (search_vector)",
+]
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS offers_joboffer_search_idx",
+    "ALTER TABLE offers_joboffer DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(SQLITE_CREATE)
+    elif vendor == "postgresql":
+        for sql in POSTGRESQL_CREATE:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(SQLITE_DROP)
+    elif vendor == "postgresql":
+        for sql in POSTGRESQL_DROP:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("offers", "0005_daily_stats"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("offers", "0007_data_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OfferSignature",
+            fields=[
+                (
+                    "offer",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="signature",
+                        serialize=False,
+                        to="offers.joboffer",
+                        verbose_name="offer",
+                    ),
+                ),
+                ("signature", models.BinaryField(verbose_name="signature")),
+                (
+                    "cluster",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cluster_members",
+                        to="offers.joboffer",
+                        verbose_name="cluster",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "offer signature",
+                "verbose_name_plural": "offer signatures",
+            },
+        ),
+        migrations.CreateModel(
+            name="OfferBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.BigIntegerField(verbose_name="bucket")),
+                (
+                    "offer",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="buckets",
+                        to="offers.joboffer",
+                        verbose_name="offer",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "offer bucket",
+                "verbose_name_plural": "offer buckets",
+                "indexes": [
+                    models.Index(fields=["bucket"], name="offers_bucket_idx"),
+                    models.Index(
+                        fields=["offer", "bucket"], name="offers_bucket_offer_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("offers", "0008_duplicates"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="offersignature",
+            name="cluster",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="cluster_members",
+                to="offers.joboffer",
+                verbose_name="cluster",
+            ),
+        ),
+    ]
@@ -0,0 +1,239 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .managers import (
+    DailyLocationStatQuerySet,
+    DailySkillStatQuerySet,
+    JobOfferQuerySet,
+)
+
+
+class Company(models.Model):
+    """Company, or agency, publishing job offers."""
+
+    name = models.CharField(_("name"), max_length=255, unique=True)
+
+    class Meta:
+        verbose_name = _("company")
+        verbose_name_plural = _("companies")
+
+    def __str__(self):
+        return self.name
+
+
+class Location(models.Model):
+    """Place of work of an offer, as written on free-work.com."""
+
+    name = models.CharField(_("name"), max_length=255, unique=True)
+
+    class Meta:
+        verbose_name = _("location")
+        verbose_name_plural = _("locations")
+
+    def __str__(self):
+        return self.name
+
+
+class Skill(models.Model):
+    """Technical skill required by job offers."""
+
+    name = models.CharField(_("name"), max_length=100, unique=True)
+
+    class Meta:
+        verbose_name = _("skill")
+        verbose_name_plural = _("skills")
+
+    def __str__(self):
+        return self.name
+
+
+class JobOffer(models.Model):
+    """Job offer scraped from free-work.com."""
+
+    external_id = models.CharField(_("external id"), max_length=255, unique=True)
+    url = models.URLField(_("url"), max_length=500)
+    title = models.CharField(_("title"), max_length=255)
+    company = models.ForeignKey(
+        Company,
+        verbose_name=_("company"),
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="offers",
+    )
+    contract_type = models.CharField(_("contract type"), max_length=50, blank=True)
+    daily_rate = models.PositiveIntegerField(_("daily rate"), null=True, blank=True)
+    location = models.ForeignKey(
+        Location,
+        verbose_name=_("location"),
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="offers",
+        # Covered by the (location, published_at) index below.
+        db_index=False,
+    )
+    skills = models.ManyToManyField(
+        Skill, verbose_name=_("skills"), blank=True, related_name="offers"
+    )
+    description = models.TextField(_("description"), blank=True)
+    published_at = models.DateTimeField(_("published at"), null=True, blank=True)
+    fingerprint = models.CharField(_("fingerprint"), max_length=64, blank=True)
+    # HTTP validators of the detail page, sent back on the next crawl as
+    # If-None-Match / If-Modified-Since.
+    etag = models.CharField(_("ETag"), max_length=255, blank=True)
+    last_modified = models.CharField(_("Last-Modified"), max_length=64, blank=True)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    objects = JobOfferQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("job offer")
+        verbose_name_plural = _("job offers")
+        # The dashboard always lists the most recent offers first, optionally
+        # filtered on one of these columns: each index starts with the filter
+        # and ends with the sort key so that no query needs to sort all rows.
+        indexes = [
+            models.Index(fields=["published_at", "id"], name="offers_published_idx"),
+            models.Index(
+                fields=["contract_type", "published_at", "id"],
+                name="offers_contract_idx",
+            ),
+            models.Index(
+                fields=["location", "published_at", "id"],
+                name="offers_location_idx",
+            ),
+            models.Index(fields=["daily_rate"], name="offers_daily_rate_idx"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class DailySkillStat(models.Model):
+    """Offers published per skill and per day, precomputed for the dashboard.
+
+    The daily rate is stored as a total and a count of rated offers so that
+    averages over any period can be derived from the daily rows.
+    """
+
+    day = models.DateField(_("day"))
+    skill = models.ForeignKey(
+        Skill,
+        verbose_name=_("skill"),
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+    )
+    offer_count = models.PositiveIntegerField(_("offer count"))
+    rated_offer_count = models.PositiveIntegerField(_("rated offer count"))
+    daily_rate_total = models.PositiveBigIntegerField(_("daily rate total"))
+
+    objects = DailySkillStatQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("daily skill statistic")
+        verbose_name_plural = _("daily skill statistics")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["skill", "day"], name="offers_skill_stat_unique"
+            ),
+        ]
+        indexes = [models.Index(fields=["day"], name="offers_skill_stat_day_idx")]
+
+
+class DailyLocationStat(models.Model):
+    """Offers published per location and per day, precomputed for the dashboard."""
+
+    day = models.DateField(_("day"))
+    location = models.ForeignKey(
+        Location,
+        verbose_name=_("location"),
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+    )
+    offer_count = models.PositiveIntegerField(_("offer count"))
+
+    objects = DailyLocationStatQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("daily location statistic")
+        verbose_name_plural = _("daily location statistics")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["location", "day"], name="offers_location_stat_unique"
+            ),
+        ]
+        indexes = [models.Index(fields=["day"], name="offers_location_stat_day_idx")]
+
+
+class DataVersion(models.Model):
+    """Version of the scraped data, bumped by every crawl that wrote offers.
+
+    A single row, see ``freework.offers.data_version``.
+    """
+
+    version = models.PositiveBigIntegerField(_("version"), default=0)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("data version")
+        verbose_name_plural = _("data versions")
+
+    def __str__(self):
+        return str(self.version)
+
+
+class OfferSignature(models.Model):
+    """MinHash signature of an offer and the cluster of its near duplicates.
+
+    ``cluster`` is the first offer of the cluster seen by the detector (itself
+    for an offer without duplicates), see ``freework.offers.duplicates``. It
+    is null once that offer is deleted: the offer then stands for its own
+    cluster until it is indexed again.
+    """
+
+    offer = models.OneToOneField(
+        JobOffer,
+        verbose_name=_("offer"),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="signature",
+    )
+    signature = models.BinaryField(_("signature"))
+    cluster = models.ForeignKey(
+        JobOffer,
+        verbose_name=_("cluster"),
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="cluster_members",
+    )
+
+    class Meta:
+        verbose_name = _("offer signature")
+        verbose_name_plural = _("offer signatures")
+
+
+class OfferBucket(models.Model):
+    """LSH bucket of an offer: the hash of one band of its signature.
+
+    Offers sharing a bucket are the candidate duplicates of each other.
+    """
+
+    offer = models.ForeignKey(
+        JobOffer,
+        verbose_name=_("offer"),
+        on_delete=models.CASCADE,
+        related_name="buckets",
+        # Covered by the (offer, bucket) index below.
+        db_index=False,
+    )
+    bucket = models.BigIntegerField(_("bucket"))
+
+    class Meta:
+        verbose_name = _("offer bucket")
+        verbose_name_plural = _("offer buckets")
+        indexes = [
+            models.Index(fields=["bucket"], name="offers_bucket_idx"),
+            models.Index(fields=["offer", "bucket"], name="offers_bucket_offer_idx"),
+        ]
@@ -0,0 +1,308 @@
+"""
+Full-text search over the job offers.
+
+``icontains`` on titles and descriptions scans the whole table on every
+search. Offers are instead indexed when the pipeline writes them, by a
+backend chosen from the database vendor:
+
+- ``SqliteSearchBackend`` keeps an FTS5 table ranked with BM25. SQLite has
+  no French stemmer, so words are stripped of their accents and stemmed in
+  Python, the same way when indexing and when searching;
+- ``PostgresSearchBackend`` keeps a ``tsvector`` column with a GIN index,
+  built and queried with the ``french`` text search configuration;
+- ``ContainsSearchBackend``, on the other databases (MySQL...), indexes
+  nothing and falls back to ``icontains``.
+
+Titles weigh more than the company, location and skills ("keywords"), which
+weigh more than the description in the rank of the matches: the dashboard
+lists them newest first, or best first when sorted by relevance. The index is
+created by the migrations and ``manage.py rebuild_search_index`` fills it for
+offers written before.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Company, JobOffer, Location, Skill
+
+WORD_RE = re.compile(r"\w+")
+
+
+# The vocabulary of the offers is small: most words are stemmed only once.
+@lru_cache(maxsize=65536)
+def french_stem(word):
+    """Strip the French plural and feminine endings from a folded word.
+
+    A port of Lucene's ``FrenchMinimalStemmer``: it only conflates inflected
+    forms ("developpeur" and "developpeurs", "donnee" and "donnees" share a
+    stem) but rarely merges unrelated words.
+    """
+    if len(word) < 6:
+        return word
+    if word.endswith("x"):
+        if word.endswith("aux"):
+            return word[:-2] + "l"
+        return word[:-1]
+    for ending in "sre":
+        if word.endswith(ending):
+            word = word[:-1]
+    if word[-1] == word[-2] and word[-1].isalpha():
+        word = word[:-1]
+    return word
+
+
+def fold(text):
+    """Lowercase ``text`` and strip its accents."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stemmed_words(text):
+    return [french_stem(word) for word in WORD_RE.findall(fold(text))]
+
+
+def stemmed(text):
+    return " ".join(stemmed_words(text or ""))
+
+
+class SearchBackend:
+    """Interface of the search backends, bound to one database connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def index(self, offer_ids):
+        """Index (again) the offers with these primary keys."""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Index every offer."""
+        raise NotImplementedError
+
+    def filter(self, queryset, query):
+        """Return the offers of ``queryset`` matching ``query``, all of them,
+        in the order of ``queryset``.
+        """
+        raise NotImplementedError
+
+    def rank(self, queryset, query):
+        """Return ``filter(queryset, query)`` with a ``rank`` annotation:
+        how well each offer matches, higher is better.
+        """
+        raise NotImplementedError
+
+
+class SqliteSearchBackend(SearchBackend):
+    table = "offers_joboffer_search"
+    # bm25() weights of the title, keywords and description columns.
+    weights = (10.0, 4.0, 1.0)
+    chunk_size = 1000
+
+    def index(self, offer_ids):
+        offer_ids = list(offer_ids)
+        for start in range(0, len(offer_ids), self.chunk_size):
+            self.index_chunk(offer_ids[start : start + self.chunk_size])
+
+    def index_chunk(self, offer_ids):
+        skills = {}
+        using = self.connection.alias
+        for offer_id, name in (
+            JobOffer.skills.through.objects.using(using)
+            .filter(joboffer_id__in=offer_ids)
+            .values_list("joboffer_id", "skill__name")
+        ):
+            skills.setdefault(offer_id, []).append(name)
+        rows = [
+            (
+                offer_id,
+                stemmed(title),
+                stemmed(
+                    " ".join([company or "", location or "", *skills.get(offer_id, [])])
+                ),
+                stemmed(description),
+            )
+            for offer_id, title, company, location, description in (
+                JobOffer.objects.using(using)
+                .filter(pk__in=offer_ids)
+                .values_list(
+                    "pk", "title", "company__name", "location__name", "description"
+                )
+            )
+        ]
+        placeholders = ", ".join(["%s"] * len(offer_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})",
+                offer_ids,
+            )
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, title, keywords, description) "
+                "VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        self.index(
+            JobOffer.objects.using(self.connection.alias)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    @staticmethod
+    def match(query):
+        # Every word must match; quoted so that words like "OR" or "NEAR"
+        # are not read as FTS5 operators.
+        return " ".join(f'"{word}"' for word in stemmed_words(query))
+
+    def filter(self, queryset, query):
+        match = self.match(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s",
+                [match],
+            )
+        )
+
+    def rank(self, queryset, query):
+        match = self.match(query)
+        if not match:
+            return queryset.none().annotate(rank=Value(0.0, FloatField()))
+        weights = ", ".join(str(weight) for weight in self.weights)
+        # bm25() only works in the query matching the full-text table: the
+        # table is joined, rather than queried once per offer by a subquery.
+        # It is outside the model state, hence extra().
+        return queryset.extra(
+            tables=[self.table],
+            where=[
+                f"{self.table} MATCH %s",
+                f"{self.table}.rowid = {JobOffer._meta.db_table}.id",
+            ],
+            params=[match],
+        ).annotate(rank=RawSQL(f"-bm25({self.table}, {weights})", [], FloatField()))
+
+
+class PostgresSearchBackend(SearchBackend):
+    config = "french"
+
+    def update_sql(self):
+        offers = JobOffer._meta.db_table
+        offer_skills = JobOffer.skills.through._meta.db_table
+        return f"""
+            UPDATE {offers} AS offer SET search_vector =
+                setweight(to_tsvector(%(config)s::regconfig, offer.title), 'A')
+                || setweight(to_tsvector(%(config)s::regconfig, concat_ws(' ',
+                    (SELECT name FROM {Company._meta.db_table}
+                     WHERE id = offer.company_id),
+                    (SELECT name FROM {Location._meta.db_table}
+                     WHERE id = offer.location_id),
+                    (SELECT string_agg(skill.name, ' ')
+                     FROM {offer_skills} AS offer_skill
+                     JOIN {Skill._meta.db_table} AS skill
+                       ON skill.id = offer_skill.skill_id
+                     WHERE offer_skill.joboffer_id = offer.id)
+                )), 'B')
+                || setweight(
+                    to_tsvector(%(config)s::regconfig, offer.description), 'C'
+                )
+        """
+
+    def index(self, offer_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                self.update_sql() + " WHERE offer.id = ANY(%(ids)s)",
+                {"config": self.config, "ids": list(offer_ids)},
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.update_sql(), {"config": self.config})
+
+    def filter(self, queryset, query):
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT id FROM {JobOffer._meta.db_table} "
+                "WHERE search_vector @@ websearch_to_tsquery(%s::regconfig, %s)",
+                [self.config, query],
+            )
+        )
+
+    def rank(self, queryset, query):
+        return self.filter(queryset, query).annotate(
+            rank=RawSQL(
+                f"ts_rank({JobOffer._meta.db_table}.search_vector, "
+                "websearch_to_tsquery(%s::regconfig, %s))",
+                [self.config, query],
+                output_field=FloatField(),
+            )
+        )
+
+
+class ContainsSearchBackend(SearchBackend):
+    """Fallback without a search index: every word of the query must be in
+    the title or the description, found by scanning the whole table.
+    """
+
+    def index(self, offer_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def filter(self, queryset, query):
+        words = WORD_RE.findall(query)
+        if not words:
+            return queryset.none()
+        for word in words:
+            queryset = queryset.filter(
+                Q(title__icontains=word) | Q(description__icontains=word)
+            )
+        return queryset
+
+    def rank(self, queryset, query):
+        # Every match ranks the same.
+        return self.filter(queryset, query).annotate(
+            rank=Value(0.0, output_field=FloatField())
+        )
+
+
+BACKENDS = {
+    "sqlite": SqliteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_backend(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    return BACKENDS.get(connection.vendor, ContainsSearchBackend)(connection)
+
+
+def index(offer_ids, using=DEFAULT_DB_ALIAS):
+    """Index (again) the offers with these primary keys."""
+    get_backend(using).index(offer_ids)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """Index every offer."""
+    with transaction.atomic(using=using):
+        get_backend(using).rebuild()
+
+
+def filter_offers(queryset, query):
+    """Return the offers of ``queryset`` matching ``query``, without limit."""
+    return get_backend(queryset.db).filter(queryset, query)
+
+
+def rank_offers(queryset, query):
+    """Return the offers of ``queryset`` matching ``query``, without limit,
+    with a ``rank`` annotation: higher is better.
+    """
+    return get_backend(queryset.db).rank(queryset, query)
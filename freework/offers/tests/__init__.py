@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+
+from freework.offers.models import Company, JobOffer, Location, Skill
+
+
+def create_offers(count, skills_per_offer=2):
+    """Create ``count`` offers published a minute apart, newest last."""
+    companies = Company.objects.bulk_create(
+        [Company(name=f"Company {i}") for i in range(3)]
+    )
+    locations = Location.objects.bulk_create(
+        [Location(name=f"City {i}") for i in range(3)]
+    )
+    skills = Skill.objects.bulk_create([Skill(name=f"Skill {i}") for i in range(5)])
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    offers = JobOffer.objects.bulk_create(
+        [
+            JobOffer(
+                external_id=f"offer-{i}",
+                url=f"https://www.free-work.com/fr/tech-it/job-mission/{i}",
+                title=f"Offer {i}",
+                company=companies[i % len(companies)],
+                contract_type="Freelance",
+                daily_rate=400 + i,
+                location=locations[i % len(locations)],
+                published_at=start + timedelta(minutes=i),
+            )
+            for i in range(count)
+        ]
+    )
+    JobOffer.skills.through.objects.bulk_create(
+        [
+            JobOffer.skills.through(joboffer_id=offer.pk, skill_id=skill.pk)
+            for i, offer in enumerate(offers)
+            for skill in skills[i % 3 : i % 3 + skills_per_offer]
+        ]
+    )
+    return offers
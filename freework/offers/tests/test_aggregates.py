@@ -0,0 +1,138 @@
+from datetime import date, datetime, timedelta, timezone
+
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+
+from freework.offers import aggregates
+from freework.offers.models import DailyLocationStat, DailySkillStat, JobOffer
+
+from . import create_offers
+
+
+def skill_stats(day):
+    return {
+        row["skill__name"]: (
+            row["offer_count"],
+            row["rated_offer_count"],
+            row["daily_rate_total"],
+        )
+        for row in DailySkillStat.objects.filter(day=day).values(
+            "skill__name", "offer_count", "rated_offer_count", "daily_rate_total"
+        )
+    }
+
+
+def location_stats(day):
+    return dict(
+        DailyLocationStat.objects.filter(day=day).values_list(
+            "location__name", "offer_count"
+        )
+    )
+
+
+class AggregatesTests(TestCase):
+    def setUp(self):
+        # Offers 0-5 on January 1, 6-8 on January 2.
+        self.offers = create_offers(9)
+        JobOffer.objects.filter(pk__in=[offer.pk for offer in self.offers[6:]]).update(
+            published_at=datetime(2024, 1, 2, 12, tzinfo=timezone.utc)
+        )
+        JobOffer.objects.filter(pk=self.offers[5].pk).update(daily_rate=None)
+
+    def test_rebuild(self):
+        aggregates.rebuild()
+
+        # Skills 0-1, 1-2, 2-3, ... rates 400 + i, offer 5 without a rate.
+        self.assertEqual(
+            skill_stats(date(2024, 1, 1)),
+            {
+                "Skill 0": (2, 2, 400 + 403),
+                "Skill 1": (4, 4, 400 + 401 + 403 + 404),
+                "Skill 2": (4, 3, 401 + 402 + 404),
+                "Skill 3": (2, 1, 402),
+            },
+        )
+        self.assertEqual(
+            location_stats(date(2024, 1, 1)),
+            {"City 0": 2, "City 1": 2, "City 2": 2},
+        )
+        self.assertEqual(
+            location_stats(date(2024, 1, 2)),
+            {"City 0": 1, "City 1": 1, "City 2": 1},
+        )
+        # Every skill of every offer is counted once.
+        self.assertEqual(
+            DailySkillStat.objects.aggregate(total=Sum("offer_count"))["total"],
+            JobOffer.skills.through.objects.count(),
+        )
+
+    def test_refresh_days_recomputes_only_those_days(self):
+        aggregates.rebuild()
+        second_day = skill_stats(date(2024, 1, 2))
+        JobOffer.objects.update(daily_rate=1000)
+
+        aggregates.refresh_days([date(2024, 1, 1)])
+
+        self.assertEqual(
+            skill_stats(date(2024, 1, 1)),
+            {
+                "Skill 0": (2, 2, 2000),
+                "Skill 1": (4, 4, 4000),
+                "Skill 2": (4, 4, 4000),
+                "Skill 3": (2, 2, 2000),
+            },
+        )
+        self.assertEqual(skill_stats(date(2024, 1, 2)), second_day)
+
+    def test_refresh_days_matches_a_rebuild(self):
+        aggregates.rebuild()
+        # Offer 0 moves to January 3, offer 6 is deleted.
+        JobOffer.objects.filter(pk=self.offers[0].pk).update(
+            published_at=datetime(2024, 1, 3, tzinfo=timezone.utc)
+        )
+        JobOffer.objects.filter(pk=self.offers[6].pk).delete()
+
+        aggregates.refresh_days([date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)])
+        refreshed = [skill_stats(date(2024, 1, day)) for day in (1, 2, 3)]
+        aggregates.rebuild()
+
+        self.assertEqual(
+            refreshed,
+            [skill_stats(date(2024, 1, day)) for day in (1, 2, 3)],
+        )
+        self.assertEqual(
+            skill_stats(date(2024, 1, 3)),
+            {"Skill 0": (1, 1, 400), "Skill 1": (1, 1, 400)},
+        )
+
+    def test_unpublished_offers_are_not_counted(self):
+        JobOffer.objects.filter(pk=self.offers[0].pk).update(published_at=None)
+
+        aggregates.rebuild()
+
+        self.assertEqual(skill_stats(date(2024, 1, 1))["Skill 0"], (1, 1, 403))
+
+    @override_settings(TIME_ZONE="Europe/Paris")
+    def test_days_are_local(self):
+        # January 2 in Paris.
+        published_at = datetime(2024, 1, 1, 23, 30, tzinfo=timezone.utc)
+        JobOffer.objects.filter(pk=self.offers[0].pk).update(published_at=published_at)
+        day = aggregates.publication_day(published_at)
+
+        aggregates.refresh_days([day])
+
+        self.assertEqual(day, date(2024, 1, 2))
+        self.assertEqual(location_stats(day), {"City 0": 2, "City 1": 1, "City 2": 1})
+
+    def test_day_ranges_merge_consecutive_days(self):
+        ranges = aggregates.day_ranges(
+            [date(2024, 1, 3), date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 5)]
+        )
+
+        self.assertEqual(
+            [(start.date(), end - start) for start, end in ranges],
+            [
+                (date(2024, 1, 1), timedelta(days=3)),
+                (date(2024, 1, 5), timedelta(days=1)),
+            ],
+        )
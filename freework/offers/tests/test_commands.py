@@ -0,0 +1,143 @@
+import io
+import json
+import os
+import pstats
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import LISTING_PATH, build_site
+from freework.offers import data_version
+from freework.offers.models import DailySkillStat, JobOffer
+
+from . import create_offers
+
+
+class CrawlFreeworkTests(TransactionTestCase):
+    def test_fails_when_offers_could_not_be_written(self):
+        stats = {"freework/offers_written": 10, "freework/offers_failed": 5}
+        with (
+            mock.patch(
+                "freework.offers.management.commands.crawl_freework.run_crawl",
+                return_value=stats,
+            ),
+            self.assertRaisesMessage(CommandError, "5 offers could not be written"),
+        ):
+            call_command("crawl_freework")
+
+    def test_sharded_crawl_writes_every_offer(self):
+        with (
+            FixtureServer(build_site(300, per_page=20)) as server,
+            # The shards are spawned processes: they find the test database
+            # through the environment.
+            mock.patch.dict(
+                os.environ,
+                {
+                    "DJANGO_DATABASE_URL": f"sqlite:///{connection.settings_dict['NAME']}"
+                },
+            ),
+        ):
+            start_url = server.url + LISTING_PATH
+            call_command(
+                "crawl_freework",
+                f"--start-url={start_url}",
+                # The first page is crawled by both shards.
+                f"--seed={start_url}?page=1",
+                "--pages=1-15",
+                "--shards=2",
+                # Small batches, for the shards to compete for the write lock.
+                "--batch-size=10",
+                "--set=ROBOTSTXT_OBEY=False",
+                "--set=LOG_LEVEL=WARNING",
+                "--set=TELNETCONSOLE_ENABLED=False",
+                f"--set=FREEWORK_FRONTIER_DIR={tempfile.mkdtemp()}",
+            )
+
+        self.assertEqual(JobOffer.objects.count(), 300)
+
+
+class CrawlProfileTests(TransactionTestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = tmpdir.name
+
+    def crawl(self, *options):
+        """Crawl 20 offers in 2 shards, which write their profiles."""
+        with (
+            FixtureServer(build_site(20, per_page=10)) as server,
+            mock.patch.dict(
+                os.environ,
+                {
+                    "DJANGO_DATABASE_URL": f"sqlite:///{connection.settings_dict['NAME']}",
+                    "DJANGO_MEDIA_ROOT": self.directory,
+                },
+            ),
+        ):
+            stdout = io.StringIO()
+            call_command(
+                "crawl_freework",
+                f"--start-url={server.url + LISTING_PATH}",
+                "--pages=1-2",
+                "--shards=2",
+                "--set=ROBOTSTXT_OBEY=False",
+                "--set=LOG_LEVEL=WARNING",
+                "--set=TELNETCONSOLE_ENABLED=False",
+                f"--set=FREEWORK_FRONTIER_DIR={self.directory}",
+                *options,
+                stdout=stdout,
+            )
+        self.assertEqual(JobOffer.objects.count(), 20)
+        return stdout.getvalue()
+
+    def test_profile(self):
+        path = os.path.join(self.directory, "crawl.prof")
+
+        output = self.crawl(f"--profile={path}")
+
+        self.assertIn(f"Profile written to {path}", output)
+        for shard in (0, 1):
+            stats = pstats.Stats(f"{path}.{shard}")
+            self.assertIn("parse_offer", {function for _, _, function in stats.stats})
+
+    def test_sample_profile(self):
+        self.crawl("--sample-profile")
+
+        directory = os.path.join(self.directory, "profiles")
+        speedscope = sorted(
+            name for name in os.listdir(directory) if name.endswith(".speedscope.json")
+        )
+        # One per shard, with its collapsed stacks.
+        self.assertEqual(len(speedscope), 2)
+        self.assertEqual(len(os.listdir(directory)), 4)
+        with open(os.path.join(directory, speedscope[0])) as file:
+            profile = json.load(file)
+        self.assertTrue(profile["profiles"][0]["samples"])
+
+
+class RebuildAggregatesTests(TestCase):
+    def setUp(self):
+        # The data version of the previous tests.
+        cache.clear()
+
+    def test_rebuild_refreshes_the_dashboard(self):
+        create_offers(3)
+        version = data_version.current()
+
+        call_command("rebuild_aggregates", stdout=io.StringIO())
+
+        self.assertTrue(DailySkillStat.objects.exists())
+        self.assertGreater(data_version.current(), version)
+
+    def test_invalid_dates_are_rejected(self):
+        for since in ("yesterday", "2024-02-30"):
+            with (
+                self.subTest(since=since),
+                self.assertRaisesMessage(CommandError, f"Invalid date: {since!r}."),
+            ):
+                call_command("rebuild_aggregates", f"--since={since}")
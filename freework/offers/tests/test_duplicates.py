@@ -0,0 +1,120 @@
+import random
+from unittest import mock
+
+from django.test import TestCase
+
+from freework.offers import duplicates
+from freework.offers.models import JobOffer, OfferBucket, OfferSignature
+
+WORDS = [f"mot{i}" for i in range(2000)]
+
+
+def text(rng, length=80):
+    return " ".join(rng.choices(WORDS, k=length))
+
+
+def repost(rng, description, changes=2):
+    words = description.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def create(descriptions):
+    offers = JobOffer.objects.bulk_create(
+        [
+            JobOffer(
+                external_id=f"offer-{i}",
+                url=f"https://www.free-work.com/fr/tech-it/job-mission/{i}",
+                title="Mission",
+                description=description,
+            )
+            for i, description in enumerate(descriptions)
+        ]
+    )
+    return [offer.pk for offer in offers]
+
+
+def clusters(offer_ids):
+    found = dict(
+        OfferSignature.objects.filter(offer__in=offer_ids).values_list(
+            "offer", "cluster"
+        )
+    )
+    return [found.get(offer_id) for offer_id in offer_ids]
+
+
+class DuplicatesTests(TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+
+    def test_reposts_share_the_cluster_of_their_original(self):
+        original = text(self.rng)
+        ids = create([original, repost(self.rng, original), repost(self.rng, original)])
+
+        duplicates.index(ids)
+
+        self.assertEqual(clusters(ids), [ids[0]] * 3)
+
+    def test_distinct_offers_have_their_own_cluster(self):
+        ids = create([text(self.rng) for _ in range(5)])
+
+        duplicates.index(ids)
+
+        self.assertEqual(clusters(ids), ids)
+        self.assertFalse(duplicates.clusters().exists())
+
+    def test_indexing_again_keeps_the_clusters(self):
+        originals = [text(self.rng) for _ in range(3)]
+        ids = create(originals + [repost(self.rng, t) for t in originals])
+        duplicates.index(ids)
+        found = clusters(ids)
+        bucket_count = OfferBucket.objects.count()
+
+        duplicates.index(ids)
+        duplicates.index(ids[3:])
+
+        self.assertEqual(clusters(ids), found)
+        self.assertEqual(found, ids[:3] * 2)
+        self.assertEqual(OfferBucket.objects.count(), bucket_count)
+        self.assertEqual(
+            list(duplicates.clusters().values_list("cluster", "size")),
+            [(ids[2], 2), (ids[1], 2), (ids[0], 2)],
+        )
+
+    def test_boilerplate_does_not_multiply_the_comparisons(self):
+        # Distinct offers sharing a long footer share LSH buckets too.
+        footer = text(self.rng, length=60)
+        descriptions = [f"{text(self.rng, length=30)} {footer}" for _ in range(300)]
+        ids = create(descriptions + [repost(self.rng, descriptions[0])])
+
+        with mock.patch.object(
+            duplicates, "similarity", wraps=duplicates.similarity
+        ) as similarity:
+            duplicates.index(ids)
+
+        self.assertLessEqual(
+            similarity.call_count, len(ids) * duplicates.MAX_CANDIDATES
+        )
+        self.assertEqual(clusters(ids[-1:]), [ids[0]])
+        self.assertEqual(len(set(clusters(ids[:-1]))), len(ids) - 1)
+
+    def test_deleting_the_first_offer_of_a_cluster_keeps_the_others(self):
+        original = text(self.rng)
+        ids = create([original] + [repost(self.rng, original) for _ in range(3)])
+        duplicates.index(ids[:3])
+
+        JobOffer.objects.filter(pk=ids[0]).delete()
+        # A new repost reaches the buckets of the cluster.
+        duplicates.index(ids[3:])
+
+        self.assertEqual(clusters(ids), [None, None, None, ids[1]])
+        self.assertFalse(duplicates.clusters().exists())
+
+        duplicates.index(ids[1:3])
+
+        self.assertEqual(clusters(ids[1:]), [ids[1]] * 3)
+        self.assertEqual(
+            list(duplicates.clusters().values_list("cluster", "size")),
+            [(ids[1], 3)],
+        )
@@ -0,0 +1,117 @@
+import csv
+import io
+import re
+import sys
+import warnings
+from functools import partial
+from unittest import mock, skipUnless
+
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from freework.offers import export, search
+from freework.offers.models import JobOffer
+
+from . import create_offers
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class ExportViewTests(TransactionTestCase):
+    def setUp(self):
+        create_offers(25)
+        # Chunks of 10 offers: 3 chunks, then the end of the file.
+        patcher = mock.patch.object(
+            export, "export", partial(export.export, chunk_size=10)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_streams_the_chunks_under_asgi(self):
+        with warnings.catch_warnings():
+            # Raised when Django reads a synchronous iterator into memory.
+            warnings.simplefilter("error")
+            response = await self.async_client.get(reverse("export", args=["csv"]))
+            self.assertTrue(response.is_async)
+            parts = [part async for part in response.streaming_content]
+
+        self.assertEqual([len(part.splitlines()) for part in parts], [11, 10, 5, 0])
+        rows = list(csv.DictReader(io.StringIO(b"".join(parts).decode())))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[0]["title"], "Offer 24")
+
+    def test_streams_the_chunks_under_wsgi(self):
+        response = self.client.get(reverse("export", args=["csv"]))
+
+        self.assertFalse(response.is_async)
+        parts = list(response.streaming_content)
+        self.assertEqual([len(part.splitlines()) for part in parts], [11, 10, 5, 0])
+
+    def test_exports_the_listed_offers(self):
+        # Not on the dashboard until it is published.
+        JobOffer.objects.create(
+            external_id="draft",
+            url="https://www.free-work.com/fr/tech-it/job-mission/draft",
+            title="Offer draft",
+            daily_rate=450,
+        )
+        search.rebuild()
+        filters = {"min_rate": 410, "q": "offer"}
+        page = self.client.get("/", filters, headers={"HX-Request": "true"})
+        listed = re.findall(r">(Offer \d+)</a>", page.content.decode())
+
+        response = self.client.get(reverse("export", args=["csv"]), filters)
+
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual([row["title"] for row in rows], listed)
+        self.assertEqual(len(listed), 15)
+
+    @skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet_export(self):
+        response = self.client.get(reverse("export", args=["parquet"]))
+
+        self.assertEqual(response["Content-Type"], "application/vnd.apache.parquet")
+        content = b"".join(response.streaming_content)
+        parquet_file = pyarrow.parquet.ParquetFile(io.BytesIO(content))
+        # One row group per chunk.
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        table = parquet_file.read()
+        self.assertEqual(table.num_rows, 25)
+        self.assertEqual(table.column("title")[0].as_py(), "Offer 24")
+        self.assertEqual(table.column("skills")[0].as_py(), ["Skill 0", "Skill 1"])
+
+    @skipUnless(pyarrow, "pyarrow is not installed")
+    def test_arrow_export(self):
+        response = self.client.get(reverse("export", args=["arrow"]))
+
+        self.assertEqual(
+            response["Content-Type"], "application/vnd.apache.arrow.stream"
+        )
+        content = b"".join(response.streaming_content)
+        batches = list(pyarrow.ipc.open_stream(content))
+        # One record batch per chunk.
+        self.assertEqual([batch.num_rows for batch in batches], [10, 10, 5])
+        self.assertEqual(batches[0].column("title")[0].as_py(), "Offer 24")
+
+    def test_columnar_formats_are_not_found_without_pyarrow(self):
+        # An import of pyarrow raises ImportError.
+        with (
+            mock.patch.dict(sys.modules, {"pyarrow": None}),
+            self.assertLogs("django.request", "WARNING"),
+        ):
+            response = self.client.get(reverse("export", args=["parquet"]))
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_dashboard_offers_the_available_formats(self):
+        with mock.patch.dict(sys.modules, {"pyarrow": None}):
+            response = await self.async_client.get("/")
+            content = b"".join([chunk async for chunk in response.streaming_content])
+
+        self.assertIn(reverse("export", args=["csv"]).encode(), content)
+        self.assertNotIn(reverse("export", args=["parquet"]).encode(), content)
@@ -0,0 +1,220 @@
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from freework.offers import data_version, imports, search
+from freework.offers.models import DailySkillStat, JobOffer
+
+
+def record(index, **fields):
+    return {
+        "external_id": f"offer-{index}",
+        "url": f"https://www.free-work.com/fr/tech-it/job-mission/{index}",
+        "title": f"Offre {index}",
+        "company": "Société",
+        "contract_type": "Freelance",
+        "daily_rate": 500,
+        "location": "Paris",
+        "skills": ["Python", "Django"],
+        "description": "Mission de développement.",
+        "published_at": "2024-01-01T10:00:00+00:00",
+        **fields,
+    }
+
+
+class ImportOffersTests(TestCase):
+    def setUp(self):
+        # The data version of the previous tests.
+        cache.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_jsonl(self, name, records):
+        path = Path(self.tmpdir.name, name)
+        lines = "".join(
+            (line if isinstance(line, str) else json.dumps(line)) + "\n"
+            for line in records
+        )
+        if name.endswith(".gz"):
+            with gzip.open(path, "wt", encoding="utf-8") as file:
+                file.write(lines)
+        else:
+            path.write_text(lines, encoding="utf-8")
+        return path
+
+    def write_csv(self, name, records):
+        path = Path(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(records[0]))
+            writer.writeheader()
+            for row in records:
+                writer.writerow(
+                    {**row, "skills": imports.SKILL_SEPARATOR.join(row["skills"])}
+                )
+        return path
+
+    def test_jsonl_import(self):
+        path = self.write_jsonl(
+            "offers.jl.gz",
+            [
+                record(0),
+                record(1, daily_rate="", published_at=None, skills=[]),
+                # The last record of an offer wins.
+                record(0, title="Offre  mise à jour", skills=["Python", "Python"]),
+            ],
+        )
+
+        stats = imports.import_offers([path], chunk_size=2)
+
+        self.assertEqual((stats.read, stats.written, stats.invalid), (3, 3, 0))
+        offer = JobOffer.objects.get(external_id="offer-0")
+        self.assertEqual(offer.title, "Offre mise à jour")
+        self.assertEqual(offer.company.name, "Société")
+        self.assertEqual(offer.location.name, "Paris")
+        self.assertEqual(offer.daily_rate, 500)
+        self.assertEqual(
+            offer.published_at, datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+        )
+        self.assertEqual([skill.name for skill in offer.skills.all()], ["Python"])
+        self.assertNotEqual(offer.fingerprint, "")
+        other = JobOffer.objects.get(external_id="offer-1")
+        self.assertIsNone(other.daily_rate)
+        self.assertIsNone(other.published_at)
+        self.assertFalse(other.skills.exists())
+        # Indexed for search.
+        self.assertEqual(list(search.filter_offers(JobOffer.objects, "jour")), [offer])
+
+    def test_csv_import(self):
+        path = self.write_csv("offers.csv", [record(0), record(1, daily_rate="650")])
+
+        stats = imports.import_offers([path])
+
+        self.assertEqual((stats.read, stats.written), (2, 2))
+        offer = JobOffer.objects.get(external_id="offer-1")
+        self.assertEqual(offer.daily_rate, 650)
+        self.assertEqual(
+            sorted(offer.skills.values_list("name", flat=True)), ["Django", "Python"]
+        )
+
+    def test_invalid_records_are_counted_and_reported(self):
+        path = self.write_jsonl(
+            "offers.jl",
+            [
+                record(0),
+                "{not json",
+                record(2, title=""),
+                record(3, daily_rate="cher"),
+                record(4, daily_rate=-1),
+                record(5, published_at="hier"),
+                record(6, url="https://example.com/" + "x" * 500),
+                "[1, 2]",
+            ],
+        )
+
+        stats = imports.import_offers([path])
+
+        self.assertEqual((stats.read, stats.written, stats.invalid), (8, 1, 7))
+        self.assertEqual(
+            stats.errors,
+            [
+                f"{path}:2: Invalid JSON: Expecting property name enclosed in "
+                "double quotes: line 1 column 2 (char 1).",
+                f"{path}:3: Missing title.",
+                f"{path}:4: Invalid daily_rate: 'cher'.",
+                f"{path}:5: Negative daily_rate: -1.",
+                f"{path}:6: Invalid published_at: 'hier'.",
+                f"{path}:7: url is longer than 500 characters.",
+                f"{path}:8: Not an object.",
+            ],
+        )
+        self.assertEqual(
+            list(JobOffer.objects.values_list("external_id", flat=True)), ["offer-0"]
+        )
+
+    def test_unchanged_records_are_not_written_again(self):
+        path = self.write_jsonl("offers.jl", [record(0), record(1)])
+        imports.import_offers([path])
+        version = data_version.current()
+
+        stats = imports.import_offers([path])
+
+        self.assertEqual((stats.written, stats.unchanged), (0, 2))
+        # Nothing changed for the dashboard.
+        self.assertEqual(data_version.current(), version)
+
+        path = self.write_jsonl("offers.jl", [record(0), record(1, daily_rate=600)])
+        stats = imports.import_offers([path])
+
+        self.assertEqual((stats.written, stats.unchanged), (1, 1))
+
+    def test_aggregates_and_data_version_are_refreshed(self):
+        version = data_version.current()
+        path = self.write_jsonl(
+            "offers.jl",
+            [record(0), record(1, published_at="2024-01-02T10:00:00+00:00")],
+        )
+
+        imports.import_offers([path])
+
+        self.assertEqual(
+            sorted(
+                DailySkillStat.objects.filter(skill__name="Python").values_list(
+                    "day", "offer_count", "daily_rate_total"
+                )
+            ),
+            [(date(2024, 1, 1), 1, 500), (date(2024, 1, 2), 1, 500)],
+        )
+        self.assertGreater(data_version.current(), version)
+
+        # The offer moves to January 3 and leaves January 1.
+        path = self.write_jsonl(
+            "offers.jl", [record(0, published_at="2024-01-03T10:00:00+00:00")]
+        )
+        imports.import_offers([path])
+
+        self.assertEqual(
+            sorted(
+                DailySkillStat.objects.filter(skill__name="Python").values_list(
+                    "day", flat=True
+                )
+            ),
+            [date(2024, 1, 2), date(2024, 1, 3)],
+        )
+
+    def test_offers_loaded_before_an_error_are_aggregated(self):
+        version = data_version.current()
+        path = self.write_jsonl("offers.jl", [record(0)])
+
+        with self.assertRaises(FileNotFoundError):
+            imports.import_offers([path, Path(self.tmpdir.name, "missing.jl")])
+
+        self.assertTrue(JobOffer.objects.filter(external_id="offer-0").exists())
+        self.assertTrue(DailySkillStat.objects.filter(day=date(2024, 1, 1)).exists())
+        self.assertGreater(data_version.current(), version)
+
+    def test_command(self):
+        path = self.write_csv("offers.csv", [record(0), record(1, title="")])
+        stdout, stderr = io.StringIO(), io.StringIO()
+
+        call_command("import_offers", str(path), stdout=stdout, stderr=stderr)
+
+        self.assertIn(
+            "2 records read: 1 offers written, 0 unchanged, 1 invalid.",
+            stdout.getvalue(),
+        )
+        self.assertEqual(stderr.getvalue(), f"{path}:3: Missing title.\n")
+
+    def test_command_rejects_unsupported_files(self):
+        path = Path(self.tmpdir.name, "offers.xml")
+        path.write_text("<offers/>")
+
+        with self.assertRaisesMessage(CommandError, "Unsupported file type"):
+            call_command("import_offers", str(path))
@@ -0,0 +1,84 @@
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from freework.offers import data_version, search
+from freework.offers.models import JobOffer
+
+from . import create_offers
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.offers = create_offers(1100)
+        JobOffer.objects.filter(pk=self.offers[42].pk).update(
+            description="Développeurs Django confirmés"
+        )
+
+    def test_dashboard_keeps_every_match(self):
+        search.rebuild()
+
+        # More matches than the number of ranked results ever fetched.
+        self.assertEqual(JobOffer.objects.dashboard(q="offer").count(), 1100)
+        self.assertEqual(
+            list(JobOffer.objects.dashboard(q="développeur django")),
+            [self.offers[42]],
+        )
+        self.assertFalse(JobOffer.objects.dashboard(q="!!").exists())
+
+    def test_relevance_sort_ranks_the_best_matches_first(self):
+        JobOffer.objects.filter(pk=self.offers[5].pk).update(title="Développeur Django")
+        JobOffer.objects.filter(pk=self.offers[900].pk).update(
+            description="Une mission Python, puis Django."
+        )
+        search.rebuild()
+
+        by_date = JobOffer.objects.dashboard(q="django")
+        by_relevance = JobOffer.objects.dashboard(q="django", sort="relevance")
+
+        self.assertEqual(
+            list(by_date), [self.offers[900], self.offers[42], self.offers[5]]
+        )
+        # A match in the title first, then in the shortest description.
+        self.assertEqual(
+            list(by_relevance), [self.offers[5], self.offers[42], self.offers[900]]
+        )
+        ranks = [offer.rank for offer in by_relevance]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertGreater(ranks[0], ranks[1])
+        # Filtered like the other sorts.
+        self.assertEqual(
+            list(by_relevance.filter(daily_rate__gt=900)), [self.offers[900]]
+        )
+
+    def test_falls_back_to_icontains_without_a_search_backend(self):
+        with mock.patch.object(connection, "vendor", "mysql"):
+            backend = search.get_backend()
+            self.assertIsInstance(backend, search.ContainsSearchBackend)
+            # Nothing to index: the pipeline writes the offers as usual.
+            search.index([offer.pk for offer in self.offers])
+            search.rebuild()
+
+            self.assertEqual(
+                list(JobOffer.objects.dashboard(q="DJANGO confirmés")),
+                [self.offers[42]],
+            )
+            self.assertEqual(JobOffer.objects.dashboard(q="offer").count(), 1100)
+            # Every match ranks the same: the latest first.
+            self.assertEqual(
+                list(JobOffer.objects.dashboard(q="offer 104", sort="relevance")[:3]),
+                self.offers[1049:1046:-1],
+            )
+
+    def test_rebuild_command_refreshes_the_dashboard(self):
+        cache.clear()
+        version = data_version.current()
+
+        call_command("rebuild_search_index", stdout=io.StringIO())
+
+        self.assertEqual(JobOffer.objects.dashboard(q="offer").count(), 1100)
+        self.assertGreater(data_version.current(), version)
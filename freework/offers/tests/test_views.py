@@ -0,0 +1,170 @@
+import html
+import re
+from datetime import timedelta
+from statistics import mean
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from freework.metrics.queries import NPlusOneError, assert_no_n_plus_one
+from freework.offers import aggregates, search
+from freework.offers.models import JobOffer
+from freework.offers.views import OfferListView, SkillTrends
+
+from . import create_offers
+
+
+async def read(response):
+    return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+
+# The widgets read the offers from their own connections: the offers are
+# committed rather than left in the transaction of a TestCase.
+class DashboardTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        create_offers(60)
+
+    async def test_streams_every_widget_into_its_placeholder(self):
+        response = await self.async_client.get("/")
+        self.assertTrue(response.streaming)
+        content = await read(response)
+        self.assertEqual(response.status_code, 200)
+        for name in OfferListView.widgets:
+            self.assertIn(f'id="{name}-widget"', content)
+            self.assertIn(f'<template id="{name}-content">', content)
+        self.assertIn("Offer 59", content)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+
+    def test_page_is_not_streamed_under_wsgi(self):
+        response = self.client.get("/")
+
+        self.assertFalse(response.streaming)
+        for name in OfferListView.widgets:
+            self.assertContains(response, f'<template id="{name}-content">')
+        self.assertContains(response, "Offer 59")
+
+    async def test_metrics_count_the_queries_of_the_widgets(self):
+        with mock.patch("freework.metrics.middleware.REQUEST_QUERIES") as queries:
+            response = await self.async_client.get("/")
+            queries.labels.assert_not_called()
+            await read(response)
+        queries.labels.assert_called_once_with("home")
+        (count,), _ = queries.labels.return_value.observe.call_args
+        # The data version, then top skills, top locations, the locations
+        # and skills of the filters, the offers and their skills.
+        self.assertGreaterEqual(count, 7)
+
+    async def test_dashboard_fails_on_n_plus_one_queries(self):
+        get_queryset = OfferListView.get_queryset
+
+        def without_prefetch(view):
+            return get_queryset(view).prefetch_related(None)
+
+        # The skills of each offer, queried by the offer-rows widget on its
+        # own thread.
+        with mock.patch.object(OfferListView, "get_queryset", without_prefetch):
+            response = await self.async_client.get("/")
+            with self.assertRaisesMessage(NPlusOneError, "N+1 queries in GET /"):
+                await read(response)
+
+    async def test_skill_trends_read_the_weekly_rates(self):
+        await JobOffer.objects.aupdate(published_at=timezone.now())
+        await sync_to_async(aggregates.rebuild)()
+
+        response = await self.async_client.get("/")
+        content = await read(response)
+
+        self.assertIn("Daily rate by week", content)
+        self.assertIn("<td>Skill 1</td>", content)
+
+    async def test_statistics_follow_the_day(self):
+        await JobOffer.objects.aupdate(published_at=timezone.now())
+        await sync_to_async(aggregates.rebuild)()
+        await read(await self.async_client.get("/"))
+        later = timezone.localdate() + timedelta(weeks=OfferListView.trend_weeks + 1)
+
+        # Same data version, but the offers left the statistics windows.
+        with mock.patch("django.utils.timezone.localdate", return_value=later):
+            content = await read(await self.async_client.get("/"))
+
+        for name in ("top-skills", "top-locations", "skill-trends"):
+            with self.subTest(name):
+                widget = re.search(
+                    f'<template id="{name}-content">(.*?)</template>', content, re.S
+                )
+                self.assertIn("No offers yet.", widget[1])
+
+    def test_skill_trends_of_the_top_skills_by_week(self):
+        JobOffer.objects.update(published_at=timezone.now())
+        aggregates.rebuild()
+        today = timezone.localdate()
+        start = today - timedelta(days=today.weekday(), weeks=1)
+
+        trends = SkillTrends(start, limit=2)
+
+        self.assertEqual(trends.weeks, [start, start + timedelta(weeks=1)])
+        # Skills 1 and 2 are wanted by 40 offers each, 0 and 3 by 20.
+        self.assertEqual(
+            trends.rows,
+            [
+                ("Skill 1", [None, mean(400 + i for i in range(60) if i % 3 < 2)]),
+                ("Skill 2", [None, mean(400 + i for i in range(60) if i % 3 > 0)]),
+            ],
+        )
+
+    def test_offer_list_has_no_n_plus_one_queries(self):
+        with assert_no_n_plus_one():
+            response = self.client.get("/", headers={"HX-Request": "true"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_htmx_requests_get_the_offer_rows(self):
+        response = self.client.get("/", headers={"HX-Request": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        self.assertContains(response, "Offer 59")
+        self.assertNotContains(response, "<html")
+
+    def test_search_filters_the_offers(self):
+        search.rebuild()
+        response = self.client.get(
+            "/", {"q": "offer 42"}, headers={"HX-Request": "true"}
+        )
+        self.assertContains(response, "Offer 42</a>", count=1)
+        self.assertContains(response, '<tr class="border-b">', count=1)
+
+    def test_relevance_pages_follow_the_rank(self):
+        JobOffer.objects.filter(title="Offer 7").update(title="Offer 7 offer")
+        search.rebuild()
+        expected = [
+            offer.title
+            for offer in JobOffer.objects.dashboard(q="offer", sort="relevance")
+        ]
+        titles = []
+        url = "/?q=offer&sort=relevance"
+
+        with mock.patch.object(OfferListView, "page_size", 7):
+            while url:
+                response = self.client.get(url, headers={"HX-Request": "true"})
+                content = response.content.decode()
+                titles += re.findall(r'rel="noopener">([^<]+)</a>', content)
+                url = next(iter(re.findall(r'hx-get="([^"]+)"', content)), None)
+                if url:
+                    url = html.unescape(url)
+                    self.assertIn("sort=relevance", url)
+
+        self.assertEqual(len(expected), 60)
+        self.assertEqual(expected[0], "Offer 7 offer")
+        self.assertEqual(titles, expected)
+
+    def test_relevance_pages_reject_a_date_cursor(self):
+        with self.assertLogs("django.request", "WARNING"):
+            response = self.client.get(
+                "/",
+                {"q": "offer", "sort": "relevance", "after": "2024-01-01T00:00:00,3"},
+                headers={"HX-Request": "true"},
+            )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,304 @@
+import asyncio
+from datetime import timedelta
+from functools import cached_property
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import BadRequest, ImproperlyConfigured
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.html import format_html
+from django.views import generic
+
+from freework.metrics.context import request_thread
+
+from . import data_version, duplicates, export
+from .forms import OfferFilterForm
+from .managers import RELEVANCE
+from .models import DailyLocationStat, DailySkillStat, JobOffer
+
+# Where the widgets are streamed in the page, and how each one replaces its
+# placeholder, the element with the id "<name>-widget".
+WIDGETS_MARKER = "<!-- widgets -->"
+WIDGET_SWAP = (
+    '<template id="{name}-content">{html}</template>'
+    '<script>document.getElementById("{name}-widget")'
+    '.replaceWith(document.getElementById("{name}-content").content)</script>'
+)
+
+
+def parse_cursor(value, ranked=False):
+    """Parse the ``published_at,id`` cursor of the last offer shown, or its
+    ``rank,id`` cursor if the offers are ``ranked`` by relevance.
+    """
+    key, _, pk = value.rpartition(",")
+    try:
+        key = float(key) if ranked else parse_datetime(key)
+        pk = int(pk)
+    except ValueError:
+        key = None
+    if key is None:
+        raise BadRequest(f"Invalid cursor: {value!r}.")
+    return key, pk
+
+
+class OfferPage:
+    """A page of offers, only queried when the template reads it.
+
+    Nothing is evaluated when the page is rendered from a cached fragment.
+    """
+
+    def __init__(self, get_queryset, size, ranked=False):
+        self.get_queryset = get_queryset
+        self.size = size
+        self.ranked = ranked
+
+    @cached_property
+    def rows(self):
+        # One more row than shown tells whether there is a next page.
+        return list(self.get_queryset()[: self.size + 1])
+
+    @property
+    def offers(self):
+        return self.rows[: self.size]
+
+    @property
+    def next_cursor(self):
+        if len(self.rows) <= self.size:
+            return None
+        last = self.rows[self.size - 1]
+        if self.ranked:
+            # repr() gives back the same float.
+            return f"{last.rank!r},{last.pk}"
+        return f"{last.published_at.isoformat()},{last.pk}"
+
+
+class SkillTrends:
+    """Average daily rate of the most wanted skills, week by week since
+    ``start`` (a Monday), only queried when the template reads it.
+    """
+
+    def __init__(self, start, limit):
+        self.start = start
+        self.limit = limit
+
+    @cached_property
+    def weeks(self):
+        today = timezone.localdate()
+        return [
+            self.start + timedelta(weeks=week)
+            for week in range((today - self.start).days // 7 + 1)
+        ]
+
+    @cached_property
+    def rows(self):
+        """``[(skill, [rate or None for each week])]``, most wanted first."""
+        counts = {}
+        rates = {}
+        for row in DailySkillStat.objects.weekly_rates(self.start):
+            skill = row["skill__name"]
+            counts[skill] = counts.get(skill, 0) + row["offer_count"]
+            rates[skill, row["week"]] = row["average_daily_rate"]
+        skills = sorted(counts, key=lambda skill: (-counts[skill], skill))
+        return [
+            (skill, [rates.get((skill, week)) for week in self.weeks])
+            for skill in skills[: self.limit]
+        ]
+
+
+class OfferListView(generic.TemplateView):
+    """Dashboard: latest offers, filtered and paginated with a cursor, and
+    statistics of the last ``stats_days`` days.
+
+    Pages are selected with keyset pagination on ``(published_at, id)``: the
+    ``after`` parameter is the cursor of the last offer of the previous page,
+    so every page costs the same index range scan, however deep. The matches
+    of a search sorted by relevance are paginated on ``(rank, id)`` instead,
+    which is not indexed: each page ranks every match again. HTMX requests
+    (filters and infinite scroll) only get the rows, rendered from the
+    ``offer-rows`` partial.
+
+    Under ASGI, the page is streamed: first without its ``widgets``, then
+    each widget, rendered from its partial on a thread of its own, as soon as
+    it is ready. Under WSGI, the same content is sent once complete. Their
+    queries run at the same time, so the page takes about as long as its
+    slowest widget rather than the sum of them. The async ORM would not
+    do: it runs all the queries of a request one after the other on a single
+    thread. These threads are instrumented like the request's, see
+    ``freework.metrics.context``.
+
+    The statistics are read from the daily aggregates, see
+    ``freework.offers.aggregates``. The fragments of the page are cached
+    under the current data version, which changes when a crawl ends: between
+    two crawls, rendering the dashboard does not query the database.
+    """
+
+    template_name = "home.html"
+    partial_name = "home.html#offer-rows"
+    widgets = (
+        "top-skills",
+        "top-locations",
+        "skill-trends",
+        "offer-filters",
+        "offer-rows",
+    )
+    page_size = 50
+    stats_days = 30
+    stats_limit = 10
+    trend_weeks = 8
+    trend_limit = 5
+
+    async def get(self, request, *args, **kwargs):
+        self.form = OfferFilterForm(request.GET)
+        context = await sync_to_async(self.get_context_data)(**kwargs)
+        if request.headers.get("HX-Request"):
+            return self.render_to_response(context)
+        content = self.stream(context)
+        if isinstance(request, ASGIRequest):
+            return StreamingHttpResponse(content)
+        # A WSGI server would read the whole stream before sending anything.
+        return HttpResponse("".join([part async for part in content]))
+
+    async def stream(self, context):
+        """Yield the page without its widgets, then the widgets in the order
+        they are rendered, then the end of the page.
+        """
+        page = await self.in_thread(
+            render_to_string, self.template_name, context, self.request
+        )
+        start, _, end = page.partition(WIDGETS_MARKER)
+        yield start
+        for widget in asyncio.as_completed(
+            [self.in_thread(self.render_widget, name, context) for name in self.widgets]
+        ):
+            name, html = await widget
+            yield format_html(WIDGET_SWAP, name=name, html=html)
+        yield end
+
+    async def in_thread(self, function, *args):
+        """Call ``function`` on a thread of the executor, for the request."""
+        return await sync_to_async(self.run_for_request, thread_sensitive=False)(
+            function, *args
+        )
+
+    def run_for_request(self, function, *args):
+        with request_thread(self.request):
+            try:
+                return function(*args)
+            finally:
+                # Closed (or given back to the pool) like at the end of a
+                # request, rather than kept by a thread serving other requests.
+                connections.close_all()
+
+    def render_widget(self, name, context):
+        """Render the partial ``name``."""
+        return name, render_to_string(
+            f"{self.template_name}#{name}", context, self.request
+        )
+
+    def get_queryset(self):
+        self.form.is_valid()
+        queryset = JobOffer.objects.dashboard(**self.form.cleaned_data)
+        if self.cursor is not None and self.ranked:
+            queryset = queryset.ranked_after(*self.cursor)
+        elif self.cursor is not None:
+            queryset = queryset.after(*self.cursor)
+        return (
+            queryset.select_related("company", "location")
+            .prefetch_related("skills")
+            .defer("description", "fingerprint", "etag", "last_modified")
+        )
+
+    def get_context_data(self, **kwargs):
+        # Before the widgets render the form and query the offers, each on
+        # its own thread.
+        self.form.is_valid()
+        self.ranked = self.form.cleaned_data.get("sort") == RELEVANCE
+        cursor = self.request.GET.get("after")
+        self.cursor = parse_cursor(cursor, self.ranked) if cursor else None
+        today = timezone.localdate()
+        since = today - timedelta(days=self.stats_days)
+        # Whole weeks, the current one included.
+        trends_start = today - timedelta(
+            days=today.weekday(), weeks=self.trend_weeks - 1
+        )
+        # Querysets and the page are lazy: evaluated only on a cache miss.
+        return super().get_context_data(
+            form=self.form,
+            page=OfferPage(self.get_queryset, self.page_size, self.ranked),
+            top_skills=DailySkillStat.objects.skill_rates(since)[: self.stats_limit],
+            top_locations=DailyLocationStat.objects.offer_counts(since)[
+                : self.stats_limit
+            ],
+            stats_days=self.stats_days,
+            skill_trends=SkillTrends(trends_start, self.trend_limit),
+            # The statistics fragments also change with the day, without a
+            # crawl.
+            today=today,
+            export_formats=export.available_formats(),
+            data_version=data_version.current(),
+            fragment_cache_timeout=settings.FREEWORK_FRAGMENT_CACHE_TIMEOUT,
+            **kwargs,
+        )
+
+    def get_template_names(self):
+        if self.request.headers.get("HX-Request"):
+            return [self.partial_name]
+        return super().get_template_names()
+
+
+def export_offers(request, format):
+    """Download the offers matching the dashboard filters as a file streamed
+    in ``format``, see ``freework.offers.export``.
+    """
+    if format not in export.FORMATS:
+        raise Http404(f"Unknown export format: {format!r}.")
+    form = OfferFilterForm(request.GET)
+    form.is_valid()
+    queryset = JobOffer.objects.dashboard(**form.cleaned_data)
+    try:
+        content = export.export(queryset, format)
+    except ImproperlyConfigured as error:
+        raise Http404(str(error))
+    if isinstance(request, ASGIRequest):
+        content = export.stream(content)
+    export_format = export.FORMATS[format]
+    filename = f"offers-{timezone.localdate():%Y%m%d}.{export_format.extension}"
+    return StreamingHttpResponse(
+        content,
+        content_type=export_format.content_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+class DuplicateClusterListView(generic.ListView):
+    """Clusters of offers reposted with a slightly different wording, largest
+    first, see ``freework.offers.duplicates``.
+    """
+
+    template_name = "offers/duplicate_clusters.html"
+    context_object_name = "clusters"
+    paginate_by = 20
+
+    def get_queryset(self):
+        return duplicates.clusters()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        members = {}
+        for offer in (
+            JobOffer.objects.filter(
+                signature__cluster__in=[c["cluster"] for c in context["clusters"]]
+            )
+            .select_related("company", "location", "signature")
+            .defer("description")
+            .order_by("published_at", "pk")
+        ):
+            members.setdefault(offer.signature.cluster_id, []).append(offer)
+        for cluster in context["clusters"]:
+            cluster["offers"] = members.get(cluster["cluster"], [])
+        return context
@@ -0,0 +1,64 @@
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    external_id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL
+)
+"""
+
+
+class SharedFingerprintStore:
+    """Fingerprints claimed by the processes of a sharded crawl.
+
+    The store is a SQLite file in WAL mode shared by every shard. Before
+    writing a batch, a shard claims its offers: only the first shard to see a
+    given ``(external_id, fingerprint)`` pair gets to write it, so an offer
+    listed in several shards is written once. A shard that fails to write a
+    batch releases its claims, for another shard to write the offers.
+    """
+
+    def __init__(self, path, timeout=30):
+        self.db = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(SCHEMA)
+
+    def claim(self, fingerprints):
+        """Claim ``{external_id: fingerprint}`` and return the ids won."""
+        claimed = set()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for external_id, fingerprint in fingerprints.items():
+                cursor = self.db.execute(
+                    "INSERT INTO claims VALUES (?, ?) "
+                    "ON CONFLICT (external_id) DO UPDATE "
+                    "SET fingerprint = excluded.fingerprint "
+                    "WHERE fingerprint != excluded.fingerprint",
+                    (external_id, fingerprint),
+                )
+                if cursor.rowcount:
+                    claimed.add(external_id)
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+        return claimed
+
+    def release(self, fingerprints):
+        """Release the claims of ``{external_id: fingerprint}``."""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.executemany(
+                "DELETE FROM claims WHERE external_id = ? AND fingerprint = ?",
+                fingerprints.items(),
+            )
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,185 @@
+import logging
+import time
+
+from django.db import close_old_connections
+from django.utils import timezone
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.log import failure_to_exc_info
+from twisted.internet.task import LoopingCall
+
+from freework.crawls.models import CrawlRun, CrawlSnapshot
+from freework.scraper.writer import database_writer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def peak_memory():
+    """Peak resident memory of the process in bytes, if known."""
+    if resource is None:
+        return None
+    # Kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class CrawlTelemetry:
+    """Record the crawl as a ``CrawlRun`` with periodic ``CrawlSnapshot``.
+
+    Every ``FREEWORK_TELEMETRY_INTERVAL`` seconds the Scrapy stats are turned
+    into a snapshot of the rates of the interval. Snapshots are kept in memory
+    and written ``FREEWORK_TELEMETRY_FLUSH_EVERY`` at a time, together with
+    the counters of the run, by the crawl's database ``writer`` to stay out of
+    the way of the crawl.
+    """
+
+    def __init__(self, stats, writer, interval=10.0, flush_every=3):
+        self.stats = stats
+        self.writer = writer
+        self.interval = interval
+        self.flush_every = max(1, flush_every)
+        self.run = None
+        self.task = None
+        self.snapshots = []
+        self.previous = None
+        self.previous_time = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("FREEWORK_TELEMETRY_ENABLED"):
+            raise NotConfigured
+        extension = cls(
+            crawler.stats,
+            database_writer(crawler),
+            interval=crawler.settings.getfloat("FREEWORK_TELEMETRY_INTERVAL", 10.0),
+            flush_every=crawler.settings.getint("FREEWORK_TELEMETRY_FLUSH_EVERY", 3),
+        )
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_opened(self, spider):
+        arguments = {}
+        if hasattr(spider, "incremental"):
+            arguments["incremental"] = spider.incremental
+        if hasattr(spider, "seeds"):
+            arguments["seeds"] = len(spider.seeds)
+        dfd = self.writer.run(self.create_run, spider=spider.name, arguments=arguments)
+        dfd.addCallback(self.start)
+        return dfd
+
+    @staticmethod
+    def create_run(**fields):
+        close_old_connections()
+        # Runs of the crawls killed before they could close them.
+        stale = CrawlRun.objects.fail_stale()
+        if stale:
+            logger.warning(
+                "Marked %(count)d stale crawl runs as failed", {"count": stale}
+            )
+        return CrawlRun.objects.create(**fields)
+
+    def start(self, run):
+        self.run = run
+        self.previous = self.counters()
+        self.previous_time = time.monotonic()
+        self.task = LoopingCall(self.snapshot)
+        self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.task and self.task.running:
+            self.task.stop()
+        if self.run is None:
+            # The run could not be created, or the crawl closed before.
+            return None
+        self.snapshot()
+        self.run.status = (
+            CrawlRun.Status.FINISHED
+            if reason == "finished" or reason.startswith("closespider_")
+            else CrawlRun.Status.FAILED
+        )
+        self.run.finish_reason = reason
+        self.run.finished_at = timezone.now()
+        self.run.stats = self.stats.get_stats()
+        return self.flush()
+
+    def counters(self):
+        get = self.stats.get_value
+        return {
+            "pages": get("response_received_count", 0),
+            "items": get("item_scraped_count", 0),
+            "errors": get("log_count/ERROR", 0),
+            "write_seconds": get("freework/write_seconds", 0),
+            "batches": get("freework/batches_written", 0),
+            "cache_hits": get("httpcache/hit", 0),
+            "cache_misses": get("httpcache/miss", 0),
+        }
+
+    def snapshot(self):
+        now = time.monotonic()
+        elapsed = max(now - self.previous_time, 1e-6)
+        current = self.counters()
+        delta = {key: current[key] - self.previous[key] for key in current}
+        lookups = delta["cache_hits"] + delta["cache_misses"]
+        self.snapshots.append(
+            CrawlSnapshot(
+                run=self.run,
+                taken_at=timezone.now(),
+                pages=current["pages"],
+                items=current["items"],
+                errors=current["errors"],
+                pages_per_second=delta["pages"] / elapsed,
+                items_per_second=delta["items"] / elapsed,
+                write_latency_ms=(
+                    delta["write_seconds"] / delta["batches"] * 1000
+                    if delta["batches"]
+                    else None
+                ),
+                cache_hit_ratio=delta["cache_hits"] / lookups if lookups else None,
+                memory_bytes=peak_memory(),
+            )
+        )
+        self.run.pages = current["pages"]
+        self.run.items = current["items"]
+        self.run.errors = current["errors"]
+        self.previous, self.previous_time = current, now
+        if len(self.snapshots) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write the snapshots and the run on the writer thread, return the
+        deferred of the write.
+        """
+        snapshots, self.snapshots = self.snapshots, []
+        fields = {
+            field: getattr(self.run, field)
+            for field in (
+                "pages",
+                "items",
+                "errors",
+                "status",
+                "finish_reason",
+                "finished_at",
+                "stats",
+            )
+        }
+        dfd = self.writer.run(self.write, self.run.pk, snapshots, fields)
+        dfd.addErrback(
+            lambda failure: logger.error(
+                "Could not save the crawl telemetry",
+                exc_info=failure_to_exc_info(failure),
+            )
+        )
+        return dfd
+
+    @staticmethod
+    def write(run_id, snapshots, fields):
+        close_old_connections()
+        CrawlSnapshot.objects.bulk_create(snapshots)
+        # The run is updated from a copy of its fields, changed meanwhile by
+        # the reactor thread.
+        CrawlRun.objects.filter(pk=run_id).update(updated_at=timezone.now(), **fields)
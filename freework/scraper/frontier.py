@@ -0,0 +1,279 @@
+"""
+Crawl frontier kept in a SQLite file, so that an interrupted crawl resumes
+where it stopped.
+
+``SqliteFrontierScheduler`` replaces Scrapy's scheduler: pending requests and
+the fingerprints of the requests already seen are stored in indexed tables of
+``FREEWORK_FRONTIER_DIR/<spider>.sqlite3`` instead of memory, so memory use
+does not grow with the frontier. Requests are serialized as JSON rather than
+pickled, and dequeued by decreasing priority, oldest first.
+
+Writes are batched: new requests are inserted every
+``FREEWORK_FRONTIER_BATCH_SIZE`` requests, or sooner when the scheduler needs
+to read, in the same transaction as the deletion of the requests whose
+response was fully processed. A request is only deleted once
+``FrontierMiddleware`` has seen its callback end, after the requests it
+yielded were enqueued: when a crawl is killed, the requests in flight are
+fetched again on the next run and nothing is lost. A download that fails once
+its retries are exhausted is deleted too, rather than fetched again by every
+resumed crawl, and a retry or redirect replaces the request it comes from.
+
+A crawl that finishes deletes its frontier; any other end (shutdown, error,
+killed process) keeps it and the next crawl of the spider resumes it. The
+start requests of the resumed crawl are dropped as already seen.
+"""
+
+import json
+import logging
+import sqlite3
+from collections import deque
+from pathlib import Path
+
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.utils.request import request_from_dict
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    priority INTEGER NOT NULL,
+    taken INTEGER NOT NULL DEFAULT 0,
+    request TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS requests_next ON requests (taken, priority DESC, id);
+CREATE TABLE IF NOT EXISTS seen (fingerprint BLOB PRIMARY KEY) WITHOUT ROWID;
+"""
+
+# Sent by FrontierMiddleware once the output of a request's callback was
+# processed.
+request_processed = object()
+
+
+def dumps(request, spider):
+    """Serialize ``request`` to JSON, raise ``TypeError`` if it cannot be."""
+    data = request.to_dict(spider=spider)
+    data["headers"] = {
+        name.decode("latin-1"): [value.decode("latin-1") for value in values]
+        for name, values in data["headers"].items()
+    }
+    data["body"] = data["body"].decode("latin-1")
+    return json.dumps(data, separators=(",", ":"))
+
+
+def loads(text, spider):
+    data = json.loads(text)
+    data["headers"] = {
+        name.encode("latin-1"): [value.encode("latin-1") for value in values]
+        for name, values in data["headers"].items()
+    }
+    data["body"] = data["body"].encode("latin-1")
+    return request_from_dict(data, spider=spider)
+
+
+class SqliteFrontierScheduler(BaseScheduler):
+    """Scheduler keeping its queue and seen requests in SQLite, see the module
+    documentation.
+    """
+
+    # Requests read from the database at a time: a request of higher priority
+    # enqueued meanwhile waits for these ones.
+    read_ahead_size = 100
+
+    def __init__(self, crawler, directory, batch_size=500):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.directory = directory
+        self.batch_size = max(1, batch_size)
+        self.fingerprinter = crawler.request_fingerprinter
+        self.db = None
+        self.path = None
+        self.spider = None
+        # Requests enqueued since the last flush, and their fingerprints.
+        self.pending = []
+        self.pending_fingerprints = set()
+        # Requests read ahead from the database, ready to be dequeued.
+        self.ready = deque()
+        # Ids of the requests processed since the last flush.
+        self.processed = []
+        # Requests that cannot be serialized, kept in memory.
+        self.memory = deque()
+        self.queued = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        directory = Path(settings["FREEWORK_FRONTIER_DIR"])
+        shard = settings.get("FREEWORK_FRONTIER_SHARD")
+        if shard is not None:
+            directory = directory / f"shard-{shard}"
+        directory.mkdir(parents=True, exist_ok=True)
+        scheduler = cls(
+            crawler,
+            directory,
+            batch_size=settings.getint("FREEWORK_FRONTIER_BATCH_SIZE", 500),
+        )
+        crawler.signals.connect(scheduler.request_processed, request_processed)
+        return scheduler
+
+    def open(self, spider):
+        self.spider = spider
+        self.path = Path(self.directory, f"{spider.name}.sqlite3")
+        self.db = sqlite3.connect(self.path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        # Requests taken but not processed when the last crawl stopped.
+        self.db.execute("UPDATE requests SET taken = 0 WHERE taken = 1")
+        (self.queued,) = self.db.execute("SELECT COUNT(*) FROM requests").fetchone()
+        if self.queued:
+            logger.info(
+                "Resuming the crawl with %(count)d pending requests from %(path)s",
+                {"count": self.queued, "path": self.path},
+                extra={"spider": spider},
+            )
+            self.stats.set_value("frontier/resumed", self.queued)
+        self.db.execute("BEGIN")
+
+    def close(self, reason):
+        self.flush()
+        self.db.execute("COMMIT")
+        self.db.close()
+        if reason == "finished" and not self.memory:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+
+    def has_pending_requests(self):
+        return bool(self.queued or self.memory)
+
+    def __len__(self):
+        return self.queued + len(self.memory)
+
+    def enqueue_request(self, request):
+        # Set on a retry or a redirect of a request read from the frontier.
+        replaced = request.meta.pop("frontier_id", None)
+        fingerprint = None
+        if not request.dont_filter:
+            fingerprint = self.fingerprinter.fingerprint(request)
+            if (
+                fingerprint in self.pending_fingerprints
+                or self.db.execute(
+                    "SELECT 1 FROM seen WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone()
+            ):
+                self.stats.inc_value("frontier/filtered")
+                if replaced is not None:
+                    self.processed.append(replaced)
+                return False
+        try:
+            data = dumps(request, self.spider)
+        except (TypeError, ValueError) as error:
+            logger.warning(
+                "Keeping unserializable request %(request)s in memory: %(error)s",
+                {"request": request, "error": error},
+                extra={"spider": self.spider},
+            )
+            self.stats.inc_value("scheduler/unserializable")
+            self.memory.append(request)
+        else:
+            self.pending.append((request.priority, data, fingerprint))
+            if fingerprint is not None:
+                self.pending_fingerprints.add(fingerprint)
+            if replaced is not None:
+                # Deleted in the transaction inserting its replacement.
+                self.processed.append(replaced)
+            self.queued += 1
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+        self.stats.inc_value("frontier/enqueued")
+        return True
+
+    def next_request(self):
+        if self.memory:
+            request = self.memory.popleft()
+        else:
+            if not self.ready:
+                self.flush()
+                self.read_ahead()
+            if not self.ready:
+                return None
+            request = self.ready.popleft()
+            self.queued -= 1
+        self.stats.inc_value("frontier/dequeued")
+        return request
+
+    def read_ahead(self):
+        rows = self.db.execute(
+            "SELECT id, request FROM requests WHERE taken = 0 "
+            "ORDER BY priority DESC, id LIMIT ?",
+            (self.read_ahead_size,),
+        ).fetchall()
+        self.db.executemany(
+            "UPDATE requests SET taken = 1 WHERE id = ?", [(id,) for id, _ in rows]
+        )
+        for id, data in rows:
+            request = loads(data, self.spider)
+            request.meta["frontier_id"] = id
+            self.ready.append(request)
+
+    def request_processed(self, request):
+        id = request.meta.get("frontier_id")
+        if id is not None:
+            self.processed.append(id)
+            if len(self.processed) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """Write the pending requests, delete the processed ones and commit."""
+        if self.pending:
+            self.db.executemany(
+                "INSERT INTO requests (priority, request) VALUES (?, ?)",
+                [(priority, data) for priority, data, _ in self.pending],
+            )
+            self.db.executemany(
+                "INSERT OR IGNORE INTO seen VALUES (?)",
+                [(f,) for _, _, f in self.pending if f is not None],
+            )
+            self.pending = []
+            self.pending_fingerprints = set()
+        if self.processed:
+            self.db.executemany(
+                "DELETE FROM requests WHERE id = ?", [(id,) for id in self.processed]
+            )
+            self.processed = []
+        self.db.execute("COMMIT")
+        self.db.execute("BEGIN")
+
+
+class FrontierMiddleware:
+    """Spider middleware telling the frontier when the requests yielded by a
+    callback have all been scheduled, and downloader middleware telling it
+    when a download failed for good.
+    """
+
+    def __init__(self, crawler):
+        self.signals = crawler.signals
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_spider_output(self, response, result, spider=None):
+        yield from result
+        self.done(response.request)
+
+    async def process_spider_output_async(self, response, result, spider=None):
+        async for output in result:
+            yield output
+        self.done(response.request)
+
+    def process_spider_exception(self, response, exception, spider=None):
+        self.done(response.request)
+
+    def process_exception(self, request, exception, spider=None):
+        # Only reached once RetryMiddleware gave up on the request.
+        self.done(request)
+
+    def done(self, request):
+        if request is not None:
+            self.signals.send_catch_log(request_processed, request=request)
@@ -0,0 +1,153 @@
+import logging
+import re
+import sqlite3
+import zlib
+from pathlib import Path
+from time import time
+
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    fingerprint BLOB PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers BLOB NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class SqliteCacheStorage:
+    """HTTP cache storage keeping every response in a single SQLite file.
+
+    Bodies are zlib-compressed. The expiration delay depends on the URL:
+    ``FREEWORK_HTTPCACHE_TTLS`` maps regular expressions to a TTL in seconds
+    (first match wins, ``HTTPCACHE_EXPIRATION_SECS`` otherwise). When the
+    stored size exceeds ``FREEWORK_HTTPCACHE_MAX_BYTES``, the least recently
+    used responses are evicted.
+    """
+
+    # Access times are written in batches rather than on every cache hit.
+    touch_batch_size = 500
+    # Eviction frees space down to this fraction of the budget so that it does
+    # not run again on the very next store.
+    eviction_low_watermark = 0.9
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings["HTTPCACHE_DIR"], createdir=True)
+        self.expiration_secs = settings.getint("HTTPCACHE_EXPIRATION_SECS")
+        self.ttls = [
+            (re.compile(pattern), int(ttl))
+            for pattern, ttl in settings.getdict("FREEWORK_HTTPCACHE_TTLS").items()
+        ]
+        self.max_bytes = settings.getint("FREEWORK_HTTPCACHE_MAX_BYTES")
+        self.compression_level = settings.getint(
+            "FREEWORK_HTTPCACHE_COMPRESSION_LEVEL", 6
+        )
+        self.db = None
+        self.total_bytes = 0
+        self.touched = {}
+
+    def open_spider(self, spider):
+        dbpath = Path(self.cachedir, f"{spider.name}.sqlite3")
+        self.db = sqlite3.connect(dbpath, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        (self.total_bytes,) = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        logger.debug(
+            "Using SQLite cache storage in %(cachepath)s",
+            {"cachepath": dbpath},
+            extra={"spider": spider},
+        )
+
+    def close_spider(self, spider):
+        self.flush_touched()
+        self.db.close()
+
+    def retrieve_response(self, spider, request):
+        key = self._fingerprinter.fingerprint(request)
+        row = self.db.execute(
+            "SELECT url, status, headers, body, stored_at FROM responses "
+            "WHERE fingerprint = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None  # not cached
+        url, status, raw_headers, body, stored_at = row
+        ttl = self.ttl(request.url)
+        if 0 < ttl < time() - stored_at:
+            return None  # expired
+
+        self.touched[key] = time()
+        if len(self.touched) >= self.touch_batch_size:
+            self.flush_touched()
+        request.meta["cache_timestamp"] = stored_at
+        headers = Headers(headers_raw_to_dict(raw_headers))
+        body = zlib.decompress(body)
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response):
+        key = self._fingerprinter.fingerprint(request)
+        raw_headers = headers_dict_to_raw(response.headers)
+        body = zlib.compress(response.body, self.compression_level)
+        size = len(raw_headers) + len(body)
+        now = time()
+        previous = self.db.execute(
+            "SELECT size FROM responses WHERE fingerprint = ?", (key,)
+        ).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, response.url, response.status, raw_headers, body, size, now, now),
+        )
+        self.total_bytes += size - (previous[0] if previous else 0)
+        if 0 < self.max_bytes < self.total_bytes:
+            self.evict()
+
+    def ttl(self, url):
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.expiration_secs
+
+    def flush_touched(self):
+        if not self.touched:
+            return
+        self.db.execute("BEGIN")
+        self.db.executemany(
+            "UPDATE responses SET accessed_at = ? WHERE fingerprint = ?",
+            [(accessed_at, key) for key, accessed_at in self.touched.items()],
+        )
+        self.db.execute("COMMIT")
+        self.touched = {}
+
+    def evict(self):
+        """Delete least recently used responses until under the budget."""
+        self.flush_touched()
+        target = self.max_bytes * self.eviction_low_watermark
+        victims = []
+        for key, size in self.db.execute(
+            "SELECT fingerprint, size FROM responses ORDER BY accessed_at"
+        ):
+            if self.total_bytes <= target:
+                break
+            victims.append((key,))
+            self.total_bytes -= size
+        self.db.execute("BEGIN")
+        self.db.executemany("DELETE FROM responses WHERE fingerprint = ?", victims)
+        self.db.execute("COMMIT")
+        logger.debug("Evicted %d responses from the HTTP cache", len(victims))
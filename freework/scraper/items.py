@@ -0,0 +1,18 @@
+import scrapy
+
+
+class JobOfferItem(scrapy.Item):
+    """Job offer as extracted from a free-work.com page."""
+
+    external_id = scrapy.Field()
+    url = scrapy.Field()
+    title = scrapy.Field()
+    company = scrapy.Field()
+    contract_type = scrapy.Field()
+    daily_rate = scrapy.Field()
+    location = scrapy.Field()
+    skills = scrapy.Field()
+    description = scrapy.Field()
+    published_at = scrapy.Field()
+    etag = scrapy.Field()
+    last_modified = scrapy.Field()
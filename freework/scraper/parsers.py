@@ -0,0 +1,167 @@
+"""
+Extraction of job offers from free-work.com listing and detail pages.
+
+Parsing is the CPU hot path of a crawl once pages come from the HTTP cache, so
+the parser is pluggable through the ``FREEWORK_PARSER`` setting:
+
+- ``LxmlParser`` (default) evaluates XPath expressions compiled once at import
+  time directly on the lxml tree;
+- ``ParselParser`` goes through Scrapy selectors and CSS, which translates and
+  compiles the expressions again on every response.
+
+Both return the same plain dictionaries, and None for a detail page without
+exactly one offer.
+"""
+
+import re
+
+from django.utils.dateparse import parse_datetime
+from lxml import etree
+
+RATE_RE = re.compile(r"\d+")
+
+
+class OfferParser:
+    """Interface of the listing and detail page parsers."""
+
+    def parse_listing(self, response):
+        """Return ``(cards, next_page_url)`` for a listing page.
+
+        Each card is a dictionary with ``external_id``, ``url`` and
+        ``published_at`` keys. ``next_page_url`` is None on the last page.
+        """
+        raise NotImplementedError
+
+    def parse_offer(self, response):
+        """Return the fields of the offer shown on a detail page, or None if
+        the page shows no offer, or several.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def clean_offer(
+        external_id,
+        title,
+        company,
+        contract_type,
+        rate,
+        location,
+        skills,
+        description,
+        published_at,
+    ):
+        rate = RATE_RE.search(rate)
+        return {
+            "external_id": external_id,
+            "title": title.strip(),
+            "company": company.strip(),
+            "contract_type": contract_type.strip(),
+            "daily_rate": int(rate.group()) if rate else None,
+            "location": location.strip(),
+            "skills": [skill.strip() for skill in skills if skill.strip()],
+            "description": " ".join(description).strip(),
+            "published_at": parse_datetime(published_at),
+        }
+
+
+class ParselParser(OfferParser):
+    """Parser based on Scrapy selectors and CSS expressions."""
+
+    def parse_listing(self, response):
+        cards = [
+            {
+                "external_id": card.attrib["data-id"],
+                "url": response.urljoin(card.css("a.job-card__link::attr(href)").get()),
+                "published_at": parse_datetime(
+                    card.css("time::attr(datetime)").get("")
+                ),
+            }
+            for card in response.css("article.job-card")
+        ]
+        next_page = response.css("a[rel=next]::attr(href)").get()
+        return cards, response.urljoin(next_page) if next_page else None
+
+    def parse_offer(self, response):
+        offers = response.css("article.job-detail")
+        if len(offers) != 1:
+            return None
+        offer = offers[0]
+        return self.clean_offer(
+            external_id=offer.attrib["data-id"],
+            title=offer.css("h1.job-detail__title::text").get(""),
+            company=offer.css(".job-detail__company::text").get(""),
+            contract_type=offer.css(".job-detail__contract::text").get(""),
+            rate=offer.css(".job-detail__rate::text").get(""),
+            location=offer.css(".job-detail__location::text").get(""),
+            skills=offer.css(".job-detail__skills li::text").getall(),
+            description=offer.css(".job-detail__description ::text").getall(),
+            published_at=offer.css("time::attr(datetime)").get(""),
+        )
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+CARDS = etree.XPath(f"//article[{_has_class('job-card')}]")
+CARD_ID = etree.XPath("string(@data-id)")
+CARD_URL = etree.XPath(f"string(.//a[{_has_class('job-card__link')}]/@href)")
+CARD_PUBLISHED_AT = etree.XPath("string(.//time/@datetime)")
+NEXT_PAGE = etree.XPath("string(//a[@rel='next']/@href)")
+
+OFFER = etree.XPath(f"//article[{_has_class('job-detail')}]")
+OFFER_ID = etree.XPath("string(@data-id)")
+OFFER_TITLE = etree.XPath(f"string(.//h1[{_has_class('job-detail__title')}])")
+OFFER_COMPANY = etree.XPath(f"string(.//*[{_has_class('job-detail__company')}])")
+OFFER_CONTRACT = etree.XPath(f"string(.//*[{_has_class('job-detail__contract')}])")
+OFFER_RATE = etree.XPath(f"string(.//*[{_has_class('job-detail__rate')}])")
+OFFER_LOCATION = etree.XPath(f"string(.//*[{_has_class('job-detail__location')}])")
+OFFER_SKILLS = etree.XPath(f".//*[{_has_class('job-detail__skills')}]/li/text()")
+OFFER_DESCRIPTION = etree.XPath(
+    f".//*[{_has_class('job-detail__description')}]//text()"
+)
+OFFER_PUBLISHED_AT = etree.XPath("string(.//time/@datetime)")
+
+
+class LxmlParser(OfferParser):
+    """Parser evaluating precompiled XPath expressions on the lxml tree."""
+
+    def __init__(self):
+        self.html_parsers = {}
+
+    def tree(self, response):
+        # One lxml parser per encoding, reused across responses.
+        encoding = response.encoding
+        if encoding not in self.html_parsers:
+            self.html_parsers[encoding] = etree.HTMLParser(encoding=encoding)
+        return etree.fromstring(response.body, self.html_parsers[encoding])
+
+    def parse_listing(self, response):
+        tree = self.tree(response)
+        cards = [
+            {
+                "external_id": CARD_ID(card),
+                "url": response.urljoin(CARD_URL(card)),
+                "published_at": parse_datetime(CARD_PUBLISHED_AT(card)),
+            }
+            for card in CARDS(tree)
+        ]
+        next_page = NEXT_PAGE(tree)
+        return cards, response.urljoin(next_page) if next_page else None
+
+    def parse_offer(self, response):
+        offers = OFFER(self.tree(response))
+        if len(offers) != 1:
+            return None
+        (offer,) = offers
+        return self.clean_offer(
+            external_id=OFFER_ID(offer),
+            title=OFFER_TITLE(offer),
+            company=OFFER_COMPANY(offer),
+            contract_type=OFFER_CONTRACT(offer),
+            rate=OFFER_RATE(offer),
+            location=OFFER_LOCATION(offer),
+            skills=OFFER_SKILLS(offer),
+            description=OFFER_DESCRIPTION(offer),
+            published_at=OFFER_PUBLISHED_AT(offer),
+        )
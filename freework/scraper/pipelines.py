@@ -0,0 +1,407 @@
+import logging
+import time
+from collections import deque
+
+from django.db import OperationalError, close_old_connections, transaction
+from itemadapter import ItemAdapter
+from scrapy import signals
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.log import failure_to_exc_info
+from twisted.internet.defer import DeferredList
+
+from freework import metrics
+from freework.offers import aggregates, data_version, duplicates, search
+from freework.offers.fingerprint import offer_fingerprint
+from freework.offers.models import Company, JobOffer, Location, Skill
+from freework.scraper.dedup import SharedFingerprintStore
+from freework.scraper.writer import DatabaseWriter, database_writer
+
+logger = logging.getLogger(__name__)
+
+# Fields overwritten when an offer with the same external id already exists.
+UPDATE_FIELDS = [
+    "url",
+    "title",
+    "company",
+    "contract_type",
+    "daily_rate",
+    "location",
+    "description",
+    "published_at",
+    "fingerprint",
+    "etag",
+    "last_modified",
+    "updated_at",
+]
+
+
+# Stats of the pipeline also counted in the Prometheus metrics, which outlive
+# the crawl.
+STAT_METRICS = {
+    "freework/offers_written": metrics.CRAWL_OFFERS.labels("written"),
+    "freework/offers_unchanged": metrics.CRAWL_OFFERS.labels("unchanged"),
+    "freework/offers_duplicate": metrics.CRAWL_OFFERS.labels("duplicate"),
+    "freework/batches_written": metrics.CRAWL_BATCHES.labels(),
+    "freework/write_seconds": metrics.CRAWL_WRITE_DURATION.labels(),
+}
+
+
+class JobOfferPipeline:
+    """Buffer scraped offers and upsert them in batches through the Django ORM.
+
+    Each batch is written with a single ``bulk_create(update_conflicts=True)``
+    inside its own transaction instead of one ``save()`` per item. Offers
+    whose content fingerprint matches the stored one are not written at all.
+
+    A batch failing with an ``OperationalError`` (SQLite's "database is
+    locked" when shards compete for the write lock, a lost PostgreSQL
+    connection) is written again, up to ``write_retries`` times.
+
+    In a sharded crawl, ``dedup`` is the store shared by all the shards and
+    only the offers claimed by this process are written. The claims of a
+    batch that could not be written are released.
+
+    Written offers are indexed for full-text search and clustered with their
+    near duplicates in the same transaction.
+    When the crawl ends, the daily statistics of the days on which written
+    offers are (or were) published are recomputed once, then the data version
+    is bumped so that the cached dashboard fragments are rendered again.
+    """
+
+    def __init__(self, batch_size=500, stats=None, dedup=None, write_retries=2):
+        self.batch_size = max(1, batch_size)
+        self.stats = stats
+        self.dedup = dedup
+        self.write_retries = max(0, write_retries)
+        self.buffer = {}
+        self.fingerprints = {}
+        self.names = {}
+        self.touched_days = set()
+        self.changed = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        dedup_db = crawler.settings.get("FREEWORK_DEDUP_DB")
+        return cls(
+            batch_size=crawler.settings.getint("FREEWORK_BATCH_SIZE", 500),
+            stats=crawler.stats,
+            dedup=SharedFingerprintStore(dedup_db) if dedup_db else None,
+            write_retries=crawler.settings.getint("FREEWORK_WRITE_RETRIES", 2),
+        )
+
+    def open_spider(self, spider=None):
+        self.buffer = {}
+        self.touched_days = set()
+        self.changed = False
+        # Loaded once per crawl: one query instead of one lookup per item.
+        # HTTP validators are kept next to the fingerprint so that a new ETag
+        # is persisted even when the content itself did not change.
+        self.fingerprints = {
+            external_id: state
+            for external_id, *state in JobOffer.objects.values_list(
+                "external_id", "fingerprint", "etag", "last_modified"
+            )
+        }
+        # Name -> primary key of the related rows, completed as new names
+        # show up.
+        self.names = {
+            model: dict(model.objects.values_list("name", "pk"))
+            for model in (Company, Location, Skill)
+        }
+
+    def process_item(self, item, spider=None):
+        if self.buffer_item(item):
+            self.flush()
+        return item
+
+    def close_spider(self, spider=None):
+        self.flush()
+        self.finish()
+        self.close_dedup()
+
+    def buffer_item(self, item):
+        """Buffer the item if it is new or changed; return True once full."""
+        fields = ItemAdapter(item).asdict()
+        fields["fingerprint"] = offer_fingerprint(fields)
+        external_id = fields["external_id"]
+        if self.fingerprints.get(external_id) == self.state(fields):
+            self.inc_stat("freework/offers_unchanged")
+            return False
+        # Keyed by external id so an offer seen twice in a batch is only
+        # written once (PostgreSQL rejects an upsert touching a row twice).
+        self.buffer[external_id] = fields
+        return len(self.buffer) >= self.batch_size
+
+    def flush(self):
+        if self.buffer:
+            batch, self.buffer = self.buffer, {}
+            self.write(batch)
+
+    def write(self, batch):
+        """Write a batch of offers in a single transaction."""
+        started = time.perf_counter()
+        if self.dedup is not None:
+            claimed = self.dedup.claim(
+                {
+                    external_id: fields["fingerprint"]
+                    for external_id, fields in batch.items()
+                }
+            )
+            self.inc_stat("freework/offers_duplicate", len(batch) - len(claimed))
+            batch = {external_id: batch[external_id] for external_id in claimed}
+        try:
+            offers = self.write_with_retries(batch)
+        except BaseException:
+            if self.dedup is not None:
+                self.dedup.release(
+                    {
+                        external_id: fields["fingerprint"]
+                        for external_id, fields in batch.items()
+                    }
+                )
+            raise
+        for external_id, fields in batch.items():
+            self.fingerprints[external_id] = self.state(fields)
+        self.changed = self.changed or bool(offers)
+        self.inc_stat("freework/offers_written", len(offers))
+        self.inc_stat("freework/batches_written")
+        self.inc_stat("freework/write_seconds", time.perf_counter() - started)
+
+    def write_with_retries(self, batch):
+        for attempt in range(self.write_retries + 1):
+            # A crawl has no request boundaries: treat each attempt as one so
+            # that CONN_MAX_AGE and CONN_HEALTH_CHECKS apply to the long-lived
+            # connection, and a broken one is replaced.
+            close_old_connections()
+            try:
+                return self.write_offers(batch)
+            except OperationalError as error:
+                if attempt == self.write_retries:
+                    raise
+                logger.warning(
+                    "Retrying a batch of %(count)d offers: %(error)s",
+                    {"count": len(batch), "error": error},
+                )
+                self.inc_stat("freework/write_retries")
+
+    def write_offers(self, batch):
+        """Upsert ``batch`` and what depends on its offers; return the offers."""
+        offers = []
+        skills = {}
+        with transaction.atomic():
+            # An offer moved to another day must leave its previous day too.
+            self.touch(
+                JobOffer.objects.filter(
+                    external_id__in=batch, published_at__isnull=False
+                ).values_list("published_at", flat=True)
+            )
+            self.touch(f.get("published_at") for f in batch.values())
+            companies = self.resolve(
+                Company, [f.get("company") for f in batch.values()]
+            )
+            locations = self.resolve(
+                Location, [f.get("location") for f in batch.values()]
+            )
+            skill_ids = self.resolve(
+                Skill, [name for f in batch.values() for name in f.get("skills") or ()]
+            )
+            for external_id, fields in batch.items():
+                fields = dict(fields)
+                skills[external_id] = {
+                    skill_ids[name] for name in fields.pop("skills", None) or () if name
+                }
+                fields["company_id"] = companies.get(fields.pop("company", None))
+                fields["location_id"] = locations.get(fields.pop("location", None))
+                offers.append(JobOffer(**fields))
+            JobOffer.objects.bulk_create(
+                offers,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=["external_id"],
+                update_fields=UPDATE_FIELDS,
+            )
+            offer_ids = dict(
+                JobOffer.objects.filter(external_id__in=batch).values_list(
+                    "external_id", "pk"
+                )
+            )
+            self.write_skills(offer_ids, skills)
+            search.index(offer_ids.values())
+            duplicates.index(offer_ids.values())
+        return offers
+
+    def resolve(self, model, names):
+        """Return ``{name: pk}`` for ``names``, creating the missing rows."""
+        known = self.names[model]
+        missing = {name for name in names if name and name not in known}
+        if not missing:
+            return known
+        model.objects.bulk_create(
+            [model(name=name) for name in missing], ignore_conflicts=True
+        )
+        created = dict(model.objects.filter(name__in=missing).values_list("name", "pk"))
+        # Rows created by a batch rolled back do not exist.
+        transaction.on_commit(lambda: known.update(created))
+        return {**known, **created}
+
+    def write_skills(self, offer_ids, skills):
+        """Replace the skills of the offers in ``{external_id: skill_ids}``."""
+        OfferSkill = JobOffer.skills.through
+        OfferSkill.objects.filter(joboffer_id__in=offer_ids.values()).delete()
+        OfferSkill.objects.bulk_create(
+            [
+                OfferSkill(joboffer_id=offer_ids[external_id], skill_id=skill_id)
+                for external_id, skill_ids in skills.items()
+                for skill_id in skill_ids
+            ]
+        )
+
+    def touch(self, published_ats):
+        self.touched_days.update(
+            aggregates.publication_day(published_at)
+            for published_at in published_ats
+            if published_at is not None
+        )
+
+    def finish(self):
+        """Update what depends on the offers, once they are all written."""
+        if not self.changed:
+            return
+        close_old_connections()
+        if self.touched_days:
+            aggregates.refresh_days(self.touched_days)
+            self.inc_stat("freework/aggregate_days_refreshed", len(self.touched_days))
+            self.touched_days = set()
+        version = data_version.bump()
+        if self.stats is not None:
+            self.stats.set_value("freework/data_version", version)
+        self.changed = False
+
+    @staticmethod
+    def state(fields):
+        return [
+            fields["fingerprint"],
+            fields.get("etag", ""),
+            fields.get("last_modified", ""),
+        ]
+
+    def close_dedup(self):
+        if self.dedup is not None:
+            self.dedup.close()
+
+    def inc_stat(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+        if key in STAT_METRICS:
+            STAT_METRICS[key].inc(count)
+
+
+class ThreadedJobOfferPipeline(JobOfferPipeline):
+    """Write batches from a dedicated thread so the reactor never blocks.
+
+    The Django ORM is synchronous: written on the reactor thread, a slow
+    database stalls every download. Here full batches are handed to the
+    crawl's ``DatabaseWriter`` thread, which keeps its own connection. At most
+    ``FREEWORK_MAX_PENDING_BATCHES`` batches may wait for it; beyond that,
+    items wait for the oldest batch to be written (backpressure).
+
+    A batch that fails to be written is logged, and reported with the
+    ``item_error`` signal for each of its items; the other batches are
+    written, and what depends on them updated, as usual.
+
+    Without a ``writer``, the pipeline starts and stops one of its own.
+    """
+
+    def __init__(
+        self,
+        batch_size=500,
+        stats=None,
+        dedup=None,
+        write_retries=2,
+        max_pending=2,
+        writer=None,
+    ):
+        super().__init__(
+            batch_size=batch_size,
+            stats=stats,
+            dedup=dedup,
+            write_retries=write_retries,
+        )
+        self.max_pending = max(1, max_pending)
+        self.pending = deque()
+        # Items of the buffered offers, by external id.
+        self.items = {}
+        self.crawler = None
+        self.own_writer = writer is None
+        self.writer = DatabaseWriter() if writer is None else writer
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = super().from_crawler(crawler)
+        pipeline.max_pending = max(
+            1, crawler.settings.getint("FREEWORK_MAX_PENDING_BATCHES", 2)
+        )
+        pipeline.crawler = crawler
+        pipeline.own_writer = False
+        pipeline.writer = database_writer(crawler)
+        return pipeline
+
+    async def process_item(self, item, spider=None):
+        full = self.buffer_item(item)
+        external_id = ItemAdapter(item)["external_id"]
+        if external_id in self.buffer:
+            self.items[external_id] = item
+        if full:
+            self.flush()
+            if len(self.pending) >= self.max_pending:
+                self.inc_stat("freework/writer_waits")
+                await maybe_deferred_to_future(self.pending.popleft())
+        return item
+
+    def close_spider(self, spider=None):
+        self.flush()
+        pending, self.pending = list(self.pending), deque()
+        # Failed batches are already reported: the offers written by the
+        # others still need their aggregates and a new data version.
+        dfd = DeferredList(pending, consumeErrors=True)
+        dfd.addCallback(self.finish_in_writer)
+        dfd.addBoth(self.stop_writer)
+        return dfd
+
+    def flush(self):
+        if self.buffer:
+            batch, self.buffer = self.buffer, {}
+            items, self.items = self.items, {}
+            written = self.writer.run(self.write, batch)
+            written.addErrback(self.write_failed, items)
+            self.pending.append(written)
+
+    def write_failed(self, failure, items):
+        """Report a batch that could not be written on each of its items."""
+        spider = self.crawler.spider if self.crawler is not None else None
+        logger.error(
+            "Failed to write a batch of %(count)d offers",
+            {"count": len(items)},
+            exc_info=failure_to_exc_info(failure),
+            extra={"spider": spider},
+        )
+        self.inc_stat("freework/offers_failed", len(items))
+        if self.crawler is not None:
+            for item in items.values():
+                self.crawler.signals.send_catch_log(
+                    signal=signals.item_error,
+                    item=item,
+                    response=None,
+                    spider=spider,
+                    failure=failure,
+                )
+
+    def finish_in_writer(self, result):
+        # After the last batch, on the thread that wrote the offers.
+        return self.writer.run(self.finish)
+
+    def stop_writer(self, result):
+        if self.own_writer:
+            self.writer.stop()
+        self.close_dedup()
+        return result
@@ -0,0 +1,129 @@
+"""
+Project: freework
+
+Scrapy settings for the free-work.com crawler.
+
+The crawler writes through the Django ORM, so Django is configured before any
+pipeline is loaded. The complete list of Scrapy settings is available here:
+https://docs.scrapy.org/en/latest/topics/settings.html
+"""
+
+import os
+
+import django
+from django.conf import settings as django_settings
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
+# The asyncio reactor runs an event loop in the main thread, which makes Django
+# refuse synchronous ORM calls there. Writes run on the crawl's writer thread
+# (freework.scraper.writer), but the spider, the pipeline and the throttle read
+# on the reactor thread when the crawl starts, so the check is lifted.
+os.environ.setdefault("DJANGO_ALLOW_ASYNC_UNSAFE", "true")
+django.setup()
+
+BOT_NAME = "freework"
+
+SPIDER_MODULES = ["freework.scraper.spiders"]
+NEWSPIDER_MODULE = "freework.scraper.spiders"
+
+# Obey robots.txt rules
+# https://docs.scrapy.org/en/latest/topics/settings.html#robotstxt-obey
+ROBOTSTXT_OBEY = True
+
+# Parser used to extract offers from listing and detail pages, see
+# freework.scraper.parsers.
+FREEWORK_PARSER = "freework.scraper.parsers.LxmlParser"
+
+# Item pipelines
+# https://docs.scrapy.org/en/latest/topics/item-pipeline.html
+ITEM_PIPELINES = {
+    "freework.scraper.pipelines.ThreadedJobOfferPipeline": 300,
+}
+
+# Number of offers buffered by the pipeline before they are upserted in a
+# single transaction.
+FREEWORK_BATCH_SIZE = 500
+
+# Number of times a batch failing with a database OperationalError (such as
+# "database is locked" when shards compete for SQLite's write lock) is written
+# again before its offers are reported as failed.
+FREEWORK_WRITE_RETRIES = 2
+
+# Number of batches allowed to wait for the writer thread before items are
+# held back.
+FREEWORK_MAX_PENDING_BATCHES = 2
+
+# Crawl telemetry: every crawl is recorded as a CrawlRun with a snapshot of its
+# rates every FREEWORK_TELEMETRY_INTERVAL seconds, written to the database
+# FREEWORK_TELEMETRY_FLUSH_EVERY snapshots at a time.
+# https://docs.scrapy.org/en/latest/topics/extensions.html
+EXTENSIONS = {
+    "freework.scraper.extensions.CrawlTelemetry": 500,
+}
+FREEWORK_TELEMETRY_ENABLED = True
+FREEWORK_TELEMETRY_INTERVAL = 10.0
+FREEWORK_TELEMETRY_FLUSH_EVERY = 3
+
+# Crawl frontier: pending and seen requests are kept in
+# FREEWORK_FRONTIER_DIR/<spider>.sqlite3 so that an interrupted crawl resumes on
+# the next run, see freework.scraper.frontier. The directory is the Django
+# setting FREEWORK_FRONTIER_PATH, wherever the crawl is started from.
+# https://docs.scrapy.org/en/latest/topics/scheduler.html
+SCHEDULER = "freework.scraper.frontier.SqliteFrontierScheduler"
+SPIDER_MIDDLEWARES = {
+    # Before HttpErrorMiddleware, to also see the responses it filters out.
+    "freework.scraper.frontier.FrontierMiddleware": 10,
+}
+FREEWORK_FRONTIER_DIR = str(django_settings.FREEWORK_FRONTIER_PATH)
+FREEWORK_FRONTIER_BATCH_SIZE = 500
+
+# Adaptive throttle: the concurrency and delay of each host follow its latency
+# and its 429/503 responses, between 1 and CONCURRENT_REQUESTS_PER_DOMAIN and
+# between DOWNLOAD_DELAY and FREEWORK_THROTTLE_MAX_DELAY, and are saved for
+# the next crawl, see freework.scraper.throttle. Requests held back for a host
+# count in CONCURRENT_REQUESTS while they wait.
+# https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
+DOWNLOADER_MIDDLEWARES = {
+    # Next to the engine, to only see the exceptions of the failed downloads
+    # that RetryMiddleware gives up on.
+    "freework.scraper.frontier.FrontierMiddleware": 10,
+    # Next to the download handler, to see the responses before the retries.
+    "freework.scraper.throttle.AdaptiveThrottle": 950,
+}
+FREEWORK_THROTTLE_ENABLED = True
+# Concurrency of a host crawled for the first time.
+FREEWORK_THROTTLE_START_CONCURRENCY = 4
+FREEWORK_THROTTLE_MAX_DELAY = 60.0
+# Latency, relative to the lowest seen, beyond which a host is slowed down.
+FREEWORK_THROTTLE_LATENCY_TOLERANCE = 2.0
+# Seconds a host stays below the concurrency at which it answered 429 or 503
+# before it is tried again.
+FREEWORK_THROTTLE_PROBE_INTERVAL = 300.0
+
+REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
+TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
+FEED_EXPORT_ENCODING = "utf-8"
+
+# HTTP cache
+# Disabled by default, enable it with -s HTTPCACHE_ENABLED=1 to replay a
+# previous crawl while working on the parsers.
+# https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
+HTTPCACHE_ENABLED = False
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_STORAGE = "freework.scraper.httpcache.SqliteCacheStorage"
+# A cached 304 would answer a later unconditional request with an empty body.
+HTTPCACHE_IGNORE_HTTP_CODES = [304, 429, 500, 502, 503, 504]
+# Fallback expiration for URLs matching none of FREEWORK_HTTPCACHE_TTLS
+# (0 means never).
+HTTPCACHE_EXPIRATION_SECS = 0
+
+# Expiration in seconds per URL regular expression, first match wins: listings
+# change several times a day, offer details rarely do.
+FREEWORK_HTTPCACHE_TTLS = {
+    r"/jobs(\?|$)": 60 * 60,
+    r"/job-mission/": 7 * 24 * 60 * 60,
+}
+
+# Size budget of the cache file, least recently used responses are evicted
+# beyond it.
+FREEWORK_HTTPCACHE_MAX_BYTES = 512 * 1024 * 1024
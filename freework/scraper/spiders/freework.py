@@ -0,0 +1,122 @@
+from urllib.parse import urlparse
+
+import scrapy
+from scrapy.utils.misc import load_object
+
+from freework.offers.models import JobOffer
+from freework.scraper.items import JobOfferItem
+
+START_URL = "https://www.free-work.com/fr/tech-it/jobs"
+
+# Request priorities: listing pages first, then the offers not seen yet, then
+# the known offers, which are the most likely to be unchanged.
+LISTING_PRIORITY = 10
+NEW_OFFER_PRIORITY = 0
+KNOWN_OFFER_PRIORITY = -10
+
+
+def as_bool(value):
+    """Interpret a spider argument given on the command line (``-a``)."""
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+class FreeWorkSpider(scrapy.Spider):
+    """Crawl the free-work.com job listing and its offer detail pages.
+
+    In incremental mode, pagination stops after the first listing page that
+    contains an offer already stored with the same publication date, and
+    detail pages are requested with the validators saved on the previous
+    crawl so that unchanged pages come back as ``304 Not Modified``.
+
+    ``seeds`` (a list or a comma-separated string of listing URLs) replaces
+    ``start_url``: each seed is crawled without following its pagination, which
+    is how the listing is split between the shards of a sharded crawl.
+    """
+
+    name = "freework"
+
+    def __init__(
+        self, start_url=START_URL, incremental=False, seeds=None, *args, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        if isinstance(seeds, str):
+            seeds = seeds.split(",")
+        self.seeds = seeds or [start_url]
+        self.follow_pagination = not seeds
+        self.allowed_domains = sorted({urlparse(url).hostname for url in self.seeds})
+        self.incremental = as_bool(incremental)
+        self.known_offers = {}
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.parser = load_object(crawler.settings["FREEWORK_PARSER"])()
+        return spider
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        if self.incremental:
+            self.known_offers = {
+                external_id: (published_at, etag, last_modified)
+                for external_id, published_at, etag, last_modified in (
+                    JobOffer.objects.values_list(
+                        "external_id", "published_at", "etag", "last_modified"
+                    )
+                )
+            }
+        for url in self.seeds:
+            yield scrapy.Request(url, callback=self.parse, priority=LISTING_PRIORITY)
+
+    def parse(self, response):
+        cards, next_page = self.parser.parse_listing(response)
+        reached_known = False
+        for card in cards:
+            known = self.known_offers.get(card["external_id"])
+            if known is not None and known[0] == card["published_at"]:
+                reached_known = True
+            yield self.detail_request(card["url"], known)
+
+        if self.incremental and reached_known:
+            self.crawler.stats.inc_value("freework/pagination_stopped")
+            return
+        if next_page and self.follow_pagination:
+            yield scrapy.Request(
+                next_page, callback=self.parse, priority=LISTING_PRIORITY
+            )
+
+    def detail_request(self, url, known):
+        headers = {}
+        if self.incremental and known is not None:
+            _, etag, last_modified = known
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return scrapy.Request(
+            url,
+            headers=headers,
+            callback=self.parse_offer,
+            priority=NEW_OFFER_PRIORITY if known is None else KNOWN_OFFER_PRIORITY,
+            meta={"handle_httpstatus_list": [304]},
+        )
+
+    def parse_offer(self, response):
+        if response.status == 304:
+            self.crawler.stats.inc_value("freework/not_modified")
+            return
+        fields = self.parser.parse_offer(response)
+        if fields is None:
+            self.logger.warning("No offer found on %s", response.url)
+            self.crawler.stats.inc_value("freework/no_offer")
+            return
+        yield JobOfferItem(
+            url=response.url,
+            etag=response.headers.get("ETag", b"").decode(),
+            last_modified=response.headers.get("Last-Modified", b"").decode(),
+            **fields,
+        )
@@ -0,0 +1,59 @@
+"""
+Helpers of the crawler tests.
+
+Crawls run on a reactor installed and started once per test process, on a
+thread of its own, while the test waits for them on the main thread.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+
+from twisted.internet.threads import blockingCallFromThread
+
+_reactor = None
+
+
+def get_reactor():
+    """Install the reactor of the project settings and run it in a thread."""
+    global _reactor
+    if _reactor is None:
+        os.environ["SCRAPY_SETTINGS_MODULE"] = "freework.scraper.settings"
+        from scrapy.utils.project import get_project_settings
+        from scrapy.utils.reactor import install_reactor
+
+        install_reactor(get_project_settings()["TWISTED_REACTOR"])
+        from twisted.internet import reactor
+
+        threading.Thread(
+            target=reactor.run,
+            kwargs={"installSignalHandlers": False},
+            name="reactor",
+            daemon=True,
+        ).start()
+        _reactor = reactor
+    return _reactor
+
+
+def crawl(spider_cls, settings=None, **kwargs):
+    """Crawl with ``spider_cls`` until it closes and return its crawler."""
+    reactor = get_reactor()
+    from scrapy.crawler import CrawlerRunner
+    from scrapy.utils.project import get_project_settings
+
+    project_settings = get_project_settings()
+    project_settings.set("LOG_LEVEL", "WARNING")
+    project_settings.set("ROBOTSTXT_OBEY", False)
+    project_settings.set("TELNETCONSOLE_ENABLED", False)
+    project_settings.set("FREEWORK_FRONTIER_DIR", tempfile.mkdtemp())
+    for name, value in (settings or {}).items():
+        project_settings.set(name, value)
+    logging.getLogger("scrapy").setLevel(logging.WARNING)
+
+    def start():
+        runner = CrawlerRunner(project_settings)
+        crawler = runner.create_crawler(spider_cls)
+        return runner.crawl(crawler, **kwargs).addCallback(lambda _: crawler)
+
+    return blockingCallFromThread(reactor, start)
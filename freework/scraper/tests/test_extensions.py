@@ -0,0 +1,39 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from scrapy.utils.test import get_crawler
+
+from freework.crawls.models import CrawlRun
+from freework.scraper.extensions import CrawlTelemetry
+
+
+class CrawlTelemetryTests(TestCase):
+    def test_closing_without_a_run_writes_nothing(self):
+        writer = mock.Mock()
+        telemetry = CrawlTelemetry(get_crawler().stats, writer)
+
+        self.assertIsNone(telemetry.spider_closed(spider=None, reason="shutdown"))
+        writer.run.assert_not_called()
+
+    def test_new_run_fails_the_stale_ones(self):
+        stale = CrawlRun.objects.create(spider="freework")
+        alive = CrawlRun.objects.create(spider="freework")
+        updated_at = timezone.now() - timedelta(hours=1)
+        CrawlRun.objects.filter(pk=stale.pk).update(updated_at=updated_at)
+
+        with (
+            mock.patch("freework.scraper.extensions.close_old_connections"),
+            self.assertLogs("freework.scraper.extensions", "WARNING"),
+        ):
+            run = CrawlTelemetry.create_run(spider="freework")
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, CrawlRun.Status.FAILED)
+        self.assertEqual(stale.finish_reason, "stale")
+        self.assertEqual(stale.finished_at, updated_at)
+        self.assertEqual(
+            set(CrawlRun.objects.running().values_list("pk", flat=True)),
+            {alive.pk, run.pk},
+        )
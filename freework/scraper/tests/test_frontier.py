@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from django.test import TransactionTestCase
+from scrapy import Request, Spider
+from scrapy.utils.test import get_crawler
+from twisted.internet.error import ConnectionRefusedError
+
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import LISTING_PATH, build_site
+from freework.offers.models import JobOffer
+from freework.scraper.frontier import FrontierMiddleware, SqliteFrontierScheduler
+from freework.scraper.spiders.freework import FreeWorkSpider
+from freework.scraper.tests import crawl
+
+URL = "https://www.free-work.com/fr/tech-it/job-mission/offer-1"
+
+
+class SqliteFrontierSchedulerTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.directory = Path(self.tmpdir.name, "frontier")
+
+    def test_directory_does_not_depend_on_the_working_directory(self):
+        cwd = os.getcwd()
+        # Outside of the Scrapy project: no scrapy.cfg to find.
+        os.chdir(self.tmpdir.name)
+        self.addCleanup(os.chdir, cwd)
+
+        scheduler = SqliteFrontierScheduler.from_crawler(
+            get_crawler(settings_dict={"FREEWORK_FRONTIER_DIR": str(self.directory)})
+        )
+
+        self.assertEqual(scheduler.directory, self.directory)
+        self.assertTrue(self.directory.is_dir())
+
+    def test_each_shard_has_its_directory(self):
+        scheduler = SqliteFrontierScheduler.from_crawler(
+            get_crawler(
+                settings_dict={
+                    "FREEWORK_FRONTIER_DIR": str(self.directory),
+                    "FREEWORK_FRONTIER_SHARD": 2,
+                }
+            )
+        )
+
+        self.assertEqual(scheduler.directory, self.directory / "shard-2")
+        self.assertTrue(scheduler.directory.is_dir())
+
+    def open(self):
+        crawler = get_crawler(
+            settings_dict={
+                "FREEWORK_FRONTIER_DIR": str(self.directory),
+                "FREEWORK_FRONTIER_BATCH_SIZE": 1,
+            }
+        )
+        scheduler = SqliteFrontierScheduler.from_crawler(crawler)
+        scheduler.open(Spider("frontier"))
+        self.addCleanup(scheduler.db.close)
+        return scheduler, FrontierMiddleware.from_crawler(crawler)
+
+    def stored(self, scheduler):
+        scheduler.flush()
+        return [
+            url
+            for (url,) in scheduler.db.execute(
+                "SELECT json_extract(request, '$.url') FROM requests"
+            )
+        ]
+
+    def test_failed_downloads_are_processed(self):
+        scheduler, middleware = self.open()
+        scheduler.enqueue_request(Request(URL))
+        request = scheduler.next_request()
+
+        middleware.process_exception(request, ConnectionRefusedError())
+
+        self.assertEqual(self.stored(scheduler), [])
+
+    def test_retries_and_redirects_replace_their_request(self):
+        scheduler, middleware = self.open()
+        scheduler.enqueue_request(Request(URL))
+        scheduler.enqueue_request(Request(f"{URL}-moved"))
+        retried, redirected = scheduler.next_request(), scheduler.next_request()
+
+        # As RetryMiddleware and RedirectMiddleware do.
+        scheduler.enqueue_request(retried.replace(dont_filter=True))
+        scheduler.enqueue_request(redirected.replace(url=URL))
+
+        # The redirect was filtered as already seen.
+        self.assertEqual(self.stored(scheduler), [URL])
+        retry = scheduler.next_request()
+        middleware.done(retry)
+        self.assertEqual(self.stored(scheduler), [])
+
+
+class FrontierResumeTests(TransactionTestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = tmpdir.name
+        self.path = Path(self.directory, f"{FreeWorkSpider.name}.sqlite3")
+
+    def test_interrupted_crawl_resumes(self):
+        with FixtureServer(build_site(30, per_page=10)) as server:
+            settings = {"FREEWORK_FRONTIER_DIR": self.directory}
+            start_url = server.url + LISTING_PATH
+            crawl(
+                FreeWorkSpider,
+                {**settings, "CLOSESPIDER_ITEMCOUNT": 5},
+                start_url=start_url,
+            )
+            with sqlite3.connect(self.path) as db:
+                ((pending,),) = db.execute("SELECT COUNT(*) FROM requests")
+            hits = server.hits
+
+            crawler = crawl(FreeWorkSpider, settings, start_url=start_url)
+
+        # 3 listing pages and 30 offers, some done by the first crawl.
+        self.assertLess(hits, 33)
+        self.assertEqual(crawler.stats.get_value("frontier/resumed"), pending)
+        # Only the requests left by the first crawl are fetched again.
+        self.assertEqual(server.hits - hits, pending)
+        self.assertEqual(JobOffer.objects.count(), 30)
+        # The finished crawl deleted its frontier.
+        self.assertFalse(self.path.exists())
@@ -0,0 +1,127 @@
+import random
+import tempfile
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from scrapy import Request
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from freework.scraper.httpcache import SqliteCacheStorage
+
+JOBS_URL = "https://www.free-work.com/fr/tech-it/jobs?page=1"
+OFFER_URL = "https://www.free-work.com/fr/tech-it/job-mission/developpeur-python"
+
+
+class SqliteCacheStorageTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.crawler = get_crawler(
+            settings_dict={
+                "HTTPCACHE_DIR": tmpdir.name,
+                "HTTPCACHE_EXPIRATION_SECS": 3600,
+                # Listings change often, offers never once posted.
+                "FREEWORK_HTTPCACHE_TTLS": {r"/jobs\b": 60, r"/job-mission/": 0},
+                "FREEWORK_HTTPCACHE_MAX_BYTES": 0,
+            }
+        )
+        self.spider = SimpleNamespace(name="freework", crawler=self.crawler)
+        self.now = 1_000_000.0
+        patcher = mock.patch("freework.scraper.httpcache.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage = self.open()
+
+    def open(self):
+        storage = SqliteCacheStorage(self.crawler.settings)
+        storage.open_spider(self.spider)
+        self.addCleanup(storage.db.close)
+        return storage
+
+    def store(self, url, body=b"<html><body>Offre</body></html>"):
+        response = HtmlResponse(
+            url, status=200, headers={"Content-Type": "text/html"}, body=body
+        )
+        self.storage.store_response(self.spider, Request(url), response)
+
+    def retrieve(self, url):
+        return self.storage.retrieve_response(self.spider, Request(url))
+
+    def stored(self):
+        return {url for (url,) in self.storage.db.execute("SELECT url FROM responses")}
+
+    def test_store_and_retrieve(self):
+        body = b"<li>Offre Python</li>" * 500
+        self.store(OFFER_URL, body)
+        self.now += 10
+
+        response = self.retrieve(OFFER_URL)
+
+        self.assertIsInstance(response, HtmlResponse)
+        self.assertEqual(response.url, OFFER_URL)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.headers["Content-Type"], b"text/html")
+        self.assertEqual(response.body, body)
+        self.assertIsNone(self.retrieve(JOBS_URL))
+        # The body is compressed.
+        ((stored_body,),) = self.storage.db.execute("SELECT body FROM responses")
+        self.assertLess(len(stored_body), len(body) / 10)
+
+    def test_responses_survive_a_restart(self):
+        self.store(OFFER_URL)
+        self.storage.close_spider(self.spider)
+
+        self.storage = self.open()
+
+        self.assertEqual(self.retrieve(OFFER_URL).status, 200)
+        self.assertGreater(self.storage.total_bytes, 0)
+
+    def test_expiration_depends_on_the_url(self):
+        other_url = "https://www.free-work.com/fr/tech-it/companies"
+        for url in (JOBS_URL, OFFER_URL, other_url):
+            self.store(url)
+
+        self.now += 60
+        self.assertIsNotNone(self.retrieve(JOBS_URL))
+        self.now += 1
+        self.assertIsNone(self.retrieve(JOBS_URL))
+        # HTTPCACHE_EXPIRATION_SECS when no pattern matches.
+        self.assertIsNotNone(self.retrieve(other_url))
+        self.now += 3600
+        self.assertIsNone(self.retrieve(other_url))
+        # A TTL of 0 never expires.
+        self.now += 365 * 24 * 3600
+        self.assertIsNotNone(self.retrieve(OFFER_URL))
+
+    def test_least_recently_used_responses_are_evicted(self):
+        # Incompressible bodies, so that every response takes the same size.
+        bodies = random.Random(0)
+        urls = [f"{OFFER_URL}-{i}" for i in range(5)]
+        self.store(urls[0], bodies.randbytes(1000))
+        size = self.storage.total_bytes
+        # Room for 4 responses, eviction down to 0.9 x 4.2 = 3.78 responses.
+        self.storage.max_bytes = int(4.2 * size)
+        for url in urls[1:4]:
+            self.now += 1
+            self.store(url, bodies.randbytes(1000))
+        self.now += 1
+        self.retrieve(urls[0])
+        self.assertEqual(self.stored(), set(urls[:4]))
+
+        self.now += 1
+        self.store(urls[4], bodies.randbytes(1000))
+
+        # 1 and 2 were the least recently used, 0 was just read.
+        self.assertEqual(self.stored(), {urls[0], urls[3], urls[4]})
+        self.assertEqual(self.storage.total_bytes, 3 * size)
+        ((total,),) = self.storage.db.execute("SELECT SUM(size) FROM responses")
+        self.assertEqual(total, self.storage.total_bytes)
+
+    def test_replacing_a_response_updates_the_stored_size(self):
+        self.store(OFFER_URL, random.Random(0).randbytes(1000))
+        self.store(OFFER_URL, b"")
+
+        ((total,),) = self.storage.db.execute("SELECT SUM(size) FROM responses")
+        self.assertEqual(self.storage.total_bytes, total)
+        self.assertLess(total, 1000)
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+from unittest import TestCase
+
+from scrapy.http import HtmlResponse
+
+from benchmarks.fixtures import LISTING_PATH, build_site
+from freework.scraper.parsers import LxmlParser, ParselParser
+
+BASE_URL = "https://www.free-work.com"
+
+
+def response(path, html):
+    return HtmlResponse(BASE_URL + path, body=html.encode(), encoding="utf-8")
+
+
+class ParserTests(TestCase):
+    def setUp(self):
+        self.pages = build_site(45)
+        self.parsers = [ParselParser(), LxmlParser()]
+
+    def parse(self, method, path, html=None):
+        """Return what ``method`` of every parser returns for the page."""
+        page = response(path, self.pages[path] if html is None else html)
+        return [getattr(parser, method)(page) for parser in self.parsers]
+
+    def test_listing(self):
+        parsel, lxml = self.parse("parse_listing", f"{LISTING_PATH}?page=1")
+
+        self.assertEqual(parsel, lxml)
+        cards, next_page = lxml
+        self.assertEqual(len(cards), 20)
+        self.assertEqual(
+            cards[0],
+            {
+                "external_id": "offer-44",
+                "url": f"{BASE_URL}/fr/tech-it/job-mission/offer-44",
+                "published_at": datetime(2024, 1, 2, 20, tzinfo=timezone.utc),
+            },
+        )
+        self.assertEqual(next_page, f"{BASE_URL}{LISTING_PATH}?page=2")
+
+    def test_last_listing_page(self):
+        parsel, lxml = self.parse("parse_listing", f"{LISTING_PATH}?page=3")
+
+        self.assertEqual(parsel, lxml)
+        cards, next_page = lxml
+        self.assertEqual(len(cards), 5)
+        self.assertIsNone(next_page)
+
+    def test_offers(self):
+        for path in self.pages:
+            if path.startswith(LISTING_PATH):
+                continue
+            with self.subTest(path):
+                parsel, lxml = self.parse("parse_offer", path)
+                self.assertEqual(parsel, lxml)
+
+        parsel, lxml = self.parse("parse_offer", "/fr/tech-it/job-mission/offer-1")
+        self.assertEqual(
+            {key: value for key, value in lxml.items() if key != "description"},
+            {
+                "external_id": "offer-1",
+                "title": "Développeur Django #1",
+                "company": "Société 1",
+                "contract_type": "Freelance",
+                "daily_rate": 351,
+                "location": "Lyon",
+                "skills": ["Django", "React"],
+                "published_at": datetime(2024, 1, 1, 1, tzinfo=timezone.utc),
+            },
+        )
+        self.assertTrue(lxml["description"].startswith("Mission Django révision 0."))
+
+    def test_page_without_a_single_offer(self):
+        offer = self.pages["/fr/tech-it/job-mission/offer-1"]
+        body = offer.partition("<body>")[2].partition("</body>")[0]
+        pages = {
+            "none": "<html><body><p>Cette offre n'existe plus.</p></body></html>",
+            "several": f"<html><body>{body}{body}</body></html>",
+        }
+        for name, html in pages.items():
+            with self.subTest(name):
+                self.assertEqual(
+                    self.parse("parse_offer", "/fr/tech-it/job-mission/x", html),
+                    [None, None],
+                )
+
+    def test_links_follow_the_base_url(self):
+        html = self.pages[f"{LISTING_PATH}?page=1"].replace(
+            "<head>", '<head><base href="https://cdn.free-work.com/">'
+        )
+
+        parsel, lxml = self.parse("parse_listing", f"{LISTING_PATH}?page=1", html)
+
+        self.assertEqual(parsel, lxml)
+        cards, next_page = lxml
+        self.assertEqual(
+            cards[0]["url"], "https://cdn.free-work.com/fr/tech-it/job-mission/offer-44"
+        )
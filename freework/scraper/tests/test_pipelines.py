@@ -0,0 +1,196 @@
+import tempfile
+from datetime import date, datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+from django.db import DatabaseError, OperationalError, transaction
+from django.test import TransactionTestCase
+from scrapy import signals
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+
+from freework.offers.models import Company, DailySkillStat, JobOffer
+from freework.scraper.dedup import SharedFingerprintStore
+from freework.scraper.items import JobOfferItem
+from freework.scraper.pipelines import ThreadedJobOfferPipeline
+from freework.scraper.tests import get_reactor
+
+
+class InlineWriter:
+    """Writer running the writes right away, on the calling thread."""
+
+    def run(self, function, *args, **kwargs):
+        return defer.maybeDeferred(function, *args, **kwargs)
+
+    def stop(self):
+        pass
+
+
+def offer_item(index):
+    return JobOfferItem(
+        external_id=f"offer-{index}",
+        url=f"https://www.free-work.com/fr/tech-it/job-mission/offer-{index}",
+        title=f"Offer {index}",
+        company="Company",
+        contract_type="Freelance",
+        daily_rate=500,
+        location="Paris",
+        skills=["Python"],
+        description="<p>Mission</p>",
+        published_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        etag="",
+        last_modified="",
+    )
+
+
+def process(pipeline, item):
+    """Run ``process_item``, which only waits for batches already written."""
+    coroutine = pipeline.process_item(item)
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise AssertionError("The item waited for the writer.")
+
+
+class ThreadedJobOfferPipelineTests(TransactionTestCase):
+    def setUp(self):
+        get_reactor()
+        self.crawler = get_crawler()
+        self.errors = []
+        self.crawler.signals.connect(self.item_error, signal=signals.item_error)
+        self.pipeline = ThreadedJobOfferPipeline(
+            batch_size=2, stats=self.crawler.stats, max_pending=1, writer=InlineWriter()
+        )
+        self.pipeline.crawler = self.crawler
+        self.pipeline.open_spider()
+
+    def item_error(self, item, response, spider, failure):
+        self.errors.append((item["external_id"], failure.value))
+
+    def test_failed_batch_is_reported_on_its_own_items(self):
+        write = self.pipeline.write
+
+        def fail_second_batch(batch):
+            if "offer-2" in batch:
+                raise DatabaseError("disk full")
+            return write(batch)
+
+        items = [offer_item(index) for index in range(6)]
+        with (
+            mock.patch.object(self.pipeline, "write", fail_second_batch),
+            self.assertLogs("freework.scraper.pipelines", "ERROR"),
+        ):
+            # Every item, including the ones waiting for the failed batch,
+            # goes through.
+            self.assertEqual([process(self.pipeline, item) for item in items], items)
+            closed = self.pipeline.close_spider()
+
+        self.assertTrue(closed.called)
+        self.assertEqual(
+            [(external_id, str(error)) for external_id, error in self.errors],
+            [("offer-2", "disk full"), ("offer-3", "disk full")],
+        )
+        self.assertEqual(
+            set(JobOffer.objects.values_list("external_id", flat=True)),
+            {"offer-0", "offer-1", "offer-4", "offer-5"},
+        )
+        stats = self.crawler.stats
+        self.assertEqual(stats.get_value("freework/offers_failed"), 2)
+        # The written offers are aggregated and the dashboard refreshed.
+        self.assertEqual(stats.get_value("freework/aggregate_days_refreshed"), 1)
+        self.assertIsNotNone(stats.get_value("freework/data_version"))
+
+    def test_locked_batch_is_written_again(self):
+        write_offers = self.pipeline.write_offers
+        attempts = []
+
+        def locked_once(batch):
+            attempts.append(batch)
+            if len(attempts) == 1:
+                with transaction.atomic():
+                    # Rolled back with the batch: created again on the retry.
+                    self.pipeline.resolve(Company, ["New company"])
+                    raise OperationalError("database is locked")
+            return write_offers(batch)
+
+        items = [offer_item(index) for index in range(2)]
+        items[0]["company"] = "New company"
+        with (
+            mock.patch.object(self.pipeline, "write_offers", locked_once),
+            self.assertLogs("freework.scraper.pipelines", "WARNING"),
+        ):
+            for item in items:
+                process(self.pipeline, item)
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(self.errors, [])
+        self.assertEqual(
+            JobOffer.objects.get(external_id="offer-0").company.name, "New company"
+        )
+        self.assertEqual(self.crawler.stats.get_value("freework/write_retries"), 1)
+
+    def test_offers_moved_to_another_day_leave_their_previous_day(self):
+        items = [offer_item(index) for index in range(2)]
+        for item in items:
+            process(self.pipeline, item)
+        self.assertTrue(self.pipeline.close_spider().called)
+        self.assertEqual(
+            list(DailySkillStat.objects.values_list("day", "offer_count")),
+            [(date(2024, 1, 1), 2)],
+        )
+
+        # The next crawl finds both offers published again on January 3.
+        pipeline = ThreadedJobOfferPipeline(
+            batch_size=2, stats=self.crawler.stats, writer=InlineWriter()
+        )
+        pipeline.crawler = self.crawler
+        pipeline.open_spider()
+        for item in items:
+            item["published_at"] = datetime(2024, 1, 3, tzinfo=timezone.utc)
+            process(pipeline, item)
+        self.assertTrue(pipeline.close_spider().called)
+
+        self.assertEqual(
+            list(DailySkillStat.objects.values_list("day", "offer_count")),
+            [(date(2024, 1, 3), 2)],
+        )
+
+
+class SharedClaimsTests(TransactionTestCase):
+    def setUp(self):
+        get_reactor()
+        path = Path(tempfile.mkdtemp(), "dedup.sqlite3")
+        self.shards = [self.shard(path) for _ in range(2)]
+
+    def shard(self, path):
+        crawler = get_crawler()
+        pipeline = ThreadedJobOfferPipeline(
+            batch_size=2,
+            stats=crawler.stats,
+            dedup=SharedFingerprintStore(str(path)),
+            write_retries=0,
+            writer=InlineWriter(),
+        )
+        pipeline.crawler = crawler
+        pipeline.open_spider()
+        self.addCleanup(pipeline.close_dedup)
+        return pipeline
+
+    def test_offers_of_a_failed_batch_are_left_to_other_shards(self):
+        failing, other = self.shards
+        items = [offer_item(index) for index in range(2)]
+        with (
+            mock.patch.object(
+                failing, "write_offers", side_effect=DatabaseError("disk full")
+            ),
+            self.assertLogs("freework.scraper.pipelines", "ERROR"),
+        ):
+            for item in items:
+                process(failing, item)
+        for item in items:
+            process(other, item)
+
+        self.assertEqual(failing.crawler.stats.get_value("freework/offers_failed"), 2)
+        self.assertEqual(other.crawler.stats.get_value("freework/offers_written"), 2)
+        self.assertEqual(JobOffer.objects.count(), 2)
@@ -0,0 +1,68 @@
+from django.test import TransactionTestCase
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.fixtures import LISTING_PATH, build_site
+from freework.offers.models import JobOffer
+from freework.scraper.spiders.freework import FreeWorkSpider
+from freework.scraper.tests import crawl
+
+
+class IncrementalCrawlTests(TransactionTestCase):
+    def test_unchanged_offers_are_not_modified(self):
+        with FixtureServer(build_site(30, per_page=10)) as server:
+            crawl(FreeWorkSpider, start_url=server.url + LISTING_PATH)
+            self.assertEqual(JobOffer.objects.count(), 30)
+            self.assertFalse(JobOffer.objects.filter(etag="").exists())
+
+            # The newest offer is edited, the rest of the first page is not.
+            server.publish(build_site(30, per_page=10, revisions={29: 1}))
+            hits = server.hits
+            crawler = crawl(
+                FreeWorkSpider,
+                start_url=server.url + LISTING_PATH,
+                incremental=True,
+            )
+
+        stats = crawler.stats.get_stats()
+        # The first listing page and its 10 offers, without pagination.
+        self.assertEqual(server.hits - hits, 11)
+        self.assertEqual(stats["freework/pagination_stopped"], 1)
+        self.assertEqual(stats["freework/not_modified"], 9)
+        self.assertEqual(stats["downloader/response_status_count/304"], 9)
+        self.assertEqual(stats["freework/offers_written"], 1)
+        self.assertIn(
+            "révision 1", JobOffer.objects.get(external_id="offer-29").description
+        )
+
+    def test_known_offers_are_requested_with_their_validators(self):
+        spider = FreeWorkSpider(incremental=True)
+        known = ("2024-01-01T00:00:00+00:00", '"abc"', "Mon, 01 Jan 2024 00:00:00 GMT")
+
+        request = spider.detail_request("https://example.com/offer", known)
+
+        self.assertEqual(request.headers["If-None-Match"], b'"abc"')
+        self.assertEqual(
+            request.headers["If-Modified-Since"], b"Mon, 01 Jan 2024 00:00:00 GMT"
+        )
+        self.assertEqual(request.meta["handle_httpstatus_list"], [304])
+        self.assertNotIn(
+            "If-None-Match",
+            FreeWorkSpider().detail_request("https://example.com/offer", known).headers,
+        )
+
+    def test_pages_without_an_offer_are_skipped(self):
+        crawler = get_crawler(
+            FreeWorkSpider,
+            {"FREEWORK_PARSER": "freework.scraper.parsers.LxmlParser"},
+        )
+        spider = FreeWorkSpider.from_crawler(crawler)
+        response = HtmlResponse(
+            "https://www.free-work.com/fr/tech-it/job-mission/gone",
+            body=b"<html><body><p>Cette offre n'existe plus.</p></body></html>",
+        )
+
+        with self.assertLogs(spider.logger.logger, "WARNING"):
+            self.assertEqual(list(spider.parse_offer(response)), [])
+        self.assertEqual(crawler.stats.get_value("freework/no_offer"), 1)
@@ -0,0 +1,241 @@
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from scrapy import Request
+from scrapy.http import Response
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+
+from freework.scraper.throttle import MIN_DELAY_STEP, AdaptiveThrottle, retry_after
+
+URL = "https://www.free-work.com/fr/tech-it/jobs"
+
+
+def run(coroutine):
+    """Run a ``process_request`` that lets its request through at once."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise AssertionError("The request was held back.")
+
+
+class AdaptiveThrottleTests(TestCase):
+    def setUp(self):
+        self.crawler = get_crawler()
+        self.throttle = AdaptiveThrottle(
+            self.crawler, start_concurrency=2, max_concurrency=8
+        )
+        self.slot = SimpleNamespace(delay=0.0)
+        self.throttle.downloader = SimpleNamespace(
+            slots={"www.free-work.com": self.slot}
+        )
+        self.state = self.throttle.state(Request(URL))
+
+    def respond(self, status=200, latency=0.1, headers=None):
+        request = Request(URL, meta={"download_latency": latency})
+        run(self.throttle.process_request(request))
+        return self.throttle.process_response(
+            request, Response(URL, status=status, headers=headers)
+        )
+
+    def fill(self):
+        """Send as many requests as the host takes, to make it busy."""
+        requests = [Request(URL) for _ in range(int(self.state.concurrency))]
+        for request in requests:
+            run(self.throttle.process_request(request))
+        return requests
+
+    def stat(self, name):
+        return self.crawler.stats.get_value(f"throttle/{name}", 0)
+
+    def test_busy_host_speeds_up(self):
+        self.fill()
+        self.state.active -= 1  # Room for the next response.
+
+        self.respond(latency=0.1)
+
+        self.assertAlmostEqual(self.state.concurrency, 2.5)
+        self.assertEqual(self.stat("increases"), 1)
+
+    def test_idle_host_does_not_speed_up(self):
+        self.respond(latency=0.1)
+
+        self.assertEqual(self.state.concurrency, 2)
+        self.assertEqual(self.stat("increases"), 0)
+
+    def test_speed_up_shrinks_the_delay_first(self):
+        self.state.delay = 1.0
+        self.fill()
+        self.state.active -= 1
+
+        self.respond(latency=0.1)
+
+        self.assertEqual(self.state.concurrency, 2)
+        self.assertAlmostEqual(self.state.delay, 0.8)
+        self.assertAlmostEqual(self.slot.delay, 0.8)
+
+    def test_growing_latency_cuts_concurrency_by_a_quarter(self):
+        self.state.concurrency = 4
+        self.respond(latency=0.1)
+
+        self.respond(latency=2.0)
+
+        self.assertEqual(self.state.concurrency, 3)
+        self.assertEqual(self.state.delay, 0.0)
+        self.assertEqual(self.stat("decreases"), 1)
+
+    def test_responses_to_earlier_requests_do_not_decrease_again(self):
+        self.state.concurrency = 4
+
+        self.respond(status=503, latency=1.0)
+        self.respond(status=503, latency=1.0)
+
+        self.assertEqual(self.state.concurrency, 2)
+        self.assertEqual(self.stat("decreases"), 1)
+
+    def test_throttled_response_halves_concurrency_and_pauses(self):
+        self.state.concurrency = 4
+
+        with mock.patch("twisted.internet.reactor.callLater") as call_later:
+            self.respond(status=429, headers={"Retry-After": "5"})
+
+        self.assertEqual(self.state.concurrency, 2)
+        self.assertEqual(self.state.ceiling, 4)
+        self.assertAlmostEqual(self.state.pause_until - time.monotonic(), 5, places=1)
+        self.assertFalse(self.throttle.free(self.state))
+        # Requests wait for the end of the pause.
+        call_later.assert_called_once()
+        self.assertAlmostEqual(call_later.call_args.args[0], 5, places=1)
+        self.assertEqual(self.stat("response_status_count/429"), 1)
+        self.assertEqual(self.stat("max_retry_after"), 5)
+
+    def test_held_requests_wait_for_the_end_of_the_pause(self):
+        self.state.pause_until = time.monotonic() + 5
+        request = Request(URL)
+
+        with mock.patch("twisted.internet.reactor.callLater"):
+            waiting = self.throttle.process_request(request)
+            waiting.send(None)
+
+        self.assertEqual(len(self.state.waiting), 1)
+        self.assertEqual(self.state.active, 0)
+        self.state.pause_until = 0.0
+        self.throttle.wake(self.state)
+        with self.assertRaises(StopIteration):
+            waiting.send(None)
+        self.assertEqual(self.state.active, 1)
+        self.assertEqual(self.stat("waits"), 1)
+
+    def test_throttled_response_at_concurrency_one_doubles_the_delay(self):
+        self.state.concurrency = 1
+
+        self.respond(status=503)
+        self.assertEqual(self.state.delay, MIN_DELAY_STEP)
+        self.state.hold_until = 0.0
+        self.respond(status=503)
+
+        self.assertEqual(self.state.concurrency, 1)
+        self.assertEqual(self.state.delay, MIN_DELAY_STEP * 2)
+        self.assertEqual(self.slot.delay, MIN_DELAY_STEP * 2)
+
+    def test_speed_up_stays_below_the_ceiling(self):
+        self.state.concurrency = 3
+        self.state.ceiling = 4
+        self.state.probe_at = time.monotonic() + 60
+        self.fill()
+        self.state.active -= 1
+
+        self.respond()
+
+        self.assertEqual(self.state.concurrency, 3)
+
+    def test_speed_up_passes_the_ceiling_after_the_probe_interval(self):
+        self.state.concurrency = 3
+        self.state.ceiling = 4
+        self.state.probe_at = time.monotonic() - 1
+        self.fill()
+        self.state.active -= 1
+
+        self.respond()
+
+        self.assertAlmostEqual(self.state.concurrency, 3 + 1 / 3)
+        self.assertEqual(self.stat("increases"), 1)
+
+    def test_throttled_response_sets_the_ceiling_until_the_probe(self):
+        self.throttle.probe_interval = 60
+        self.state.concurrency = 4
+
+        self.respond(status=429)
+
+        self.assertEqual(self.state.ceiling, 4)
+        self.assertAlmostEqual(self.state.probe_at - time.monotonic(), 60, places=1)
+
+    def test_throttled_response_without_retry_after_does_not_pause(self):
+        self.state.concurrency = 4
+
+        with mock.patch("twisted.internet.reactor.callLater") as call_later:
+            self.respond(status=503)
+
+        self.assertEqual(self.state.concurrency, 2)
+        self.assertEqual(self.state.pause_until, 0.0)
+        self.assertTrue(self.throttle.free(self.state))
+        call_later.assert_not_called()
+        self.assertEqual(self.stat("max_retry_after"), 0)
+
+    def test_retry_after_is_capped_by_the_max_delay(self):
+        self.throttle.max_delay = 10
+
+        with mock.patch("twisted.internet.reactor.callLater"):
+            self.respond(status=429, headers={"Retry-After": "3600"})
+
+        self.assertAlmostEqual(self.state.pause_until - time.monotonic(), 10, places=1)
+
+    def test_responses_queued_during_the_pause_do_not_decrease_again(self):
+        self.state.concurrency = 8
+
+        with mock.patch("twisted.internet.reactor.callLater"):
+            self.respond(status=429, latency=0.1, headers={"Retry-After": "5"})
+            # The pause is over, but these requests were sent before it.
+            self.state.pause_until = time.monotonic()
+            self.respond(status=429, latency=0.1)
+            self.respond(latency=5.0)
+
+        self.assertEqual(self.state.concurrency, 4)
+        self.assertEqual(self.state.ceiling, 8)
+        self.assertEqual(self.stat("decreases"), 1)
+
+    def test_timeout_cuts_concurrency_by_a_quarter(self):
+        self.state.concurrency = 4
+        request = Request(URL)
+        run(self.throttle.process_request(request))
+
+        self.throttle.process_exception(request, defer.TimeoutError())
+
+        self.assertEqual(self.state.concurrency, 3)
+        self.assertEqual(self.state.active, 0)
+        self.assertEqual(self.stat("timeouts"), 1)
+        self.assertEqual(self.stat("decreases"), 1)
+
+
+class RetryAfterTests(TestCase):
+    def test_seconds(self):
+        response = Response(URL, status=429, headers={"Retry-After": "120"})
+
+        self.assertEqual(retry_after(response), 120)
+
+    def test_http_date(self):
+        now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        date = format_datetime(now + timedelta(seconds=30), usegmt=True)
+        response = Response(URL, status=503, headers={"Retry-After": date})
+
+        self.assertEqual(retry_after(response, now=now.timestamp()), 30)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(retry_after(Response(URL, status=429)))
+        self.assertIsNone(
+            retry_after(Response(URL, status=429, headers={"Retry-After": "soon"}))
+        )
@@ -0,0 +1,348 @@
+"""
+Adaptive per-host crawl speed.
+
+``AdaptiveThrottle`` limits the requests sent at a time to each host, and sets
+the delay of its downloader slot, from what the host answers with an additive
+increase, multiplicative decrease rule:
+
+* a ``429 Too Many Requests`` or ``503 Service Unavailable`` response halves
+  the concurrency, or doubles the delay once the concurrency is down to 1,
+  and the host is left alone for the time its ``Retry-After`` header asks;
+* a timeout, or a latency (moving average) above
+  ``FREEWORK_THROTTLE_LATENCY_TOLERANCE`` times the lowest one seen, means the
+  host is queueing requests: the concurrency is cut by a quarter;
+* any other response, while all the concurrency of the host is used, speeds
+  up: the delay shrinks down to ``DOWNLOAD_DELAY``, then the concurrency grows
+  by about one per round of ``concurrency`` responses, up to
+  ``CONCURRENT_REQUESTS_PER_DOMAIN``, or up to one less than the concurrency
+  at which the host last answered 429 or 503 during the
+  ``FREEWORK_THROTTLE_PROBE_INTERVAL`` seconds that follow.
+
+The responses that arrive within one latency of a decrease, or during a
+pause, answer requests sent before it and do not decrease the host again.
+
+Requests are held back in ``process_request``, after the downloader took
+them: while they wait, they count in its ``CONCURRENT_REQUESTS``. A crawl of a
+single host is not slowed down by this, but the requests waiting for a paused
+or slow host can fill the downloader and hold back the other hosts, so
+``CONCURRENT_REQUESTS`` should stay well above
+``CONCURRENT_REQUESTS_PER_DOMAIN`` for crawls of several hosts.
+
+The learned speed and ceiling of every host are saved as a ``HostThrottle`` at
+the end of the crawl, and the next crawl starts from them instead of
+``FREEWORK_THROTTLE_START_CONCURRENCY``. Decisions are counted in the crawl
+stats under ``throttle/``, with the final speed of each host.
+"""
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+from django.db import close_old_connections
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.httpobj import urlparse_cached
+from twisted.internet import defer, error
+
+from freework.crawls.models import HostThrottle
+from freework.scraper.writer import database_writer
+
+try:
+    from scrapy.exceptions import DownloadTimeoutError
+except ImportError:  # Older Scrapy raises the Twisted errors.
+    DownloadTimeoutError = defer.TimeoutError
+
+logger = logging.getLogger(__name__)
+
+TIMEOUTS = (
+    DownloadTimeoutError,
+    defer.TimeoutError,
+    error.TimeoutError,
+    error.TCPTimedOutError,
+)
+THROTTLED_STATUSES = {429, 503}
+# Weight of the latest response in the moving average of the latency.
+LATENCY_WEIGHT = 0.2
+# First delay set when the concurrency cannot go lower, and below which the
+# delay falls back to DOWNLOAD_DELAY.
+MIN_DELAY_STEP = 0.05
+
+
+@dataclass
+class HostState:
+    concurrency: float
+    delay: float
+    latency: float | None = None
+    min_latency: float | None = None
+    # Concurrency at which the host last throttled the crawl, not reached
+    # again before the monotonic time probe_at.
+    ceiling: float | None = None
+    probe_at: float = 0.0
+    responses: int = 0
+    # Monotonic times until which the host is not decreased again, and not
+    # sent any request.
+    hold_until: float = 0.0
+    pause_until: float = 0.0
+    # Requests being downloaded, and deferreds of the requests waiting for
+    # their turn.
+    active: int = 0
+    waiting: deque = field(default_factory=deque)
+    wake_call: object = None
+
+
+def retry_after(response, now=None):
+    """Return the seconds a response asks to wait, or None."""
+    value = response.headers.get(b"Retry-After")
+    if not value:
+        return None
+    value = value.decode("latin-1").strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - (time.time() if now is None else now))
+
+
+class AdaptiveThrottle:
+    """Downloader middleware adjusting the speed of each host, see the module
+    documentation.
+    """
+
+    def __init__(
+        self,
+        crawler,
+        start_concurrency=4,
+        max_concurrency=8,
+        min_delay=0.0,
+        max_delay=60.0,
+        latency_tolerance=2.0,
+        probe_interval=300.0,
+    ):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.writer = database_writer(crawler)
+        self.downloader = None
+        self.start_concurrency = min(start_concurrency, max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.latency_tolerance = latency_tolerance
+        self.probe_interval = probe_interval
+        self.hosts = {}
+        # Requests let through by process_request and not answered yet.
+        self.acquired = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("FREEWORK_THROTTLE_ENABLED"):
+            raise NotConfigured
+        if settings.getbool("AUTOTHROTTLE_ENABLED"):
+            raise NotConfigured("AutoThrottle already sets the download delays.")
+        middleware = cls(
+            crawler,
+            start_concurrency=settings.getint("FREEWORK_THROTTLE_START_CONCURRENCY", 4),
+            max_concurrency=settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN"),
+            min_delay=settings.getfloat("DOWNLOAD_DELAY"),
+            max_delay=settings.getfloat("FREEWORK_THROTTLE_MAX_DELAY", 60.0),
+            latency_tolerance=settings.getfloat(
+                "FREEWORK_THROTTLE_LATENCY_TOLERANCE", 2.0
+            ),
+            probe_interval=settings.getfloat("FREEWORK_THROTTLE_PROBE_INTERVAL", 300.0),
+        )
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        self.downloader = self.crawler.engine.downloader
+        close_old_connections()
+        probe_at = time.monotonic() + self.probe_interval
+        for saved in HostThrottle.objects.all():
+            self.hosts[saved.host] = HostState(
+                concurrency=min(max(saved.concurrency, 1.0), self.max_concurrency),
+                delay=min(max(saved.delay, self.min_delay), self.max_delay),
+                ceiling=saved.ceiling,
+                probe_at=probe_at,
+            )
+
+    def spider_closed(self, spider, reason):
+        learned = {}
+        for host, state in self.hosts.items():
+            if not state.responses:
+                continue
+            learned[host] = {
+                "concurrency": state.concurrency,
+                "delay": state.delay,
+                "latency": state.latency,
+                "ceiling": state.ceiling,
+            }
+            self.stats.set_value(f"throttle/{host}/concurrency", state.concurrency)
+            self.stats.set_value(f"throttle/{host}/delay", state.delay)
+            logger.info(
+                "Throttle of %(host)s: concurrency %(concurrency).1f, "
+                "delay %(delay).2fs",
+                {"host": host, "concurrency": state.concurrency, "delay": state.delay},
+                extra={"spider": spider},
+            )
+        return self.writer.run(self.save, learned)
+
+    @staticmethod
+    def save(learned):
+        close_old_connections()
+        for host, fields in learned.items():
+            HostThrottle.objects.update_or_create(host=host, defaults=fields)
+
+    def state(self, request):
+        host = urlparse_cached(request).hostname or ""
+        if host not in self.hosts:
+            self.hosts[host] = HostState(self.start_concurrency, self.min_delay)
+        return self.hosts[host]
+
+    async def process_request(self, request, spider=None):
+        state = self.state(request)
+        if state.waiting or not self.free(state):
+            waiter = defer.Deferred()
+            state.waiting.append(waiter)
+            self.stats.inc_value("throttle/waits")
+            self.wake(state)
+            await maybe_deferred_to_future(waiter)
+        else:
+            state.active += 1
+        self.acquired.add(request)
+        self.apply(request, state)
+        return None
+
+    def process_response(self, request, response, spider=None):
+        if request not in self.acquired:
+            # Not downloaded, e.g. answered by the HTTP cache.
+            return response
+        state = self.state(request)
+        # Only a host using all its concurrency tells if it could take more.
+        busy = bool(state.waiting) or state.active >= int(state.concurrency)
+        self.release(request)
+        state.responses += 1
+        now = time.monotonic()
+        latency = request.meta.get("download_latency", 0.0)
+        if response.status in THROTTLED_STATUSES:
+            self.stats.inc_value(f"throttle/response_status_count/{response.status}")
+            wait = retry_after(response)
+            if wait is not None:
+                wait = min(wait, self.max_delay)
+                state.pause_until = max(state.pause_until, now + wait)
+                self.stats.max_value("throttle/max_retry_after", wait)
+            if now >= state.hold_until:
+                state.ceiling = state.concurrency
+                state.probe_at = now + self.probe_interval
+            self.slow_down(state, now, latency, factor=0.5)
+        else:
+            self.observe(state, latency)
+            if state.latency > state.min_latency * self.latency_tolerance:
+                # At a concurrency of 1 the host is slow, not overloaded by us.
+                self.slow_down(state, now, latency, factor=0.75, delay=False)
+            elif busy and now >= state.hold_until:
+                self.speed_up(state, now)
+        self.apply(request, state)
+        self.wake(state)
+        return response
+
+    def process_exception(self, request, exception, spider=None):
+        if request not in self.acquired:
+            return None
+        state = self.release(request)
+        if isinstance(exception, TIMEOUTS):
+            self.stats.inc_value("throttle/timeouts")
+            self.slow_down(
+                state, time.monotonic(), state.latency or 0.0, factor=0.75, delay=False
+            )
+        self.wake(state)
+        return None
+
+    def free(self, state):
+        return (
+            state.active < int(state.concurrency)
+            and state.pause_until <= time.monotonic()
+        )
+
+    def release(self, request):
+        self.acquired.remove(request)
+        state = self.state(request)
+        state.active -= 1
+        return state
+
+    def wake(self, state):
+        """Let waiting requests through while the host has room for them, or
+        wake up again at the end of its pause.
+        """
+        pause = state.pause_until - time.monotonic()
+        if pause > 0:
+            if state.wake_call is not None and state.wake_call.active():
+                state.wake_call.reset(pause)
+            else:
+                from twisted.internet import reactor
+
+                state.wake_call = reactor.callLater(pause, self.wake, state)
+            return
+        while state.waiting and self.free(state):
+            state.active += 1
+            state.waiting.popleft().callback(None)
+
+    def observe(self, state, latency):
+        if state.latency is None:
+            state.latency = latency
+        else:
+            state.latency += LATENCY_WEIGHT * (latency - state.latency)
+        # The lowest average rather than the lowest response, which may be an
+        # outlier.
+        if state.min_latency is None or state.latency < state.min_latency:
+            state.min_latency = state.latency
+
+    def slow_down(self, state, now, latency, factor, delay=True):
+        """Multiply the speed of the host by ``factor``: its concurrency, or its
+        delay if ``delay`` and the concurrency is 1.
+        """
+        if now < state.hold_until:
+            return
+        if state.concurrency > 1:
+            state.concurrency = max(1.0, state.concurrency * factor)
+        elif delay:
+            state.delay = min(self.max_delay, max(state.delay / factor, MIN_DELAY_STEP))
+        else:
+            return
+        # Responses to the requests sent before now, or queued during a pause,
+        # do not count.
+        state.hold_until = max(
+            now + max(latency, state.latency or 0.0), state.pause_until
+        )
+        self.stats.inc_value("throttle/decreases")
+
+    def speed_up(self, state, now):
+        limit = self.max_concurrency
+        if state.ceiling is not None and now < state.probe_at:
+            limit = min(limit, max(1.0, state.ceiling - 1))
+        if state.delay > self.min_delay:
+            state.delay *= 0.8
+            if state.delay < max(self.min_delay, MIN_DELAY_STEP):
+                state.delay = self.min_delay
+        elif state.concurrency < limit:
+            state.concurrency = min(limit, state.concurrency + 1 / state.concurrency)
+        else:
+            return
+        self.stats.inc_value("throttle/increases")
+
+    def apply(self, request, state):
+        """Set the delay of the request's downloader slot.
+
+        The concurrency is enforced by the middleware rather than the slot:
+        the downloader may start more requests than the concurrency of a slot
+        when they arrive together, e.g. at the end of a pause.
+        """
+        key = request.meta.get("download_slot") or urlparse_cached(request).hostname
+        slot = self.downloader.slots.get(key) if self.downloader else None
+        if slot is not None:
+            slot.delay = state.delay
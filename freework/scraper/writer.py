@@ -0,0 +1,56 @@
+"""
+Single database writer of a crawl.
+
+Every component of a crawl writing to the database (the offer pipeline, the
+telemetry, the adaptive throttle) hands its writes to the ``DatabaseWriter``
+of the crawl. It runs them one after the other on a dedicated thread with its
+own connection: the reactor thread never waits for the database, and the
+writes of a crawl never compete with each other for SQLite's write lock.
+"""
+
+from weakref import WeakKeyDictionary
+
+from django.db import connections
+from scrapy import signals
+from twisted.internet.threads import deferToThreadPool
+from twisted.python.threadpool import ThreadPool
+
+_writers = WeakKeyDictionary()
+
+
+def database_writer(crawler):
+    """Return the writer of ``crawler``, stopped when its engine stops."""
+    writer = _writers.get(crawler)
+    if writer is None:
+        writer = _writers[crawler] = DatabaseWriter()
+        crawler.signals.connect(writer.stop, signal=signals.engine_stopped)
+    return writer
+
+
+class DatabaseWriter:
+    """Run functions on a single thread, started on first use."""
+
+    def __init__(self):
+        self.threadpool = None
+
+    def run(self, function, *args, **kwargs):
+        """Call ``function`` on the writer thread and return a deferred of its
+        result.
+        """
+        from twisted.internet import reactor
+
+        if self.threadpool is None:
+            self.threadpool = ThreadPool(
+                minthreads=1, maxthreads=1, name="freework-writer"
+            )
+            self.threadpool.start()
+        return deferToThreadPool(reactor, self.threadpool, function, *args, **kwargs)
+
+    def stop(self):
+        """Wait for the pending writes and stop the thread."""
+        if self.threadpool is None:
+            return
+        # The writer thread's connection is closed by the thread that owns it.
+        self.threadpool.callInThread(connections.close_all)
+        self.threadpool.stop()
+        self.threadpool = None